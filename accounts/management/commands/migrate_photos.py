@@ -1,11 +1,12 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.db import connections
-import shutil
+from collections import Counter
 from datetime import datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from accounts.models import User, UserImage
 from vendors.models import Vendor, VendorImage
+from silkroad_backend.media_migration import CopyJob, MediaCopier
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,9 +25,15 @@ class Command(BaseCommand):
                             help='Root path to PHP storage/app/public directory')
         parser.add_argument('--user-id', type=int, help='Migrate only this user')
         parser.add_argument('--vendor-id', type=int, help='Migrate only this vendor')
+        parser.add_argument('--workers', type=int, default=8, help='Parallel file copy threads')
+        parser.add_argument('--manifest', type=str,
+                            help='Manifest of copied files for resuming (default: MEDIA_ROOT/.migrate_photos.jsonl)')
+        parser.add_argument('--batch-size', type=int, default=500)
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        options['manifest'] = options['manifest'] or str(Path(settings.MEDIA_ROOT) / '.migrate_photos.jsonl')
         php_public_root = Path(options['php_public_root'])
         php_storage_root = Path(options['php_storage_root'])
         using_db = 'legacy'
@@ -72,17 +79,75 @@ class Command(BaseCommand):
 
         self.stdout.write(f"Found {len(rows)} {entity_type}s with photos.")
 
-        for row in rows:
-            entity_id = row[0]
-            old_path = row[1]
-            created_at = row[2] if len(row) > 2 else None
-            
-            self._migrate_photo(entity_id, old_path, created_at, entity_type, php_public, php_storage, dry_run)
+        model, image_model, fk = (User, UserImage, 'user_id') if entity_type == 'user' else (Vendor, VendorImage, 'vendor_id')
+        subfolder = 'user_photos' if entity_type == 'user' else 'vendor_photos'
 
-    def _migrate_photo(self, entity_id, old_rel_path, created_at, entity_type, php_public, php_storage, dry_run):
-        # 1. Determine Source File
-        
-        # Cleaning logic from user request
+        # Один запрос на сущности и уже перенесённые фото вместо запроса на строку
+        ids = [row[0] for row in rows]
+        known = set(model.objects.filter(id__in=ids).values_list('id', flat=True))
+        existing = list(image_model.objects.filter(**{f'{fk}__in': ids}).values_list(fk, 'image'))
+        migrated = set(existing)
+        # Прежняя версия команды клала файл под исходным именем в датированную папку
+        # (<subfolder>/%Y/%m/%d/<имя>) — такие строки узнаются по имени файла из PHP
+        legacy_migrated = {(entity_id, PurePosixPath(image).name) for entity_id, image in existing}
+
+        jobs = []
+        already = 0
+        for entity_id, old_path, created_at in rows:
+            if not dry_run and entity_id not in known:
+                self.stdout.write(self.style.WARNING(f"Skipping: {entity_type} {entity_id} not found in Django DB"))
+                continue
+            if (entity_id, PurePosixPath(old_path.strip('/')).name) in legacy_migrated:
+                already += 1
+                continue
+            jobs.append(CopyJob(
+                key=entity_id,
+                candidates=self._candidates(old_path, php_public, php_storage),
+                subfolder=subfolder,
+                meta={'old_path': old_path, 'uploaded_at': self._timestamp(created_at)},
+            ))
+
+        copier = MediaCopier(options['manifest'], workers=options['workers'], dry_run=dry_run)
+        results = copier.run(jobs, on_result=lambda result: self._report(entity_type, result, dry_run))
+
+        if dry_run:
+            return
+        images = [
+            image_model(**{fk: result.job.key}, image=result.dest, order=0, uploaded_at=result.job.meta['uploaded_at'])
+            for result in results
+            if result.dest and (result.job.key, result.dest) not in migrated
+        ]
+        image_model.objects.bulk_create(images, batch_size=options['batch_size'])
+
+        counts = Counter(result.status for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f"{entity_type}: {len(images)} DB records created, {already} already migrated; files "
+            + ', '.join(f"{status}={count}" for status, count in sorted(counts.items()))
+        ))
+
+    def _report(self, entity_type, result, dry_run):
+        job = result.job
+        if result.status == 'missing':
+            self.stdout.write(self.style.WARNING(f"File not found for {entity_type} {job.key} ({job.meta['old_path']}). Checked {len(job.candidates)} paths."))
+        elif result.status == 'error':
+            self.stdout.write(self.style.ERROR(f"Error migrating {entity_type} {job.key}: {result.error}"))
+        elif dry_run:
+            self.stdout.write(f"[DRY-RUN] {entity_type} id={job.key}, old path={job.meta['old_path']} -> {result.dest}")
+        elif self.verbosity > 1:
+            self.stdout.write(f"{result.status}: {entity_type} {job.key} -> {result.dest}")
+
+    def _timestamp(self, created_at):
+        # Use uploaded_at timestamp or now
+        if isinstance(created_at, datetime):
+            return created_at
+        if isinstance(created_at, str):
+            try:
+                return datetime.fromisoformat(created_at)
+            except ValueError:
+                pass
+        return datetime.now()
+
+    def _candidates(self, old_rel_path, php_public, php_storage):
         # Remove possible prefixes to get pure filename or relative path
         clean_path = old_rel_path.strip('/')
         
@@ -96,7 +161,7 @@ class Command(BaseCommand):
             
         clean_path = clean_path.strip('/')
 
-        candidates = [
+        return [
             # User path discovered (avatars!)
             php_storage / 'avatars' / clean_path,
             php_public / 'storage/avatars' / clean_path,
@@ -109,76 +174,3 @@ class Command(BaseCommand):
             php_public / clean_path,
             php_storage / clean_path, 
         ]
-        
-        found_path = None
-        for p in candidates:
-             if p.exists():
-                 found_path = p
-                 break
-        
-        if not found_path:
-            self.stdout.write(self.style.WARNING(f"File not found for {entity_type} {entity_id} ({old_rel_path}) cleaned={clean_path}. Checked {len(candidates)} paths."))
-            return
-
-        # 2. Determine Destination
-        new_filename = found_path.name
-        
-        # Use uploaded_at timestamp or now
-        if isinstance(created_at, str):
-            try:
-                ts = datetime.fromisoformat(str(created_at))
-            except:
-                ts = datetime.now()
-        elif isinstance(created_at, datetime):
-            ts = created_at
-        else:
-            ts = datetime.now()
-            
-        subfolder = 'user_photos' if entity_type == 'user' else 'vendor_photos'
-        new_rel_dir = f"{subfolder}/{ts:%Y/%m/%d}"
-        new_rel_path = f"{new_rel_dir}/{new_filename}"
-        new_full_path = Path(settings.MEDIA_ROOT) / new_rel_path
-
-        # 3. Dry Run Output
-        if dry_run:
-            self.stdout.write(f"[DRY-RUN] {entity_type} id={entity_id}, old path={old_rel_path} -> full: {found_path}")
-            self.stdout.write(f"         Would copy to: {new_full_path}")
-            self.stdout.write(f"         Would create {entity_type.capitalize()}Image(id={entity_id}, image={new_rel_path})")
-            return
-
-        # 4. Check Entity Existence
-        if entity_type == 'user':
-            entity_obj = User.objects.filter(id=entity_id).first()
-        else:
-            entity_obj = Vendor.objects.filter(id=entity_id).first()
-            
-        if not entity_obj:
-            self.stdout.write(self.style.WARNING(f"Skipping: {entity_type} {entity_id} not found in Django DB"))
-            return
-
-        # 5. Execute Copy
-        try:
-             new_full_path.parent.mkdir(parents=True, exist_ok=True)
-             if not new_full_path.exists():
-                shutil.copy2(found_path, new_full_path)
-                self.stdout.write(self.style.SUCCESS(f"Copied {found_path} -> {new_full_path}"))
-             
-             # 6. Save DB Record
-             if entity_type == 'user':
-                 UserImage.objects.create(
-                    user=entity_obj,
-                    image=new_rel_path,
-                    order=0,
-                    uploaded_at=ts
-                 )
-             else:
-                 VendorImage.objects.create(
-                    vendor=entity_obj,
-                    image=new_rel_path,
-                    order=0,
-                    uploaded_at=ts
-                 )
-             self.stdout.write(self.style.SUCCESS(f"Created DB record for {entity_type} {entity_id}"))
-
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Error migrating {entity_type} {entity_id}: {e}"))
@@ -1,14 +1,20 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from .models import User, UserImage
+from silkroad_backend import images as image_derivatives
 
 
 class UserImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = UserImage
         fields = '__all__'
         read_only_fields = ('user', 'uploaded_at')
 
+    def get_srcset(self, obj):
+        return image_derivatives.responsive([obj.image.url])[0] if obj.image else None
+
 
 class UserSerializer(serializers.ModelSerializer):
     images = UserImageSerializer(many=True, read_only=True)
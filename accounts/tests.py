@@ -133,3 +133,34 @@ class ImageGalleryTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         img.refresh_from_db()
         self.assertEqual(img.order, 10)
+
+
+class MediaCopierTests(TestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp(prefix='silkroad_legacy_src')
+        self.media = tempfile.mkdtemp(prefix='silkroad_legacy_media')
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        for name, content in (('a.jpg', b'same'), ('b.jpg', b'same'), ('c.jpg', b'other')):
+            with open(os.path.join(self.source, name), 'wb') as f:
+                f.write(content)
+        self.manifest = os.path.join(self.media, 'manifest.jsonl')
+
+    def _run(self):
+        from silkroad_backend.media_migration import CopyJob, MediaCopier
+
+        jobs = [
+            CopyJob(key=name, candidates=[os.path.join(self.source, 'missing.jpg'), os.path.join(self.source, name)],
+                    subfolder='vendor_photos')
+            for name in ('a.jpg', 'b.jpg', 'c.jpg')
+        ]
+        return {r.job.key: r for r in MediaCopier(self.manifest, workers=2, media_root=self.media).run(jobs)}
+
+    def test_identical_files_are_stored_once_and_reruns_skip(self):
+        results = self._run()
+        self.assertEqual(results['a.jpg'].dest, results['b.jpg'].dest)
+        self.assertNotEqual(results['a.jpg'].dest, results['c.jpg'].dest)
+        self.assertTrue(os.path.exists(os.path.join(self.media, results['c.jpg'].dest)))
+
+        rerun = self._run()
+        self.assertEqual({r.status for r in rerun.values()}, {'skipped'})
@@ -77,3 +77,44 @@ def financial_data(request):
         'platform_revenue': float(platform_revenue),
         'vendor_revenue': {r[0]: float(r[1]) for r in vendor_revenue}
     })
+
+@staff_member_required
+def analytics_sink_stats(request):
+    """
+    Backpressure metrics of the buffered ClickHouse sink and of this worker's event queue.
+    """
+    from analytics import sink
+    from silkroad_backend.analytics import AnalyticsService
+    return JsonResponse({**sink.stats(), 'worker_queue': AnalyticsService.stats()})
+
+@staff_member_required
+def response_cache_stats(request):
+    """
+    Hit/stale/miss counters of the public API response cache.
+    """
+    from silkroad_backend import response_cache
+    return JsonResponse(response_cache.stats())
+
+@staff_member_required
+def notification_dispatch_stats(request):
+    """
+    Fan-out size, latency and dedupe counters of the notification dispatcher.
+    """
+    from notifications import dispatch
+    return JsonResponse(dispatch.stats())
+
+@staff_member_required
+def chatbot_llm_stats(request):
+    """
+    Per-provider latency histograms (first token / full reply) and race outcomes of the chat LLM pipeline.
+    """
+    from support_chatbot import llm
+    return JsonResponse(llm.stats())
+
+@staff_member_required
+def ticket_scan_stats(request):
+    """
+    Gate scan outcomes (ok / used / invalid) of the ticket scan index.
+    """
+    from vendors.services import scan
+    return JsonResponse(scan.stats())
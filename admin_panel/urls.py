@@ -18,4 +18,9 @@ urlpatterns = [
     path('analytics/data/', analytics_views.analytics_data, name='admin_analytics_data'),
     path('analytics/finance/', analytics_views.financial_report_view, name='admin_analytics_finance'),
     path('analytics/finance/data/', analytics_views.financial_data, name='admin_analytics_finance_data'),
+    path('analytics/sink/stats/', analytics_views.analytics_sink_stats, name='admin_analytics_sink_stats'),
+    path('analytics/cache/stats/', analytics_views.response_cache_stats, name='admin_response_cache_stats'),
+    path('analytics/notifications/stats/', analytics_views.notification_dispatch_stats, name='admin_notification_dispatch_stats'),
+    path('analytics/chatbot/stats/', analytics_views.chatbot_llm_stats, name='admin_chatbot_llm_stats'),
+    path('analytics/scan/stats/', analytics_views.ticket_scan_stats, name='admin_ticket_scan_stats'),
 ]
\ No newline at end of file
@@ -1,12 +1,14 @@
 from .schema import get_client
-from notifications.models import Notification
-from accounts.models import User
+from notifications import dispatch
 from django.utils import timezone
 from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Повтор одного и того же алерта не чаще раза в окно
+ALERT_DEDUPE_WINDOW = 60 * 60 * 6
+
 def check_cancellation_surge():
     """
     Detects if any region or vendor has a cancellation surge (>20% last 24h).
@@ -25,18 +27,17 @@ def check_cancellation_surge():
     '''
     try:
         results = client.execute(query)
-        if results:
-            admins = User.objects.filter(is_staff=True)
-            for row in results:
-                vendor_id, cancels, total, rate = row
-                for admin in admins:
-                    Notification.objects.create(
-                        user=admin,
-                        title="🚨 Cancellation Surge Detected",
-                        message=f"Vendor ID {vendor_id} has a {rate:.1%} cancellation rate ({cancels}/{total}) in the last 24 hours.",
-                        type="error",
-                        link=f"/admin/vendors/{vendor_id}/"
-                    )
+        for row in results or []:
+            vendor_id, cancels, total, rate = row
+            dispatch.notify(
+                dispatch.STAFF,
+                title="🚨 Cancellation Surge Detected",
+                message=f"Vendor ID {vendor_id} has a {rate:.1%} cancellation rate ({cancels}/{total}) in the last 24 hours.",
+                type="error",
+                link=f"/admin/vendors/{vendor_id}/",
+                dedupe_key=f"alert:cancellation_surge:{vendor_id}",
+                dedupe_window=ALERT_DEDUPE_WINDOW,
+            )
     except Exception as e:
         logger.error(f"Error checking cancellation surge: {e}")
 
@@ -57,14 +58,14 @@ def check_sales_drop():
         results = client.execute(query)
         if results:
             today, avg, ratio = results[0]
-            admins = User.objects.filter(is_staff=True)
-            for admin in admins:
-                Notification.objects.create(
-                    user=admin,
-                    title="📉 Sales Drop Alert",
-                    message=f"Revenue in the last 24h ({today:,.0f} UZS) is significantly lower than average ({avg:,.0f} UZS).",
-                    type="warning",
-                    link="/admin/analytics/"
-                )
+            dispatch.notify(
+                dispatch.STAFF,
+                title="📉 Sales Drop Alert",
+                message=f"Revenue in the last 24h ({today:,.0f} UZS) is significantly lower than average ({avg:,.0f} UZS).",
+                type="warning",
+                link="/admin/analytics/",
+                dedupe_key="alert:sales_drop",
+                dedupe_window=ALERT_DEDUPE_WINDOW,
+            )
     except Exception as e:
         logger.error(f"Error checking sales drop: {e}")
@@ -1,5 +1,5 @@
 from django.utils import timezone
-from .tasks import sync_event_to_clickhouse_task
+from . import sink
 
 def send_booking_event(booking, status_override=None):
     """
@@ -17,21 +17,23 @@ def send_booking_event(booking, status_override=None):
         'region': booking.hotel.region.name if booking.hotel and booking.hotel.region else 'Unknown',
         'created_at': booking.created_at.strftime('%Y-%m-%d %H:%M:%S')
     }
-    sync_event_to_clickhouse_task.delay('booking_events', data)
+    sink.enqueue('booking_events', data)
 
 def send_ticket_sale_event(ticket_sale):
     """
     Sends a ticket sale event to ClickHouse.
     """
+    service = ticket_sale.ticket_type.service
+    vendor = service.vendor
     data = {
         'event_time': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
         'ticket_sale_id': ticket_sale.id,
-        'vendor_id': ticket_sale.vendor.id if ticket_sale.vendor else 0,
-        'service_id': ticket_sale.sight.id if ticket_sale.sight else 0,
-        'customer_id': ticket_sale.created_by.id if ticket_sale.created_by else 0,
-        'amount': float(ticket_sale.total_amount),
-        'currency': 'UZS', # Domestic usually
+        'vendor_id': vendor.id if vendor else 0,
+        'service_id': service.id,
+        'customer_id': ticket_sale.user_id or 0,
+        'amount': float(ticket_sale.price_paid),
+        'currency': ticket_sale.currency.code if ticket_sale.currency else 'UZS',
         'quantity': ticket_sale.total_qty,
-        'region': ticket_sale.sight.region.name if ticket_sale.sight and ticket_sale.sight.region else 'Unknown'
+        'region': vendor.region.name if vendor and vendor.region else 'Unknown'
     }
-    sync_event_to_clickhouse_task.delay('ticket_sales_events', data)
+    sink.enqueue('ticket_sales_events', data)
@@ -1,7 +1,46 @@
+import os
+import threading
+
 from clickhouse_driver import Client
 from django.conf import settings
 
-def get_client():
+# Колонки таблиц событий: используются и для DDL, и для колоночных INSERT буфера (analytics.sink)
+TABLES = {
+    'booking_events': {
+        'columns': [
+            ('event_time', 'DateTime'),
+            ('booking_id', 'Int64'),
+            ('user_id', 'Int32'),
+            ('vendor_id', 'Int32'),
+            ('booking_type', 'String'),
+            ('status', 'String'),
+            ('amount', 'Float64'),
+            ('currency', 'String'),
+            ('region', 'String'),
+            ('created_at', 'DateTime'),
+        ],
+        'order_by': '(event_time, vendor_id)',
+    },
+    'ticket_sales_events': {
+        'columns': [
+            ('event_time', 'DateTime'),
+            ('ticket_sale_id', 'Int64'),
+            ('vendor_id', 'Int32'),
+            ('service_id', 'Int32'),
+            ('customer_id', 'Int32'),
+            ('amount', 'Float64'),
+            ('currency', 'String'),
+            ('quantity', 'Int32'),
+            ('region', 'String'),
+        ],
+        'order_by': '(event_time, vendor_id)',
+    },
+}
+
+_local = threading.local()
+
+
+def _new_client():
     return Client(
         host=settings.CLICKHOUSE_HOST or 'localhost',
         port=settings.CLICKHOUSE_PORT or 9000,
@@ -10,40 +49,44 @@ def get_client():
         database=settings.CLICKHOUSE_DATABASE or 'default'
     )
 
+
+def get_client():
+    """
+    Клиент ClickHouse, переиспользуемый в пределах потока (соединение открывается
+    лениво и живёт между запросами). Client не потокобезопасен, поэтому по одному
+    на поток; после fork (Celery prefork, gunicorn) создаётся заново.
+    """
+    client = getattr(_local, 'client', None)
+    if client is None or getattr(_local, 'pid', None) != os.getpid():
+        client = _new_client()
+        _local.client = client
+        _local.pid = os.getpid()
+    return client
+
+
+def reset_client():
+    """
+    Закрывает соединение текущего потока (после ошибки сети/сервера).
+    """
+    client = getattr(_local, 'client', None)
+    _local.client = None
+    if client is not None:
+        try:
+            client.disconnect()
+        except Exception:
+            pass
+
+
 def init_schema():
     client = get_client()
-    
-    # 1. booking_events
-    client.execute('''
-        CREATE TABLE IF NOT EXISTS booking_events (
-            event_time DateTime,
-            booking_id Int64,
-            user_id Int32,
-            vendor_id Int32,
-            booking_type String,
-            status String,
-            amount Float64,
-            currency String,
-            region String,
-            created_at DateTime
-        ) ENGINE = MergeTree()
-        ORDER BY (event_time, vendor_id)
-    ''')
-    
-    # 2. ticket_sales_events
-    client.execute('''
-        CREATE TABLE IF NOT EXISTS ticket_sales_events (
-            event_time DateTime,
-            ticket_sale_id Int64,
-            vendor_id Int32,
-            service_id Int32,
-            customer_id Int32,
-            amount Float64,
-            currency String,
-            quantity Int32,
-            region String
+
+    for name, table in TABLES.items():
+        columns = ',\n            '.join(f'{column} {type_}' for column, type_ in table['columns'])
+        client.execute(f'''
+        CREATE TABLE IF NOT EXISTS {name} (
+            {columns}
         ) ENGINE = MergeTree()
-        ORDER BY (event_time, vendor_id)
+        ORDER BY {table['order_by']}
     ''')
     print("ClickHouse schema initialized successfully.")
 
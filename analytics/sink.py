@@ -0,0 +1,189 @@
+"""
+Буферизованная отправка событий в ClickHouse.
+
+События складываются в Redis-список на таблицу (RPUSH, без Celery-задачи на событие)
+и выгружаются пачками колоночным INSERT:
+    - по размеру: когда в буфере набралось ANALYTICS_SINK_BATCH_SIZE событий,
+      ставится одна задача flush_clickhouse_buffer_task (дедупликация через SET NX);
+    - по времени: задача периодически запускается Celery beat.
+Неудачная пачка возвращается в начало буфера; буфер ограничен ANALYTICS_SINK_MAX_BUFFER,
+лишние (самые старые) события отбрасываются и учитываются в счётчике dropped.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .schema import TABLES, get_client, reset_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = getattr(settings, 'ANALYTICS_SINK_BATCH_SIZE', 1000)
+MAX_BUFFER = getattr(settings, 'ANALYTICS_SINK_MAX_BUFFER', 100000)
+INSERT_RETRIES = 3
+
+STATS_KEY = 'analytics:sink:stats'
+
+
+def _buffer_key(table):
+    return f'analytics:sink:buffer:{table}'
+
+
+def _scheduled_key(table):
+    return f'analytics:sink:scheduled:{table}'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+def enqueue(table, data):
+    """
+    Кладёт событие в буфер таблицы. Без Redis — откат на отдельную Celery-задачу.
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown ClickHouse table: {table}")
+    try:
+        redis = _redis()
+        pipe = redis.pipeline()
+        pipe.rpush(_buffer_key(table), json.dumps(data, default=_json_default))
+        pipe.hincrby(STATS_KEY, f'{table}:enqueued', 1)
+        length, _ = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Analytics buffer unavailable, sending {table} event directly: {e}")
+        from .tasks import sync_event_to_clickhouse_task
+        sync_event_to_clickhouse_task.delay(table, json.loads(json.dumps(data, default=_json_default)))
+        return
+
+    # Событие уже в буфере: ошибки ниже не должны отправлять его второй раз —
+    # буфер выгрузит Celery beat
+    try:
+        if length > MAX_BUFFER:
+            _drop_overflow(redis, table)
+        if length >= BATCH_SIZE and redis.set(_scheduled_key(table), 1, nx=True, ex=30):
+            from .tasks import flush_clickhouse_buffer_task
+            flush_clickhouse_buffer_task.delay(table)
+    except Exception as e:
+        logger.warning(f"Could not schedule analytics flush for {table}, beat will flush it: {e}")
+
+
+def _drop_overflow(redis, table):
+    key = _buffer_key(table)
+    overflow = redis.llen(key) - MAX_BUFFER
+    if overflow > 0:
+        pipe = redis.pipeline()
+        pipe.ltrim(key, overflow, -1)
+        pipe.hincrby(STATS_KEY, f'{table}:dropped', overflow)
+        pipe.execute()
+        logger.error(f"Analytics buffer {table} overflow: dropped {overflow} oldest events")
+
+
+def _coerce(type_, value):
+    if type_ == 'DateTime':
+        if isinstance(value, str):
+            try:
+                return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                pass
+        if isinstance(value, datetime):
+            return timezone.make_naive(value, dt_timezone.utc) if timezone.is_aware(value) else value
+        return timezone.make_naive(timezone.now(), dt_timezone.utc)
+    if type_.startswith('Int'):
+        return int(value or 0)
+    if type_.startswith('Float'):
+        return float(value or 0)
+    return '' if value is None else str(value)
+
+
+def to_columns(table, rows):
+    """
+    Колонки для INSERT ... VALUES с columnar=True: [[event_time...], [booking_id...], ...].
+    """
+    columns = TABLES[table]['columns']
+    return [[_coerce(type_, row.get(name)) for row in rows] for name, type_ in columns]
+
+
+def insert(table, rows):
+    """
+    Один колоночный INSERT с повторами; при ошибке соединения клиент пересоздаётся.
+    """
+    names = ', '.join(name for name, _ in TABLES[table]['columns'])
+    data = to_columns(table, rows)
+    for attempt in range(1, INSERT_RETRIES + 1):
+        try:
+            get_client().execute(f'INSERT INTO {table} ({names}) VALUES', data, columnar=True)
+            return
+        except Exception:
+            reset_client()
+            if attempt == INSERT_RETRIES:
+                raise
+            time.sleep(0.5 * 2 ** (attempt - 1))
+
+
+def flush(table, max_batches=None):
+    """
+    Выгружает буфер таблицы пачками по BATCH_SIZE. Возвращает число отправленных событий.
+    """
+    redis = _redis()
+    key = _buffer_key(table)
+    sent = 0
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            pipe = redis.pipeline()  # MULTI: параллельные flush получают разные пачки
+            pipe.lrange(key, 0, BATCH_SIZE - 1)
+            pipe.ltrim(key, BATCH_SIZE, -1)
+            raw, _ = pipe.execute()
+            if not raw:
+                break
+            rows = [json.loads(item) for item in raw]
+            try:
+                insert(table, rows)
+            except Exception as e:
+                # Вернуть пачку в начало буфера — уйдёт со следующим flush
+                redis.lpush(key, *reversed(raw))
+                redis.hincrby(STATS_KEY, f'{table}:failed_batches', 1)
+                _drop_overflow(redis, table)
+                logger.error(f"ClickHouse batch insert into {table} failed ({len(rows)} events requeued): {e}")
+                break
+            sent += len(rows)
+            batches += 1
+            pipe = redis.pipeline()
+            pipe.hincrby(STATS_KEY, f'{table}:flushed', len(rows))
+            pipe.hincrby(STATS_KEY, f'{table}:batches', 1)
+            pipe.execute()
+    finally:
+        redis.delete(_scheduled_key(table))
+    return sent
+
+
+def flush_all():
+    return {table: flush(table) for table in TABLES}
+
+
+def stats():
+    """
+    Метрики буфера: глубина очереди и счётчики enqueued/flushed/batches/failed_batches/dropped.
+    """
+    redis = _redis()
+    counters = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in redis.hgetall(STATS_KEY).items()}
+    result = {}
+    for table in TABLES:
+        result[table] = {
+            'buffered': redis.llen(_buffer_key(table)),
+            **{
+                name: counters.get(f'{table}:{name}', 0)
+                for name in ('enqueued', 'flushed', 'batches', 'failed_batches', 'dropped')
+            },
+        }
+    return result
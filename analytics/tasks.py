@@ -1,8 +1,7 @@
 from celery import shared_task
-from clickhouse_driver import Client
-from django.conf import settings
 from .alerts import check_cancellation_surge, check_sales_drop
 from .scoring import update_vendor_performance_scores
+from . import sink
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,29 +9,29 @@ logger = logging.getLogger(__name__)
 @shared_task(queue='analytics_queue')
 def sync_event_to_clickhouse_task(table_name, data):
     """
-    Asynchronously inserts event data into ClickHouse.
+    Inserts a single event into ClickHouse.
+    Fallback path only: events normally go through the buffered sink (analytics.sink).
     """
     try:
-        client = Client(
-            host=settings.CLICKHOUSE_HOST or 'localhost',
-            port=settings.CLICKHOUSE_PORT or 9000,
-            user=settings.CLICKHOUSE_USERNAME or 'default',
-            password=settings.CLICKHOUSE_PASSWORD or '',
-            database=settings.CLICKHOUSE_DATABASE or 'default'
-        )
-        
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['%(' + k + ')s' for k in data.keys()])
-        query = f"INSERT INTO {table_name} ({columns}) VALUES"
-        
-        client.execute(query, [data])
-        # logger.info(f"Successfully synced event to {table_name}: {data.get('booking_id') or data.get('ticket_sale_id')}")
-        
+        sink.insert(table_name, [data])
     except Exception as e:
         logger.error(f"Failed to sync event to ClickHouse ({table_name}): {e}")
-        # Optionally retry or handle failure
         raise e
 
+@shared_task(queue='analytics_queue', ignore_result=True)
+def flush_clickhouse_buffer_task(table_name=None):
+    """
+    Flushes buffered analytics events to ClickHouse in batches.
+    Triggered by buffer size (analytics.sink.enqueue) and periodically by Celery beat.
+    """
+    if table_name:
+        sent = {table_name: sink.flush(table_name)}
+    else:
+        sent = sink.flush_all()
+    if any(sent.values()):
+        logger.info(f"Flushed analytics events to ClickHouse: {sent}")
+    return sent
+
 @shared_task(queue='analytics_queue')
 def run_business_alerts_task():
     """
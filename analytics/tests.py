@@ -1,3 +1,85 @@
-from django.test import TestCase
+import threading
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from silkroad_backend.analytics import AnalyticsService, _EventChannel
+from . import sink
+
+
+class ClickHouseSinkTest(SimpleTestCase):
+    def test_rows_are_converted_to_typed_columns(self):
+        rows = [
+            {'event_time': '2026-07-01 10:00:00', 'booking_id': 5, 'amount': '12.5', 'status': 'NEW'},
+            {'event_time': '2026-07-01 10:00:01', 'booking_id': 6, 'region': None},
+        ]
+        columns = dict(zip([name for name, _ in sink.TABLES['booking_events']['columns']],
+                           sink.to_columns('booking_events', rows)))
+
+        self.assertEqual(columns['event_time'][0], datetime(2026, 7, 1, 10, 0))
+        self.assertEqual(columns['booking_id'], [5, 6])
+        self.assertEqual(columns['amount'], [12.5, 0.0])
+        self.assertEqual(columns['region'], ['', ''])
+        self.assertIsInstance(columns['created_at'][1], datetime)
+
+    def test_unknown_table_is_rejected(self):
+        with self.assertRaises(ValueError):
+            sink.enqueue('no_such_table', {})
+
+    def test_failed_flush_trigger_does_not_resend_buffered_event(self):
+        redis = mock.MagicMock()
+        redis.pipeline.return_value.execute.return_value = [sink.BATCH_SIZE, 1]
+        redis.set.return_value = True
+        with mock.patch.object(sink, '_redis', return_value=redis), \
+                mock.patch('analytics.tasks.flush_clickhouse_buffer_task.delay', side_effect=ConnectionError), \
+                mock.patch('analytics.tasks.sync_event_to_clickhouse_task.delay') as direct:
+            sink.enqueue('booking_events', {'booking_id': 1})
+        direct.assert_not_called()
+
+
+class EventChannelTest(SimpleTestCase):
+    def event(self, **data):
+        return ('booking_created', 1, data, timezone.now())
+
+    def idle_channel(self, maxsize):
+        # Флашер сразу завершается — события остаются в очереди
+        patcher = mock.patch.object(_EventChannel, '_run', lambda channel: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return _EventChannel(maxsize=maxsize, batch_size=10, flush_interval=0.01)
+
+    def test_overflow_drops_and_counts(self):
+        channel = self.idle_channel(maxsize=2)
+
+        self.assertEqual([channel.put(self.event()) for _ in range(3)], [True, True, False])
+        stats = channel.stats()
+        self.assertEqual((stats['enqueued'], stats['dropped'], stats['queued']), (2, 1, 2))
+
+    def test_callables_are_resolved_in_flusher_thread(self):
+        pushed = threading.Event()
+        threads = []
+        channel = _EventChannel(maxsize=10, batch_size=10, flush_interval=0.01)
+
+        def amount():
+            threads.append(threading.current_thread())
+            return 5
+
+        with mock.patch.object(AnalyticsService, '_push_to_clickhouse', side_effect=lambda rows: pushed.set()):
+            channel.put(self.event(amount=amount))
+            self.assertTrue(pushed.wait(5))
+
+        self.assertEqual([thread.name for thread in threads], ['analytics-flusher'])
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_drain_flushes_queued_events_at_shutdown(self):
+        channel = self.idle_channel(maxsize=10)
+        channel.put(self.event(amount=1))
+        channel.put(self.event(amount=2))
+
+        with mock.patch.object(AnalyticsService, '_push_to_clickhouse') as push:
+            channel.drain()
+
+        self.assertEqual([row['amount'] for row in push.call_args.args[0]], [1.0, 2.0])
+        self.assertEqual((channel.stats()['sent'], channel.stats()['queued']), (2, 0))
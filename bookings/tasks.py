@@ -50,22 +50,18 @@ def sync_booking_status_task(booking_id):
     return "Synced (SIMULATED)"
 
 @shared_task
-def generate_booking_pdf_task(booking_id):
+def generate_booking_pdf_task(booking_id, language=None):
     """
-    Async task to generate booking confirmation PDF.
+    Async task to pre-render booking confirmation PDF into media storage (hotels.documents).
     """
-    from .models import Booking
-    from hotels.pdf_generator import BookingPDFGenerator
-    
+    from hotels import documents
+
     logger.info(f"Generating PDF for booking {booking_id}...")
     try:
-        booking = Booking.objects.get(id=booking_id)
-        generator = BookingPDFGenerator(booking)
-        pdf_buffer = generator.generate()
-        
-        return f"PDF generated for booking {booking_id}"
-    except Booking.DoesNotExist:
-        return f"Booking {booking_id} not found"
+        entry = documents.render_by_id('booking', booking_id, language)
+        if entry is None:
+            return f"Booking {booking_id} not found"
+        return f"PDF generated for booking {booking_id}: {entry['path']}"
     except Exception as e:
         logger.error(f"Failed to generate booking PDF: {e}")
         return str(e)
@@ -15,6 +15,8 @@ export default function ChatWidget() {
     const [attachment, setAttachment] = useState(null);
     const [isLoading, setIsLoading] = useState(false);
     const [conversationId, setConversationId] = useState(() => localStorage.getItem('chat_conv_id'));
+    // Guest conversations can only be continued with the token issued on the first message
+    const [conversationToken, setConversationToken] = useState(() => localStorage.getItem('chat_conv_token'));
     const messagesEndRef = useRef(null);
     const fileInputRef = useRef(null);
     const pollingRef = useRef(null);
@@ -24,7 +26,10 @@ export default function ChatWidget() {
         if (conversationId) {
             localStorage.setItem('chat_conv_id', conversationId);
         }
-    }, [conversationId]);
+        if (conversationToken) {
+            localStorage.setItem('chat_conv_token', conversationToken);
+        }
+    }, [conversationId, conversationToken]);
 
     // Initial welcome or restore history
     useEffect(() => {
@@ -135,11 +140,13 @@ export default function ChatWidget() {
                 payload = new FormData();
                 payload.append('text', currentText);
                 if (conversationId) payload.append('conversation_id', conversationId);
+                if (conversationToken) payload.append('conversation_token', conversationToken);
                 payload.append('attachment', currentAttachment);
             } else {
                 payload = {
                     text: currentText,
-                    conversation_id: conversationId
+                    conversation_id: conversationId,
+                    conversation_token: conversationToken
                 };
             }
 
@@ -147,6 +154,7 @@ export default function ChatWidget() {
 
             if (response.conversation_id) {
                 setConversationId(response.conversation_id);
+                setConversationToken(response.conversation_token);
             }
 
             const botMsg = {
@@ -158,6 +166,13 @@ export default function ChatWidget() {
 
         } catch (error) {
             console.error("Failed to send message", error);
+            if (error.response?.status === 403 || error.response?.status === 404) {
+                // Conversation we can no longer continue: the next message starts a new one
+                localStorage.removeItem('chat_conv_id');
+                localStorage.removeItem('chat_conv_token');
+                setConversationId(null);
+                setConversationToken(null);
+            }
             setMessages(prev => [...prev, {
                 id: Date.now() + 1,
                 sender: 'bot',
@@ -261,7 +261,7 @@ export const getConversations = async () => {
 };
 
 export const sendChatMessage = async (data) => {
-    // data: { text, conversation_id? } or FormData
+    // data: { text, conversation_id?, conversation_token? } or FormData
     const isFormData = data instanceof FormData;
     const config = isFormData ? { headers: { 'Content-Type': 'multipart/form-data' } } : {};
     const response = await api.post('/chat/send/', data, config);
@@ -0,0 +1,196 @@
+"""
+Готовые PDF броней и билетов (hotels.pdf_generator) в медиа-хранилище.
+
+Документ рендерится один раз на версию — хэш полей, которые попадают в PDF, статуса и языка:
+    documents/booking/42/<язык>-<версия>-<sha256 содержимого>.pdf
+
+Рендер — Celery-задачи generate_booking_pdf_task / generate_ticket_pdf_task (ставятся
+сигналами после изменения брони/билета) или синхронно при первом скачивании версии.
+Какая версия лежит в хранилище, хранится в кэше (реестр), поэтому скачивание — поток
+файла, а повторный запрос с If-None-Match отвечает 304 без обращения к хранилищу.
+Старые версии удаляются при записи новой.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+# Увеличить при изменении вёрстки pdf_generator — все документы перерисуются
+LAYOUT_VERSION = 2
+
+REGISTRY_TIMEOUT = None
+PENDING_TIMEOUT = 60 * 10
+
+
+def _booking_fields(booking):
+    return (
+        booking.status, booking.check_in, booking.check_out, booking.adults, booking.children,
+        booking.total_price, booking.hotel_id, booking.updated_at,
+    )
+
+
+def _ticket_fields(ticket):
+    from vendors.services import qr
+    return (ticket.status, ticket.is_valid, ticket.total_qty, ticket.price_paid, ticket.ticket_type_id, qr.ticket_hash(ticket))
+
+
+def _load_booking(pk):
+    from bookings.models import Booking
+    return Booking.objects.select_related('hotel', 'hotel__region').filter(pk=pk).first()
+
+
+def _load_ticket(pk):
+    from vendors.models import TicketSale
+    return TicketSale.objects.select_related('ticket_type__service').filter(pk=pk).first()
+
+
+def _booking_generator(booking):
+    from .pdf_generator import BookingPDFGenerator
+    return BookingPDFGenerator(booking)
+
+
+def _ticket_generator(ticket):
+    from .pdf_generator import TicketPDFGenerator
+    return TicketPDFGenerator(ticket)
+
+
+KINDS = {
+    'booking': {'fields': _booking_fields, 'load': _load_booking, 'generator': _booking_generator},
+    'ticket': {'fields': _ticket_fields, 'load': _load_ticket, 'generator': _ticket_generator},
+}
+
+
+def _registry_key(kind, pk, language):
+    return f'pdfdoc:{kind}:{pk}:{language}'
+
+
+def _pending_key(kind, pk, language, version):
+    return f'pdfdoc:pending:{kind}:{pk}:{language}:{version}'
+
+
+def _language(language=None):
+    return language or translation.get_language() or settings.LANGUAGE_CODE
+
+
+def version(kind, obj, language=None):
+    fingerprint = repr((LAYOUT_VERSION, kind, obj.pk, _language(language)) + KINDS[kind]['fields'](obj))
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+
+def _directory(kind, pk):
+    return f'documents/{kind}/{pk}'
+
+
+def render(kind, obj, language=None, storage=default_storage):
+    """
+    Рендерит текущую версию документа, сохраняет в хранилище и регистрирует.
+    Возвращает запись реестра {'version', 'path', 'etag', 'size'}.
+    """
+    language = _language(language)
+    current = version(kind, obj, language)
+    with translation.override(language):
+        content = KINDS[kind]['generator'](obj).generate().getvalue()
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    path = f'{_directory(kind, obj.pk)}/{language}-{current}-{digest}.pdf'
+    if not storage.exists(path):
+        path = storage.save(path, ContentFile(content))
+
+    entry = {'version': current, 'path': path, 'etag': f'"{current}-{digest}"', 'size': len(content)}
+    try:
+        previous = cache.get(_registry_key(kind, obj.pk, language))
+        cache.set(_registry_key(kind, obj.pk, language), entry, timeout=REGISTRY_TIMEOUT)
+        cache.delete(_pending_key(kind, obj.pk, language, current))
+    except Exception as e:
+        logger.warning(f"Document registry unavailable: {e}")
+        previous = None
+    if previous and previous.get('path') != path:
+        _delete(storage, previous['path'])
+    return entry
+
+
+def _delete(storage, path):
+    try:
+        storage.delete(path)
+    except Exception as e:
+        logger.warning(f"Could not delete stale document {path}: {e}")
+
+
+def get(kind, obj, language=None, storage=default_storage):
+    """
+    Запись реестра для актуальной версии; если её нет — рендер на месте.
+    """
+    language = _language(language)
+    try:
+        entry = cache.get(_registry_key(kind, obj.pk, language))
+    except Exception as e:
+        logger.warning(f"Document registry unavailable: {e}")
+        entry = None
+    if entry and entry['version'] == version(kind, obj, language):
+        return entry
+    return render(kind, obj, language, storage=storage)
+
+
+def open_file(kind, obj, entry, language=None, storage=default_storage):
+    """
+    Файл версии из хранилища; пропал (очистка media) — перерисовывается.
+    Возвращает (entry, file).
+    """
+    try:
+        return entry, storage.open(entry['path'], 'rb')
+    except (FileNotFoundError, OSError):
+        entry = render(kind, obj, language, storage=storage)
+        return entry, storage.open(entry['path'], 'rb')
+
+
+def render_by_id(kind, pk, language=None):
+    """
+    Для Celery-задач: None, если объекта уже нет.
+    """
+    obj = KINDS[kind]['load'](pk)
+    return get(kind, obj, language) if obj else None
+
+
+def schedule(kind, obj, language=None):
+    """
+    Ставит рендер новой версии в очередь Celery (один раз на версию).
+    """
+    language = _language(language)
+    current = version(kind, obj, language)
+    try:
+        entry = cache.get(_registry_key(kind, obj.pk, language))
+        if (entry and entry['version'] == current) or not cache.add(
+                _pending_key(kind, obj.pk, language, current), 1, timeout=PENDING_TIMEOUT):
+            return
+    except Exception:
+        pass
+    if kind == 'booking':
+        from bookings.tasks import generate_booking_pdf_task as task
+    else:
+        from vendors.tasks import generate_ticket_pdf_task as task
+    try:
+        task.delay(obj.pk, language)
+    except Exception as e:
+        logger.warning(f"Could not schedule {kind} {obj.pk} PDF: {e}")
+
+
+def forget(kind, pk, storage=default_storage):
+    """
+    Объект удалён: убрать его документы и записи реестра.
+    """
+    languages = [code for code, _ in settings.LANGUAGES]
+    try:
+        cache.delete_many([_registry_key(kind, pk, language) for language in languages])
+    except Exception:
+        pass
+    try:
+        _, files = storage.listdir(_directory(kind, pk))
+    except (FileNotFoundError, OSError, NotImplementedError):
+        return
+    for name in files:
+        _delete(storage, f'{_directory(kind, pk)}/{name}')
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from vendors.models import TicketSale
-from notifications.models import Notification
+from notifications import dispatch
 
 class Command(BaseCommand):
     help = 'Expires pending tickets passed their creation deadline'
@@ -22,10 +22,10 @@ class Command(BaseCommand):
             
             # Notify User
             if ticket.created_by:
-                Notification.objects.create(
-                    user=ticket.created_by,
-                    title="Tour Request Expired",
-                    message=f"Your tour request for '{ticket.sight.name}' expired because the vendor did not confirm it in time.",
+                dispatch.notify(
+                    ticket.created_by_id,
+                    "Tour Request Expired",
+                    f"Your tour request for '{ticket.sight.name}' expired because the vendor did not confirm it in time.",
                     type="warning",
                     link="/profile/bookings"
                 )
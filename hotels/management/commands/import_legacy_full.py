@@ -1,5 +1,4 @@
 import os
-import re
 from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.conf import settings
@@ -9,71 +8,67 @@ from hotels.models import Sight, Category, Hotel, Room, RoomType
 from vendors.models import Vendor
 from locations.models import Region, Country
 from django.utils.text import slugify
+from hotels.services import pricing
+from silkroad_backend import search
+from silkroad_backend.legacy_dump import BulkLoader, lookup_map, reset_sequences, table_rows
 
 User = get_user_model()
 
 class Command(BaseCommand):
     help = 'Fully imports Users, Vendors, Hotels, and Sights from legacy SQL dump'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
     def handle(self, *args, **options):
         dump_path = os.path.join(settings.BASE_DIR, '../SilkRoadPHP/silkroad.local/silkroad_27_07.sql')
         if not os.path.exists(dump_path):
             self.stdout.write(self.style.ERROR(f'Dump file not found at {dump_path}'))
             return
 
-        with open(dump_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        self.batch_size = options['batch_size']
 
         # 1. Import Users
-        self.import_users(content)
+        self.import_users(dump_path)
 
         # 2. Import Vendors
-        self.import_vendors(content)
+        self.import_vendors(dump_path)
 
         # 3. Import Hotels
-        self.import_hotels(content)
+        self.import_hotels(dump_path)
         
         # 4. Import Sights
-        self.import_sights(content)
+        self.import_sights(dump_path)
 
-    def import_users(self, content):
+    def import_users(self, dump_path):
         self.stdout.write("Importing Users (tb_users)...")
-        rows = self.extract_table_data(content, 'tb_users')
+        existing = set(lookup_map(User.objects.all(), 'email', 'id'))
+        loader = BulkLoader(User, self.batch_size, unique_fields=['email'])
         count = 0
-        for row in rows:
+        for row in self.extract_table_data(dump_path, 'tb_users'):
             # tb_users: id(0), name(1), ..., phone(7), email(8), ..., password(10)
-            try:
-                legacy_id = int(row[0])
-                name = row[1]
-                phone = row[7]
-                email = row[8]
-                password_hash = row[10] # bcrypt
-
-                if not email:
-                    continue
-
-                user, created = User.objects.get_or_create(
-                    email=email,
-                    defaults={
-                        'name': name,
-                        'phone': phone or '',
-                        'password': password_hash, # Django uses pbkdf2 by default, but can handle bcrypt if configured? 
-                                                  # For now, we store hash. Migration might need password reset.
-                        'is_active': True
-                    }
-                )
-                if created:
-                    user.set_unusable_password() # Force reset or handle bcrypt later
-                    user.save()
-                    
-                count += 1
-            except Exception as e:
-                pass
+            name = row[1]
+            phone = row[7]
+            email = row[8]
+
+            if not email:
+                continue
+            count += 1
+            if email in existing:
+                continue
+            existing.add(email)
+
+            user = User(email=email, name=name, phone=phone or '', is_active=True)
+            user.set_unusable_password() # Force reset or handle bcrypt later
+            loader.add(user)
+            if len(loader.pending) >= self.batch_size:
+                loader.flush()
+        loader.flush()
         self.stdout.write(self.style.SUCCESS(f"Imported {count} users"))
 
-    def import_vendors(self, content):
+    def import_vendors(self, dump_path):
         self.stdout.write("Importing Vendors (tb_vendors)...")
-        rows = self.extract_table_data(content, 'tb_vendors')
+        rows = self.extract_table_data(dump_path, 'tb_vendors')
         count = 0
         
         # Ensure default vendor for unmatched
@@ -108,14 +103,17 @@ class Command(BaseCommand):
                 pass
         self.stdout.write(self.style.SUCCESS(f"Imported {count} vendors"))
 
-    def import_hotels(self, content):
+    def import_hotels(self, dump_path):
         self.stdout.write("Importing Hotels (tb_hotels)...")
-        rows = self.extract_table_data(content, 'tb_hotels')
+        rows = self.extract_table_data(dump_path, 'tb_hotels')
         count = 0
         
         default_country, _ = Country.objects.get_or_create(name='Uzbekistan', defaults={'iso_code': 'UZ'})
         default_region, _ = Region.objects.get_or_create(name='Tashkent', defaults={'country': default_country})
 
+        loader = BulkLoader(Hotel, self.batch_size, update_fields=[
+            'name', 'region', 'address', 'stars', 'description', 'images', 'is_active',
+        ])
         for row in rows:
             # tb_hotels: id(0), id_region(1), ... name(6), stars(7), ... address(15), ... images(20 or 21?)
             # Based on grep output:
@@ -138,32 +136,40 @@ class Command(BaseCommand):
                         images_str = col
                         break
                 
-                hotel, created = Hotel.objects.update_or_create(
+                loader.add(Hotel(
                     id=int(row[0]),  # Preserve Legacy ID
-                    defaults={
-                        'name': name,
-                        'region': default_region,
-                        'address': address,
-                        'stars': stars,
-                        'description': f"Legacy Hotel {name}",
-                        'images': images_str,
-                        'is_active': True
-                    }
-                )
+                    name=name,
+                    region=default_region,
+                    address=address,
+                    stars=stars,
+                    description=f"Legacy Hotel {name}",
+                    images=images_str,
+                    is_active=True,
+                ))
                 count += 1
             except Exception as e:
                 # print(e)
                 pass
+            if len(loader.pending) >= self.batch_size:
+                loader.flush()
+        loader.flush()
+        reset_sequences(Hotel)
+        search.reindex(Hotel)
+        pricing.refresh_after_import(Hotel.objects.values_list('id', flat=True))
         self.stdout.write(self.style.SUCCESS(f"Imported {count} hotels"))
 
-    def import_sights(self, content):
+    def import_sights(self, dump_path):
         self.stdout.write("Importing Sights (tb_sights)...")
-        rows = self.extract_table_data(content, 'tb_sights')
+        rows = self.extract_table_data(dump_path, 'tb_sights')
         count = 0
         default_vendor = Vendor.objects.first()
         default_category, _ = Category.objects.get_or_create(name='Sightseeing')
         default_region = Region.objects.first()
 
+        loader = BulkLoader(Sight, self.batch_size, update_fields=[
+            'name', 'vendor', 'category', 'region', 'address', 'description', 'sh_description',
+            'images', 'is_foreg', 'is_local', 'status',
+        ])
         for row in rows:
             # 0: id, 1: id_vendor, 2: cat_id, 3: name, 4: region, 5: district, 6: address, 7: geo
             # 8: local_price, 9: foreg_price, 10: desc, 11: sh_desc, 12: status, 13: images
@@ -171,64 +177,30 @@ class Command(BaseCommand):
                 name = row[3]
                 images_str = row[13]
 
-                Sight.objects.update_or_create(
+                loader.add(Sight(
                     id=int(row[0]), # Preserve Legacy ID
-                    defaults={
-                        'name': name,
-                        'vendor': default_vendor,
-                        'category': default_category,
-                        'region': default_region,
-                        'address': row[6],
-                        'description': row[10],
-                        'sh_description': row[11],
-                        'images': images_str,
-                        'is_foreg': Decimal(row[9]) if row[9] else 0,
-                        'is_local': Decimal(row[8]) if row[8] else 0,
-                        'status': 'active'
-                    }
-                )
+                    name=name,
+                    vendor=default_vendor,
+                    category=default_category,
+                    region=default_region,
+                    address=row[6],
+                    description=row[10],
+                    sh_description=row[11],
+                    images=images_str,
+                    is_foreg=Decimal(row[9]) if row[9] else 0,
+                    is_local=Decimal(row[8]) if row[8] else 0,
+                    status='active',
+                ))
                 count += 1
             except Exception as e:
                 pass
+            if len(loader.pending) >= self.batch_size:
+                loader.flush()
+        loader.flush()
+        reset_sequences(Sight)
+        search.reindex(Sight)
         self.stdout.write(self.style.SUCCESS(f"Imported {count} sights"))
 
-    def extract_table_data(self, content, table_name):
-        # Find INSERT statements
-        matches = re.findall(rf"INSERT INTO `{table_name}` VALUES (.*?);", content, re.DOTALL)
-        rows = []
-        for block in matches:
-             # Basic split by ),( 
-             # Warning: fragile for complex data but works for standard dumps
-             chunks = block.split('),(')
-             for i, chunk in enumerate(chunks):
-                 if i == 0: chunk = chunk.lstrip('(')
-                 if i == len(chunks)-1: chunk = chunk.rstrip(')')
-                 rows.append(self.parse_sql_row(chunk))
-        return rows
-
-    def parse_sql_row(self, text):
-        values = []
-        current = []
-        in_quote = False
-        escape = False
-        for char in text:
-            if escape:
-                current.append(char); escape = False; continue
-            if char == '\\':
-                current.append(char); escape = True; continue
-            if char == "'" and not escape:
-                in_quote = not in_quote
-                current.append(char); continue
-            if char == ',' and not in_quote:
-                values.append(self.clean_val("".join(current).strip()))
-                current = []
-            else:
-                current.append(char)
-        if current: values.append(self.clean_val("".join(current).strip()))
-        return values
-
-    def clean_val(self, val):
-        if val == 'NULL': return None
-        if val.startswith("'") and val.endswith("'"):
-            return val[1:-1].replace("\\'", "'").replace('\\\\', '\\')
-        return val
+    def extract_table_data(self, dump_path, table_name):
+        # Потоковый разбор INSERT-ов (значения — строки/None, как раньше)
+        return table_rows(dump_path, table_name)
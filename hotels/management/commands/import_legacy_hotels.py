@@ -1,17 +1,25 @@
 import os
-import re
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db import transaction
 from hotels.models import Hotel
 from locations.models import Region
 from django.contrib.auth import get_user_model
+from hotels.services import pricing
+from silkroad_backend import search
+from silkroad_backend.legacy_dump import lookup_map, table_rows
 
 User = get_user_model()
 
+UPDATE_FIELDS = ['created_by', 'region', 'address', 'stars', 'description', 'deposit', 'images', 'is_active']
+
 class Command(BaseCommand):
     help = 'Imports Hotels from legacy SQL dump (tb_hotels)'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
     def handle(self, *args, **options):
         # dump_path = os.path.join(settings.BASE_DIR, '../SilkRoadPHP/silkroad.local/silkroad_27_07.sql')
         # Use the file found by 'find' if above fails
@@ -25,70 +33,58 @@ class Command(BaseCommand):
             return
 
         admin_user = User.objects.filter(is_superuser=True).first()
+        batch_size = options['batch_size']
 
-        count = 0
-        
-        with open(dump_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        match = re.search(r"INSERT INTO `tb_hotels` VALUES (.*);", content, re.DOTALL)
-        if not match:
-            self.stdout.write(self.style.WARNING('No tb_hotels data found in dump.'))
-            return
+        # Регионы и существующие отели загружаются один раз, а не запросом на строку
+        self.regions = self.region_map()
+        existing = lookup_map(Hotel.objects.all(), 'name', 'id')
 
-        values_block = match.group(1)
-        # Split by `),(`
-        chunks = values_block.split('),(')
-        
-        for idx, chunk in enumerate(chunks):
-            if idx == 0 and chunk.startswith('('): chunk = chunk[1:]
-            if idx == len(chunks) - 1 and chunk.endswith(')'): chunk = chunk[:-1]
-                
+        count = duplicates = 0
+        to_create, to_update = [], []
+        for idx, row in enumerate(table_rows(dump_path, 'tb_hotels')):
             try:
-                row = self.parse_sql_row(chunk)
-                if row:
-                    self.process_row(row, admin_user)
-                    count += 1
+                hotel = self.process_row(row, admin_user)
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Error row {idx}: {e}'))
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported {count} Hotels'))
-
-    def parse_sql_row(self, text):
-        values = []
-        current = []
-        in_quote = False
-        escape = False
-        for char in text:
-            if escape:
-                current.append(char)
-                escape = False
                 continue
-            if char == '\\':
-                current.append(char)
-                escape = True
+            if hotel.name in existing and existing[hotel.name] is None:
+                # Повтор имени в дампе: отель уже создаётся первой строкой, ключа для обновления нет
+                duplicates += 1
                 continue
-            if char == "'" and not escape:
-                in_quote = not in_quote
-                current.append(char)
-                continue
-            if char == ',' and not in_quote:
-                val = "".join(current).strip()
-                values.append(self.clean_val(val))
-                current = []
+            if hotel.name in existing:
+                hotel.pk = existing[hotel.name]
+                to_update.append(hotel)
             else:
-                current.append(char)
-        if current:
-            val = "".join(current).strip()
-            values.append(self.clean_val(val))
-        return values
+                existing[hotel.name] = None
+                to_create.append(hotel)
+            count += 1
+            if len(to_create) + len(to_update) >= batch_size:
+                self.flush(to_create, to_update, batch_size)
+
+        self.flush(to_create, to_update, batch_size)
+        if not count:
+            self.stdout.write(self.style.WARNING('No tb_hotels data found in dump.'))
+            return
+        # bulk-операции не вызывают сигналы — поиск, цены и кэши обновляются отдельно
+        search.reindex(Hotel)
+        pricing.refresh_after_import(Hotel.objects.values_list('id', flat=True))
+        if duplicates:
+            self.stdout.write(self.style.WARNING(f'Skipped {duplicates} rows with a duplicate hotel name'))
+        self.stdout.write(self.style.SUCCESS(f'Successfully imported {count} Hotels'))
 
-    def clean_val(self, val):
-        if val == 'NULL': return None
-        if val.startswith("'") and val.endswith("'"):
-            inner = val[1:-1]
-            return inner.replace("\\'", "'").replace('\\\\', '\\')
-        return val
+    def flush(self, to_create, to_update, batch_size):
+        with transaction.atomic():
+            Hotel.objects.bulk_create(to_create, batch_size=batch_size)
+            Hotel.objects.bulk_update(to_update, UPDATE_FIELDS, batch_size=batch_size)
+        to_create.clear()
+        to_update.clear()
+
+    def region_map(self):
+        fallback = Region.objects.first()
+        regions = {}
+        for region_name in ('Tashkent', 'Samarkand', 'Buchara', 'Khiva'):
+            regions[region_name] = Region.objects.filter(name__icontains=region_name).first() or fallback
+        return regions
 
     def process_row(self, row, admin_user):
         # Schema indices based on CREATE TABLE analysis:
@@ -96,52 +92,33 @@ class Command(BaseCommand):
         # 15: address, 18: phone
         # 21: image_path (text)
         # 33: description
-        # 37: deposit, 39: price, 46: is_active
-        
+        # 37: deposit, 39: price (в модели Hotel нет поля цены — не переносится), 46: is_active
+        name = row[6]
+        stars = int(row[7]) if row[7] else 0
+        address = row[15] or ''
+        images = row[21]
+        description = row[33]
         try:
-            name = row[6]
-            stars = int(row[7]) if row[7] else 0
-            address = row[15]
-            phone = row[18]
-            images = row[21]
-            description = row[33]
-            try:
-                deposit = Decimal(row[37]) if row[37] else 0
-            except: deposit = 0
-            
-            try: 
-                 # price is index 39
-                 price = Decimal(row[39]) if row[39] else 0
-                 # NOTE: check index carefully. 
-                 # Schema: ... 37: deposit, 38: deposit_turizm, 39: price
-            except: price = 0
-            
-            is_active = True # Default to true or use row[46]
-            
-            # Region mapping
-            region_name = 'Tashkent' # Default
-            if 'Samarkand' in address: region_name = 'Samarkand'
-            elif 'Bukhara' in address: region_name = 'Buchara'
-            elif 'Khiva' in address: region_name = 'Khiva'
-            
-            # Fuzzy match region
-            region = Region.objects.filter(name__icontains=region_name).first()
-            if not region:
-                 region = Region.objects.first()
+            deposit = Decimal(row[37]) if row[37] else 0
+        except InvalidOperation:
+            deposit = 0
+
+        is_active = True # Default to true or use row[46]
+
+        # Region mapping
+        region_name = 'Tashkent' # Default
+        if 'Samarkand' in address: region_name = 'Samarkand'
+        elif 'Bukhara' in address: region_name = 'Buchara'
+        elif 'Khiva' in address: region_name = 'Khiva'
 
-            Hotel.objects.update_or_create(
-                name=name,
-                defaults={
-                    'created_by': admin_user,
-                    'region': region,
-                    'address': address,
-                    'stars': stars,
-                    'description': description,
-                    'deposit': deposit,
-                    'price': price, # Using our calculated field
-                    'images': images,
-                    'is_active': is_active
-                }
-            )
-        except Exception as e:
-            print(f"Failed to process hotel {row[6] if len(row)>6 else '?'}: {e}")
+        return Hotel(
+            name=name,
+            created_by=admin_user,
+            region=self.regions[region_name],
+            address=address,
+            stars=stars,
+            description=description,
+            deposit=deposit,
+            images=images,
+            is_active=is_active,
+        )
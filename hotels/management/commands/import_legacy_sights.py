@@ -1,5 +1,4 @@
 import os
-import re
 from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.conf import settings
@@ -7,6 +6,7 @@ from hotels.models import Sight, Category
 from vendors.models import Vendor
 from locations.models import Region, Country
 from django.contrib.auth import get_user_model
+from silkroad_backend.legacy_dump import table_rows
 
 User = get_user_model()
 
@@ -45,155 +45,19 @@ class Command(BaseCommand):
         )
 
         count = 0
-        
-        with open(dump_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Find INSERT statement for tb_sights
-        # Pattern: INSERT INTO `tb_sights` VALUES (...);
-        # We need to be careful with matching.
-        match = re.search(r"INSERT INTO `tb_sights` VALUES (.*);", content, re.DOTALL)
-        if not match:
-            self.stdout.write(self.style.WARNING('No tb_sights data found in dump.'))
-            return
-
-        values_block = match.group(1)
-        
-        # Simple parser for SQL values (row), (row)
-        # This is a basic parser that respects single quotes
-        rows = []
-        current_row = ""
-        in_quote = False
-        escape = False
-        
-        # We want to split by ")," BUT ignore commas/parentheses inside quotes.
-        # Actually we just want to parse "CHAR" stream.
-        
-        buffer = ""
-        in_row = False
-        
-        # Generator to yield rows
-        def parse_rows(text):
-            in_q = False
-            esc = False
-            paren_depth = 0
-            current = []
-            
-            cur_val = ""
-            
-            # We are iterating through the big string of values
-            # (val1, val2), (val3, val4)
-            # We start inside the values block.
-            
-            # Use a slightly more robust regex split if possible? No, stream is better.
-            
-            # Let's try to interpret the values as python tuples after some cleanup
-            # replace NULL with None, etc.
-            # But dates and strings might be tricky.
-            pass
-
-        # Since writing a full parser is complex, let's use regex to split tuples if possible.
-        # Or just split by `),(` which is the standard delimiter in mysqldump extended inserts.
-        # Risk: `),(` inside a string. Unlikely for this specific content but possible.
-        # Dump format: VALUES (1, ...), (2, ...), ...
-        
-        # Let's use string split on `),(` and fix the ends.
-        
-        chunks = values_block.split('),(')
-        
-        for idx, chunk in enumerate(chunks):
-            # cleanup start/end parens for first/last chunk
-            if idx == 0 and chunk.startswith('('):
-                chunk = chunk[1:]
-            if idx == len(chunks) - 1 and chunk.endswith(')'):
-                chunk = chunk[:-1]
-                
-            # Now `chunk` is a comma-separated list of values: 39,17,5,'Bibixonim',...
-            # We need to parse this line into a list of values.
-            # We can use csv.reader with quotechar="'" but we need to handle `NULL`.
-            
-            # Hack: use AST literal eval?
-            # Replace `NULL` with `None`
-            # Unescaped sql quotes `\'` might need handling for python.
-            
+        # Потоковый разбор INSERT-ов tb_sights (значения — строки/None)
+        for idx, row_values in enumerate(table_rows(dump_path, 'tb_sights')):
             try:
-                # Basic replacements for SQL -> Python
-                # SQL string: 'It\'s' -> Python: 'It\'s' (works)
-                # SQL NULL -> None
-                python_chunk = chunk.replace("NULL", "None")
-                
-                # If there are unquoted dates like 2025-05-24? 
-                # In parsed chunk, strings are quoted '...'. Numbers are not.
-                # Dates should be quoted in SQL 'Y-m-d'.
-                # So mostly fine.
-                
-                # Issue: timestamp NULL vs '2025...'
-                
-                # Let's handle parsing manually:
-                row_values = self.parse_sql_row(chunk)
-                
-                if row_values:
-                     self.process_row(row_values, default_vendor, default_category, default_region)
-                     count += 1
-                     
+                self.process_row(row_values, default_vendor, default_category, default_region)
+                count += 1
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f'Error parsing row chunk {idx}: {e} | Chunk: {chunk[:50]}...'))
-                continue
+                self.stdout.write(self.style.ERROR(f'Error processing row {idx}: {e}'))
 
+        if not count:
+            self.stdout.write(self.style.WARNING('No tb_sights data found in dump.'))
+            return
         self.stdout.write(self.style.SUCCESS(f'Successfully imported {count} Sights'))
 
-    def parse_sql_row(self, text):
-        """
-        Parses a single row's values (comma separated, SQL quoted) into a list.
-        """
-        values = []
-        current = []
-        in_quote = False
-        escape = False
-        
-        for char in text:
-            if escape:
-                current.append(char)
-                escape = False
-                continue
-            
-            if char == '\\':
-                current.append(char) # Keep backslash for now, or consume it? SQL dumps escape ' with \' 
-                escape = True
-                continue
-                
-            if char == "'" and not escape:
-                in_quote = not in_quote
-                current.append(char)
-                continue
-            
-            if char == ',' and not in_quote:
-                # End of value
-                val = "".join(current).strip()
-                values.append(self.clean_val(val))
-                current = []
-            else:
-                current.append(char)
-                
-        # Last value
-        if current:
-            val = "".join(current).strip()
-            values.append(self.clean_val(val))
-            
-        return values
-
-    def clean_val(self, val):
-        if val == 'NULL':
-            return None
-        if val.startswith("'") and val.endswith("'"):
-            # remove quotes and unescape
-            # This is simple unescape, might need more for newlines etc
-            inner = val[1:-1]
-            # inner = inner.replace("\\'", "'").replace('\\"', '"').replace('\\n', '\n')
-            # Actually basic replacement is enough for names/desc
-            return inner.replace("\\'", "'").replace('\\\\', '\\')
-        return val
-
     def process_row(self, row, default_vendor, default_category, default_region):
         # Mapping based on dump structure
         # 0: id, 1: id_vendor, 2: cat_id, 3: name, 4: region, 5: district, 6: address, 7: geo
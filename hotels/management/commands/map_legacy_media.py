@@ -1,70 +1,59 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 from hotels.models import Hotel
+from silkroad_backend import response_cache
 from vendors.models import MediaFile
 
+
 class Command(BaseCommand):
     help = 'Resolves legacy image IDs (image_id, banner_image_id, gallery) to file paths in Hotel.images'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
     def handle(self, *args, **options):
-        hotels = Hotel.objects.all()
+        batch_size = options['batch_size']
+        hotels = Hotel.objects.filter(
+            Q(image_id__isnull=False) | Q(banner_image_id__isnull=False) | (Q(gallery__isnull=False) & ~Q(gallery=''))
+        ).only('id', 'image_id', 'banner_image_id', 'gallery', 'images').order_by('id')
+
         updated_count = 0
-        
-        for hotel in hotels:
-            paths = []
-            
-            # 1. Main Image
-            if hotel.image_id:
-                mf = MediaFile.objects.filter(id=hotel.image_id).first()
-                if mf and mf.file_path:
-                    paths.append(mf.file_path)
-            
-            # 2. Banner Image
-            if hotel.banner_image_id:
-                mf = MediaFile.objects.filter(id=hotel.banner_image_id).first()
-                if mf and mf.file_path:
-                    paths.append(mf.file_path)
+        batch = []
+        for hotel in hotels.iterator(chunk_size=batch_size):
+            batch.append(hotel)
+            if len(batch) >= batch_size:
+                updated_count += self.materialize(batch)
+                batch = []
+        if batch:
+            updated_count += self.materialize(batch)
+        if updated_count:
+            # bulk_update не шлёт post_save — сбрасываем кэш ответов вручную
+            response_cache.invalidate('hotels')
 
-            # 3. Gallery (legacy CSV IDs)
-            if hotel.gallery:
-                # Format: "101,102,103"
-                try:
-                    ids = [int(x) for x in hotel.gallery.split(',') if x.strip().isdigit()]
-                    files = MediaFile.objects.filter(id__in=ids)
-                    # MediaFile order is not guaranteed, but usually fine
-                    for mf in files:
-                        if mf.file_path:
-                            paths.append(mf.file_path)
-                except Exception:
-                    pass
-            
-            # Update Hotel.images field (Text, comma separated)
-            # Only if we found new images and it's currently empty or we want to overwrite legacy paths
-            if paths:
-                # Prepend /media/ if not already there, legacy paths often are relative
-                # or absolute but local.
-                # Assuming MediaFile.file_path is relative like "hotels/1.jpg"
-                
-                # Check current images
-                current_images = []
-                if hotel.images:
-                    current_images = [x.strip() for x in hotel.images.split(',') if x.strip()]
-                
-                # Merge unique
-                final_list = []
-                # Add existing text paths first (if they look like paths)
-                for p in current_images:
-                    if p not in final_list: 
-                        final_list.append(p)
-                
-                # Add resolved paths
-                for p in paths:
-                    # Normalized path
-                    p_norm = p.strip()
-                    if p_norm not in final_list:
-                        final_list.append(p_norm)
-                
-                hotel.images = ",".join(final_list)
-                hotel.save()
-                updated_count += 1
-                
         self.stdout.write(self.style.SUCCESS(f"Updated images for {updated_count} hotels."))
+
+    def materialize(self, hotels):
+        """
+        Один запрос к MediaFile на пачку: найденные пути дописываются к Hotel.images
+        (существующие пути сохраняются первыми), затем bulk_update.
+        """
+        ids = {i for hotel in hotels for i in hotel.legacy_image_ids()}
+        media_map = dict(
+            MediaFile.objects.filter(id__in=ids).exclude(file_path__isnull=True).exclude(file_path='')
+            .values_list('id', 'file_path')
+        )
+
+        changed = []
+        for hotel in hotels:
+            # Main image, banner, then gallery order
+            paths = [media_map[i].strip() for i in hotel.legacy_image_ids() if i in media_map]
+            if not paths:
+                continue
+            current_images = [x.strip() for x in (hotel.images or '').split(',') if x.strip()]
+            final_list = list(dict.fromkeys(current_images + paths))
+            if final_list != current_images:
+                hotel.images = ",".join(final_list)
+                changed.append(hotel)
+
+        Hotel.objects.bulk_update(changed, ['images'])
+        return len(changed)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from hotels.services import inventory
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-night room inventory ledger (tb_room_inventory) from tb_bookings_v2.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotel', type=int, action='append', dest='hotels',
+                            help='Rebuild only this hotel ID (can be repeated)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        hotel_ids = options.get('hotels')
+        scope = f"hotels {hotel_ids}" if hotel_ids else "all hotels"
+        self.stdout.write(f"Rebuilding room inventory for {scope}...")
+
+        bookings, rows = inventory.rebuild(hotel_ids=hotel_ids, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully rebuilt inventory: {bookings} active bookings -> {rows} ledger rows."
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0024_remove_ticket_confirmed_by_remove_ticket_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomInventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='дата (ночь)')),
+                ('booked', models.IntegerField(default=0, verbose_name='забронировано')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hotel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='hotels.hotel', verbose_name='отель')),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='hotels.roomtype', verbose_name='тип комнаты')),
+            ],
+            options={
+                'verbose_name': 'занятость номеров',
+                'verbose_name_plural': 'занятость номеров',
+                'db_table': 'tb_room_inventory',
+                'indexes': [models.Index(fields=['hotel', 'date'], name='tb_room_inv_hotel_i_fb6863_idx')],
+                'unique_together': {('hotel', 'room_type', 'date')},
+            },
+        ),
+    ]
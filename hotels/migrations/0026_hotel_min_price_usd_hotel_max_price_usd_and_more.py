@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:40
+
+from django.db import migrations, models
+from django.db.models import Max, Min
+
+
+def populate_price_range(apps, schema_editor):
+    Hotel = apps.get_model('hotels', 'Hotel')
+    RoomPrice = apps.get_model('hotels', 'RoomPrice')
+
+    ranges = {
+        row['hotel_id']: (row['low'], row['high'])
+        for row in RoomPrice.objects.filter(usd__gt=0).values('hotel_id').annotate(low=Min('usd'), high=Max('usd'))
+    }
+    batch = []
+    for hotel in Hotel.objects.only('id', 'deposit', 'deposit_turizm').iterator(chunk_size=1000):
+        values = [v for v in ranges.get(hotel.id, ()) if v is not None]
+        values += [v for v in (hotel.deposit, hotel.deposit_turizm) if v and v > 0]
+        hotel.min_price_usd = min(values) if values else None
+        hotel.max_price_usd = max(values) if values else None
+        batch.append(hotel)
+        if len(batch) >= 1000:
+            Hotel.objects.bulk_update(batch, ['min_price_usd', 'max_price_usd'])
+            batch = []
+    if batch:
+        Hotel.objects.bulk_update(batch, ['min_price_usd', 'max_price_usd'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0025_roominventory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotel',
+            name='max_price_usd',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='макс. цена USD'),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='min_price_usd',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='мин. цена USD'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['min_price_usd', 'max_price_usd'], name='tb_hotels_o_min_pri_d832d2_idx'),
+        ),
+        migrations.RunPython(populate_price_range, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# Заполняет search_vector/search_text одним UPDATE на таблицу. SQL зафиксирован здесь, чтобы миграция
+# не зависела от silkroad_backend.search; документ тот же (A — названия, B — адрес/регион, C — описания),
+# `manage.py reindex_search` пересобирает колонки текущим кодом.
+BUILD_SEARCH_SQL = """
+UPDATE {table} AS t SET
+    search_vector = setweight(to_tsvector('simple', d.a), 'A')
+                 || setweight(to_tsvector('simple', d.b), 'B')
+                 || setweight(to_tsvector('simple', d.c), 'C'),
+    search_text = btrim(regexp_replace(lower(concat_ws(' ', d.a, d.b)), '[^[:alnum:]_]+', ' ', 'g'))
+FROM (
+    SELECT o.id,
+           concat_ws(' ', {a}) AS a,
+           concat_ws(' ', {b}) AS b,
+           concat_ws(' ', {c}) AS c
+    FROM {table} AS o {joins}
+) AS d
+WHERE t.id = d.id
+"""
+
+NAMES = "{0}.name, {0}.name_ru, {0}.name_uz"
+
+
+def build_search_index(apps, schema_editor):
+    table = lambda app, model: schema_editor.quote_name(apps.get_model(app, model)._meta.db_table)
+    regions, districts = table('locations', 'Region'), table('locations', 'District')
+
+    schema_editor.execute(BUILD_SEARCH_SQL.format(
+        table=table('hotels', 'Hotel'),
+        a=NAMES.format('o'),
+        b='o.address, o.geolocation, ' + NAMES.format('r'),
+        c='o.description, o.description_ru, o.description_uz',
+        joins=f'LEFT JOIN {regions} AS r ON r.id = o.region_id',
+    ))
+    schema_editor.execute(BUILD_SEARCH_SQL.format(
+        table=table('hotels', 'Sight'),
+        a=NAMES.format('o'),
+        b=', '.join(['o.address', NAMES.format('r'), NAMES.format('ds'), NAMES.format('vr')]),
+        c='o.sh_description, o.sh_description_ru, o.sh_description_uz, '
+          'o.description, o.description_ru, o.description_uz',
+        joins=(
+            f'LEFT JOIN {regions} AS r ON r.id = o.region_id '
+            f'LEFT JOIN {districts} AS ds ON ds.id = o.district_id '
+            f"LEFT JOIN {table('vendors', 'Vendor')} AS v ON v.id = o.vendor_id "
+            f'LEFT JOIN {regions} AS vr ON vr.id = v.region_id'
+        ),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0026_hotel_min_price_usd_hotel_max_price_usd_and_more'),
+        ('locations', '0004_delete_sight'),
+        ('vendors', '0013_alter_ticketsale_status'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='hotel',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='sight',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='sight',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tb_hotels_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='tb_hotels_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='sight',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tb_sights_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='sight',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='tb_sights_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 from decimal import Decimal
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -134,11 +136,19 @@ class Sight(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('создано'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('обновлено'))
 
+    # Full-text search (silkroad_backend.search)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
+
     class Meta:
         db_table = 'tb_sights'
         verbose_name = _('достопримечательность')
         verbose_name_plural = _('достопримечательности')
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='tb_sights_search_vector_gin'),
+            GinIndex(fields=['search_text'], name='tb_sights_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -184,6 +194,34 @@ class SightFacility(models.Model):
 
 
 
+def _media_url(path):
+    return f"/media/{path.lstrip('/')}" if not path.startswith(('/media/', 'http')) else path
+
+
+class HotelQuerySet(models.QuerySet):
+    """
+    with_images(): legacy-галереи (ID MediaFile) всей выборки разрешаются одним запросом
+    при её загрузке, а не запросом на каждый get_images_list().
+    """
+    _with_images = False
+
+    def with_images(self):
+        clone = self._chain()
+        clone._with_images = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_images = self._with_images
+        return clone
+
+    def _fetch_all(self):
+        loading = self._result_cache is None
+        super()._fetch_all()
+        if loading and self._with_images:
+            Hotel.resolve_images(self._result_cache)
+
+
 class Hotel(models.Model):
     """
     Модель отеля (Legacy: tb_hotels_old).
@@ -224,6 +262,10 @@ class Hotel(models.Model):
     deposit = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name=_('депозит (цена)'))
     deposit_turizm = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name=_('депозит (туризм)'))
 
+    # Price summary (maintained from RoomPrice + deposits, see hotels.services.pricing)
+    min_price_usd = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, verbose_name=_('мин. цена USD'))
+    max_price_usd = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, verbose_name=_('макс. цена USD'))
+
     # Images
     image_id = models.IntegerField(null=True, blank=True, verbose_name=_('ID главного фото (Legacy)'))
     banner_image_id = models.IntegerField(null=True, blank=True, verbose_name=_('ID баннера (Legacy)'))
@@ -253,11 +295,22 @@ class Hotel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('создано'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('обновлено'))
 
+    # Full-text search (silkroad_backend.search)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
+
+    objects = HotelQuerySet.as_manager()
+
     class Meta:
         db_table = 'tb_hotels_old'
         verbose_name = _('отель')
         verbose_name_plural = _('отели')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['min_price_usd', 'max_price_usd']),
+            GinIndex(fields=['search_vector'], name='tb_hotels_search_vector_gin'),
+            GinIndex(fields=['search_text'], name='tb_hotels_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -266,63 +319,54 @@ class Hotel(models.Model):
         """
         Возвращает список URL изображений.
         1. Если есть поле images (новые пути), использует его.
-        2. Иначе собирает ID из image_id, banner_image_id, gallery и ищет в MediaFile.
+        2. Иначе собирает ID из image_id, banner_image_id, gallery и ищет в MediaFile
+           (для выборки через Hotel.objects.with_images() — уже разрешены одним запросом).
         """
         if self.images:
             # Если пути уже есть (новые или мигрированные)
             raw = [x.strip() for x in self.images.split(',') if x.strip()]
-            return [
-                f"/media/{img.lstrip('/')}" if not img.startswith(('/media/', 'http')) else img
-                for img in raw
-            ]
-            
-        # Legacy Mode: Collect IDs
-        ids = []
-        if self.image_id:
-            ids.append(self.image_id)
-        if self.banner_image_id:
-            ids.append(self.banner_image_id)
-        if self.gallery:
-            try:
-                ids.extend([int(x.strip()) for x in self.gallery.split(',') if x.strip()])
-            except:
-                pass
-        
-        ids = list(set(ids))
+            return [_media_url(img) for img in raw]
+
+        # Legacy Mode: главное фото, баннер, галерея
+        ids = self.legacy_image_ids()
         if not ids:
             return []
+        resolved = self.__dict__.get('_legacy_images')
+        if resolved is None or resolved[0] != tuple(ids):
+            Hotel.resolve_images([self])
+        paths = self._legacy_images[1]
+        return list(dict.fromkeys(_media_url(paths[i]) for i in ids if i in paths))
 
-        # Fetch Paths from MediaFile
+    def legacy_image_ids(self):
+        """
+        ID MediaFile в порядке показа: главное фото, баннер, галерея (без повторов).
+        """
+        ids = [self.image_id, self.banner_image_id]
+        ids += [int(x) for x in (self.gallery or '').split(',') if x.strip().isdigit()]
+        return list(dict.fromkeys(i for i in ids if i))
+
+    @classmethod
+    def resolve_images(cls, hotels):
+        """
+        Разрешает legacy-ID изображений пачки отелей одним запросом к MediaFile.
+        Отели с заполненным images и уже разрешённые пропускаются.
+        """
         from vendors.models import MediaFile
-        media_files = MediaFile.objects.filter(id__in=ids).values('id', 'file_path')
-        media_map = {m['id']: m['file_path'] for m in media_files if m['file_path']}
-        
-        final_paths = []
-        
-        # Helper to add path
-        def add_path(img_id):
-            if img_id in media_map:
-                path = media_map[img_id]
-                # Format logic: assume file_path is relative to public/ or storage/
-                # Check if it implies 'images/' or 'uploads/'
-                # Usually legacy paths are like 'uploads/users/...'
-                final_path = f"/media/{path.lstrip('/')}" if not path.startswith(('/media/', 'http')) else path
-                if final_path not in final_paths:
-                    final_paths.append(final_path)
-
-        # 1. Main Image
-        if self.image_id:
-            add_path(self.image_id)
-            
-        # 2. Banner
-        if self.banner_image_id:
-            add_path(self.banner_image_id)
-            
-        # 3. Gallery (rest)
-        for i in ids:
-            add_path(i)
-            
-        return final_paths
+
+        pending = []
+        for hotel in hotels:
+            if isinstance(hotel, cls) and not hotel.images:
+                hotel_ids = hotel.legacy_image_ids()
+                if hotel.__dict__.get('_legacy_images', (None,))[0] != tuple(hotel_ids):
+                    pending.append((hotel, hotel_ids))
+        ids = {i for _, hotel_ids in pending for i in hotel_ids}
+        paths = dict(
+            MediaFile.objects.filter(id__in=ids).exclude(file_path__isnull=True).exclude(file_path='')
+            .values_list('id', 'file_path')
+        ) if ids else {}
+        for hotel, hotel_ids in pending:
+            hotel._legacy_images = (tuple(hotel_ids), {i: paths[i] for i in hotel_ids if i in paths})
+        return hotels
 
 
 class RoomType(models.Model):
@@ -410,6 +454,30 @@ class RoomPrice(models.Model):
         return f'{self.hotel} / {self.room_type} @ {self.dt} = ${self.usd}'
 
 
+class RoomInventory(models.Model):
+    """
+    Журнал занятости номеров по ночам (hotel, room_type, date).
+    Поддерживается сигналами Booking, пересобирается командой rebuild_room_inventory.
+    """
+    hotel = models.ForeignKey(Hotel, on_delete=models.CASCADE, related_name='inventory', verbose_name=_('отель'))
+    room_type = models.ForeignKey(RoomType, on_delete=models.CASCADE, related_name='inventory', verbose_name=_('тип комнаты'))
+    date = models.DateField(verbose_name=_('дата (ночь)'))
+    booked = models.IntegerField(default=0, verbose_name=_('забронировано'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tb_room_inventory'
+        verbose_name = _('занятость номеров')
+        verbose_name_plural = _('занятость номеров')
+        unique_together = ('hotel', 'room_type', 'date')
+        indexes = [
+            models.Index(fields=['hotel', 'date']),
+        ]
+
+    def __str__(self):
+        return f'{self.hotel_id} / {self.room_type_id} @ {self.date}: {self.booked}'
+
+
 
 
 
@@ -5,7 +5,6 @@ Uses ReportLab for professional PDF documents.
 
 from io import BytesIO
 from datetime import datetime
-import qrcode
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -13,8 +12,123 @@ from reportlab.lib.units import inch, mm
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
 from reportlab.pdfgen import canvas
+from functools import lru_cache
 from django.conf import settings
 
+from vendors.services import qr
+
+
+# Стили собираются один раз на процесс и дальше только читаются
+# (getSampleStyleSheet() + add() на каждый документ заметно дороже самой вёрстки).
+@lru_cache(maxsize=None)
+def booking_styles():
+    styles = getSampleStyleSheet()
+    
+    # Custom styles
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1e40af'),
+        spaceAfter=6*mm,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#1e40af'),
+        spaceAfter=3*mm,
+        spaceBefore=2*mm,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='InfoText',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#374151'),
+        spaceAfter=2*mm,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SmallGray',
+        parent=styles['Normal'],
+        fontSize=8,
+        textColor=colors.HexColor('#6b7280'),
+        alignment=TA_CENTER,
+    ))
+    
+    return styles
+
+
+@lru_cache(maxsize=None)
+def ticket_styles():
+    styles = getSampleStyleSheet()
+    
+    styles.add(ParagraphStyle(
+        name='TicketTitle',
+        parent=styles['Heading1'],
+        fontSize=28,
+        textColor=colors.HexColor('#059669'),
+        spaceAfter=8*mm,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#059669'),
+        spaceAfter=3*mm,
+        fontName='Helvetica-Bold'
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='InfoText',
+        fontSize=11,
+        textColor=colors.HexColor('#1f2937'),
+        spaceAfter=2*mm,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SmallGray',
+        fontSize=8,
+        textColor=colors.HexColor('#6b7280'),
+        alignment=TA_CENTER,
+    ))
+    
+    return styles
+
+
+# Общий стиль таблиц "метка: значение" подтверждения брони
+INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
+    ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 3*mm),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 3*mm),
+    ('LEFTPADDING', (0, 0), (-1, -1), 3*mm),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 3*mm),
+])
+
+
+def document_template(output):
+    return SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=30*mm,
+        leftMargin=30*mm,
+        topMargin=20*mm,
+        bottomMargin=20*mm,
+    )
+
 
 class BookingPDFGenerator:
     """
@@ -29,16 +143,16 @@ class BookingPDFGenerator:
         
     def generate(self):
         """Main generation method"""
-        doc = SimpleDocTemplate(
-            self.buffer,
-            pagesize=A4,
-            rightMargin=30*mm,
-            leftMargin=30*mm,
-            topMargin=20*mm,
-            bottomMargin=20*mm,
-        )
+        doc = document_template(self.buffer)
         
-        # Build content
+        # Build PDF
+        doc.build(self.story(), onFirstPage=self._add_watermark, onLaterPages=self._add_watermark)
+        
+        self.buffer.seek(0)
+        return self.buffer
+    
+    def story(self):
+        """Flowables of the document (also used by multi-document exports)"""
         story = []
         styles = self._get_styles()
         
@@ -65,54 +179,11 @@ class BookingPDFGenerator:
         # Footer
         story.extend(self._build_footer(styles))
         
-        # Build PDF
-        doc.build(story, onFirstPage=self._add_watermark, onLaterPages=self._add_watermark)
-        
-        self.buffer.seek(0)
-        return self.buffer
+        return story
     
     def _get_styles(self):
-        """Custom styles for the document"""
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=6*mm,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=3*mm,
-            spaceBefore=2*mm,
-            fontName='Helvetica-Bold'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='InfoText',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#374151'),
-            spaceAfter=2*mm,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='SmallGray',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.HexColor('#6b7280'),
-            alignment=TA_CENTER,
-        ))
-        
-        return styles
+        """Custom styles for the document (shared, read-only)"""
+        return booking_styles()
     
     def _build_header(self, styles):
         """Build PDF header with logo and title"""
@@ -156,18 +227,7 @@ class BookingPDFGenerator:
         ]
         
         table = Table(data, colWidths=[40*mm, 100*mm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 3*mm),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3*mm),
-            ('LEFTPADDING', (0, 0), (-1, -1), 3*mm),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3*mm),
-        ]))
+        table.setStyle(INFO_TABLE_STYLE)
         
         elements.append(table)
         return elements
@@ -187,18 +247,7 @@ class BookingPDFGenerator:
         ]
         
         table = Table(data, colWidths=[40*mm, 100*mm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#1f2937')),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 3*mm),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3*mm),
-            ('LEFTPADDING', (0, 0), (-1, -1), 3*mm),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3*mm),
-        ]))
+        table.setStyle(INFO_TABLE_STYLE)
         
         elements.append(table)
         return elements
@@ -363,15 +412,14 @@ class TicketPDFGenerator:
         
     def generate(self):
         """Main generation method"""
-        doc = SimpleDocTemplate(
-            self.buffer,
-            pagesize=A4,
-            rightMargin=30*mm,
-            leftMargin=30*mm,
-            topMargin=20*mm,
-            bottomMargin=20*mm,
-        )
+        doc = document_template(self.buffer)
+        doc.build(self.story())
         
+        self.buffer.seek(0)
+        return self.buffer
+    
+    def story(self):
+        """Flowables of the document (also used by multi-document exports)"""
         story = []
         styles = self._get_styles()
         
@@ -384,55 +432,17 @@ class TicketPDFGenerator:
         story.append(Spacer(1, 10*mm))
         
         # QR Code
-        story.extend(self._build_qr_code())
+        story.extend(self._build_qr_code(styles))
         story.append(Spacer(1, 10*mm))
         
         # Footer
         story.extend(self._build_footer(styles))
         
-        doc.build(story)
-        
-        self.buffer.seek(0)
-        return self.buffer
+        return story
     
     def _get_styles(self):
-        """Custom styles"""
-        styles = getSampleStyleSheet()
-        
-        styles.add(ParagraphStyle(
-            name='TicketTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            textColor=colors.HexColor('#059669'),
-            spaceAfter=8*mm,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#059669'),
-            spaceAfter=3*mm,
-            fontName='Helvetica-Bold'
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='InfoText',
-            fontSize=11,
-            textColor=colors.HexColor('#1f2937'),
-            spaceAfter=2*mm,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='SmallGray',
-            fontSize=8,
-            textColor=colors.HexColor('#6b7280'),
-            alignment=TA_CENTER,
-        ))
-        
-        return styles
+        """Custom styles (shared, read-only)"""
+        return ticket_styles()
     
     def _build_header(self, styles):
         """Build ticket header"""
@@ -480,37 +490,17 @@ class TicketPDFGenerator:
         elements.append(table)
         return elements
     
-    def _build_qr_code(self):
+    def _build_qr_code(self, styles):
         """Generate and add QR code"""
         elements = []
         
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-        
-        # QR data: ticket verification URL
-        qr_data = f"https://silkroad.uz/verify-ticket/{self.ticket.id}"
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save to buffer
-        img_buffer = BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        
-        # Add to PDF
-        qr_image = Image(img_buffer, width=60*mm, height=60*mm)
+        # QR data: ticket verification URL with the ticket hash,
+        # drawn as vector shapes from the cached module matrix (vendors.services.qr)
+        qr_image = qr.drawing(qr.payload(self.ticket), 60*mm)
         qr_image.hAlign = 'CENTER'
         elements.append(qr_image)
         
         # QR instruction
-        styles = self._get_styles()
         instruction = Paragraph(
             "Scan this QR code at the entrance",
             styles['SmallGray']
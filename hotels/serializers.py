@@ -1,7 +1,9 @@
+from django.db import models
 from django.utils import timezone
 from rest_framework import serializers
 
 from accounts.models import User
+from silkroad_backend import images as image_derivatives
 from .models import Sight, Category, SightFacility, Hotel, Room, RoomType, RoomPrice, HotelComment
 from captcha.fields import CaptchaField
 
@@ -33,6 +35,7 @@ class SightSerializer(serializers.ModelSerializer):
     facilities = SightFacilitySerializer(many=True, read_only=True)
 
     gallery_images = serializers.SerializerMethodField()
+    gallery_srcset = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
     price = serializers.SerializerMethodField()
 
@@ -53,6 +56,7 @@ class SightSerializer(serializers.ModelSerializer):
             'geolocation',
             'images',
             'gallery_images',
+            'gallery_srcset',
             'image',
             'price',
             'status',
@@ -81,6 +85,9 @@ class SightSerializer(serializers.ModelSerializer):
     def get_gallery_images(self, obj):
         return obj.get_images_list()
 
+    def get_gallery_srcset(self, obj):
+        return image_derivatives.responsive(obj.get_images_list())
+
     def get_image(self, obj):
         images = obj.get_images_list()
         if images:
@@ -91,33 +98,58 @@ class SightSerializer(serializers.ModelSerializer):
         return obj.is_foreg or 0
 
 
+class HotelListSerializer(serializers.ListSerializer):
+    """
+    Список отелей: legacy-изображения всей страницы разрешаются одним запросом к MediaFile.
+    """
+    def to_representation(self, data):
+        hotels = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        Hotel.resolve_images(hotels)
+        return super().to_representation(hotels)
+
+
 class HotelSerializer(serializers.ModelSerializer):
     """
     Сериализатор для модели Hotel (legacy + new).
     """
     region = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
+    images_srcset = serializers.SerializerMethodField()
     price = serializers.SerializerMethodField()
 
     class Meta:
         model = Hotel
         fields = [
             'id', 'name', 'region', 'address', 'stars', 'rating',
-            'description', 'images', 'price', 'amenities_services',
+            'description', 'images', 'images_srcset', 'price', 'amenities_services',
             'geolocation',
             'created_at'
         ]
+        list_serializer_class = HotelListSerializer
 
     def get_region(self, obj):
         return obj.region.name if obj.region else None
 
+    def _images(self, obj):
+        # images и images_srcset строятся из одного списка (legacy-режим читает MediaFile)
+        if not hasattr(obj, '_images_list'):
+            obj._images_list = obj.get_images_list()
+        return obj._images_list
+
     def get_images(self, obj):
-        return obj.get_images_list()
+        return self._images(obj)
+
+    def get_images_srcset(self, obj):
+        # Производные thumb/card/hero (WebP + JPEG), если уже сгенерированы
+        return image_derivatives.responsive(self._images(obj))
     
     def get_price(self, obj):
         # Prefer annotated price (from filters)
         if hasattr(obj, 'price'):
             return obj.price
+        # Denormalized "from" price (RoomPrice + deposits)
+        if obj.min_price_usd is not None:
+            return obj.min_price_usd
         # Fallback to DB fields
         return obj.deposit or obj.deposit_turizm or 0
 
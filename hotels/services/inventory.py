@@ -0,0 +1,209 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils.dateparse import parse_date
+
+logger = logging.getLogger(__name__)
+
+# Статусы, при которых бронь занимает номер (как в старом поиске по JSON)
+ACTIVE_STATUSES = ('NEW', 'CONFIRMED')
+
+
+def stay_nights(check_in, check_out):
+    """
+    Список ночей проживания: [check_in, check_out).
+    """
+    if not check_in or not check_out or check_out <= check_in:
+        return []
+    return [check_in + timedelta(days=i) for i in range((check_out - check_in).days)]
+
+
+def guests_per_room(guests, rooms_requested=1):
+    """
+    Сколько гостей должен вместить каждый номер, если группа делится на rooms_requested номеров.
+    """
+    return -(-guests // max(1, rooms_requested))
+
+
+def booking_footprint(booking):
+    """
+    Что бронь занимает в журнале: (hotel_id, room_type_id, check_in, check_out) или None.
+    """
+    if booking is None or booking.status not in ACTIVE_STATUSES:
+        return None
+    if not booking.hotel_id or not booking.room_type_id:
+        return None
+    check_in, check_out = booking.check_in, booking.check_out
+    if isinstance(check_in, str):
+        check_in = parse_date(check_in)
+    if isinstance(check_out, str):
+        check_out = parse_date(check_out)
+    return booking.hotel_id, booking.room_type_id, check_in, check_out
+
+
+def apply_footprint(footprint, delta):
+    """
+    Добавляет delta (+1 / -1) к каждой ночи брони.
+    Строки создаются при необходимости, инкремент делается одним UPDATE.
+    """
+    from hotels.models import RoomInventory
+
+    if not footprint or not delta:
+        return
+    hotel_id, room_type_id, check_in, check_out = footprint
+    nights = stay_nights(check_in, check_out)
+    if not nights:
+        return
+
+    with transaction.atomic():
+        RoomInventory.objects.bulk_create(
+            [RoomInventory(hotel_id=hotel_id, room_type_id=room_type_id, date=night) for night in nights],
+            ignore_conflicts=True,
+        )
+        RoomInventory.objects.filter(
+            hotel_id=hotel_id,
+            room_type_id=room_type_id,
+            date__gte=nights[0],
+            date__lte=nights[-1],
+        ).update(booked=F('booked') + delta)
+
+
+def sync_booking(old_footprint, new_footprint):
+    """
+    Переносит занятость брони при смене статуса/дат/типа номера.
+    """
+    if old_footprint == new_footprint:
+        return
+    with transaction.atomic():
+        apply_footprint(old_footprint, -1)
+        apply_footprint(new_footprint, +1)
+
+
+def booked_by_type(hotel_id, check_in, check_out):
+    """
+    Пиковая занятость по типам номеров за период: {room_type_id: booked}.
+    Один запрос по индексу (hotel, date).
+    """
+    from hotels.models import RoomInventory
+
+    nights = stay_nights(check_in, check_out)
+    if not nights:
+        return {}
+    rows = RoomInventory.objects.filter(
+        hotel_id=hotel_id,
+        date__gte=nights[0],
+        date__lte=nights[-1],
+    ).values('room_type_id').annotate(peak=Max('booked'))
+    return {row['room_type_id']: max(0, row['peak'] or 0) for row in rows}
+
+
+def rebuild(hotel_ids=None, batch_size=1000):
+    """
+    Пересобирает журнал из tb_bookings_v2. Возвращает (брони, строки журнала).
+    """
+    from bookings.models import Booking
+    from hotels.models import RoomInventory
+
+    bookings = Booking.objects.filter(
+        status__in=ACTIVE_STATUSES,
+        room_type__isnull=False,
+        check_out__gt=F('check_in'),
+    )
+    if hotel_ids:
+        bookings = bookings.filter(hotel_id__in=hotel_ids)
+
+    counts = {}
+    booking_count = 0
+    for hotel_id, room_type_id, check_in, check_out in bookings.values_list(
+        'hotel_id', 'room_type_id', 'check_in', 'check_out'
+    ).iterator(chunk_size=batch_size):
+        booking_count += 1
+        for night in stay_nights(check_in, check_out):
+            key = (hotel_id, room_type_id, night)
+            counts[key] = counts.get(key, 0) + 1
+
+    rows = [
+        RoomInventory(hotel_id=hotel_id, room_type_id=room_type_id, date=night, booked=booked)
+        for (hotel_id, room_type_id, night), booked in counts.items()
+    ]
+
+    with transaction.atomic():
+        stale = RoomInventory.objects.all()
+        if hotel_ids:
+            stale = stale.filter(hotel_id__in=hotel_ids)
+        stale.delete()
+        RoomInventory.objects.bulk_create(rows, batch_size=batch_size)
+
+    logger.info(f"Room inventory rebuilt: {booking_count} bookings -> {len(rows)} rows")
+    return booking_count, len(rows)
+
+
+def availability_for_hotels(hotel_ids, check_in, check_out, guests=None, rooms_requested=1):
+    """
+    Самый дешёвый доступный тип номера по каждому отелю за период: rooms_requested свободных
+    номеров, каждый вмещает guests_per_room(guests, rooms_requested).
+    Постоянное число запросов независимо от количества отелей:
+    комнаты по типам, пиковая занятость из журнала, цены по ночам.
+
+    Возвращает {hotel_id: {'room_type_id', 'room_type', 'capacity', 'available_count',
+    'price_per_night_usd', 'price_per_night_uzs', 'total_price_usd', 'total_price_uzs'}}.
+    """
+    from hotels.models import Room, RoomInventory
+
+    hotel_ids = list(hotel_ids)
+    nights = stay_nights(check_in, check_out)
+    if not hotel_ids or not nights:
+        return {}
+
+    rooms = Room.objects.filter(hotel_id__in=hotel_ids, active=True)
+    if guests:
+        rooms = rooms.filter(room_type__capacity__gte=guests_per_room(guests, rooms_requested))
+    totals = rooms.values(
+        'hotel_id', 'room_type_id', 'room_type__en', 'room_type__capacity'
+    ).annotate(total=Count('id'))
+
+    booked = {
+        (row['hotel_id'], row['room_type_id']): max(0, row['peak'] or 0)
+        for row in RoomInventory.objects.filter(
+            hotel_id__in=hotel_ids,
+            date__gte=nights[0],
+            date__lte=nights[-1],
+        ).values('hotel_id', 'room_type_id').annotate(peak=Max('booked'))
+    }
+
+    candidates = []
+    for row in totals:
+        key = (row['hotel_id'], row['room_type_id'])
+        available = row['total'] - booked.get(key, 0)
+        if available >= rooms_requested:
+            candidates.append((key, row, available))
+
+    # Per-night prices for all candidate pairs in one batch
+    from .pricing import nightly_rates
+    rates = nightly_rates([key for key, _, _ in candidates], check_in, check_out)
+
+    result = {}
+    for key, row, available in candidates:
+        rate = rates.get(key)
+        candidate = {
+            'room_type_id': row['room_type_id'],
+            'room_type': row['room_type__en'],
+            'capacity': row['room_type__capacity'],
+            'available_count': available,
+            'price_per_night_usd': round(float(rate['total_usd']) / len(nights), 2) if rate else 0,
+            'price_per_night_uzs': round(float(rate['total_uzs']) / len(nights), 2) if rate else 0,
+            'total_price_usd': float(rate['total_usd']) if rate else 0,
+            'total_price_uzs': float(rate['total_uzs']) if rate else 0,
+        }
+        current = result.get(row['hotel_id'])
+        if current is None or _price_sort_key(candidate) < _price_sort_key(current):
+            result[row['hotel_id']] = candidate
+    return result
+
+
+def _price_sort_key(item):
+    # Типы без цены идут после типов с ценой
+    price = item['price_per_night_usd']
+    return (price <= 0, price, -item['available_count'])
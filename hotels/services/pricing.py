@@ -0,0 +1,208 @@
+import logging
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Case, F, Max, Min, When
+
+from .inventory import stay_nights
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 60 * 60
+ZERO = Decimal('0')
+
+
+def _version_key(hotel_id):
+    return f'pricing:ver:{hotel_id}'
+
+
+def _quote_key(hotel_id, room_type_id, check_in, check_out, version):
+    return f'pricing:{hotel_id}:{room_type_id}:{check_in:%Y%m%d}:{check_out:%Y%m%d}:v{version}'
+
+
+def _versions(hotel_ids):
+    try:
+        stored = cache.get_many([_version_key(h) for h in hotel_ids])
+    except Exception as e:
+        logger.warning(f"Pricing cache unavailable: {e}")
+        return None
+    return {h: stored.get(_version_key(h), 0) for h in hotel_ids}
+
+
+def invalidate(hotel_id):
+    """
+    Сбрасывает кэш цен отеля (вызывается при записи RoomPrice / RoomType).
+    """
+    key = _version_key(hotel_id)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Failed to invalidate pricing cache for hotel {hotel_id}: {e}")
+
+
+def nightly_rates(keys, check_in, check_out):
+    """
+    Цены по ночам для набора (hotel_id, room_type_id) за период [check_in, check_out).
+
+    Для каждой ночи берётся последняя строка RoomPrice с dt <= ночи,
+    иначе RoomType.price_ref. Все ключи считаются парой запросов к
+    tb_room_prices плюс один к tb_room_types; результат кэшируется.
+
+    Возвращает {(hotel_id, room_type_id): {
+        'nights': [{'date', 'usd', 'uzs', 'source'}, ...],
+        'total_usd', 'total_uzs',
+    }}
+    """
+    keys = list(dict.fromkeys(keys))
+    nights = stay_nights(check_in, check_out)
+    if not keys or not nights:
+        return {}
+
+    versions = _versions({hotel_id for hotel_id, _ in keys})
+    cache_keys = {}
+    result = {}
+    if versions is not None:
+        cache_keys = {
+            key: _quote_key(key[0], key[1], check_in, check_out, versions[key[0]])
+            for key in keys
+        }
+        try:
+            cached = cache.get_many(list(cache_keys.values()))
+        except Exception as e:
+            logger.warning(f"Pricing cache unavailable: {e}")
+            cached = {}
+        for key, cache_key in cache_keys.items():
+            if cache_key in cached:
+                result[key] = cached[cache_key]
+
+    missing = [key for key in keys if key not in result]
+    if missing:
+        computed = _compute(missing, nights)
+        result.update(computed)
+        if cache_keys:
+            try:
+                cache.set_many({cache_keys[key]: computed[key] for key in missing}, timeout=CACHE_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Failed to store pricing cache: {e}")
+
+    return result
+
+
+def quote(hotel_id, room_type_ids, check_in, check_out):
+    """
+    Цены по ночам для нескольких типов номеров одного отеля: {room_type_id: quote}.
+    """
+    rates = nightly_rates([(hotel_id, t) for t in room_type_ids], check_in, check_out)
+    return {room_type_id: rate for (_, room_type_id), rate in rates.items()}
+
+
+def _compute(keys, nights):
+    from hotels.models import RoomPrice, RoomType
+
+    hotel_ids = {hotel_id for hotel_id, _ in keys}
+    type_ids = {type_id for _, type_id in keys}
+    wanted = set(keys)
+    first, last = nights[0], nights[-1]
+
+    base = RoomPrice.objects.filter(hotel_id__in=hotel_ids, room_type_id__in=type_ids)
+    fields = ('hotel_id', 'room_type_id', 'dt', 'usd', 'uzs')
+
+    # Rows in effect before the stay (latest one per pair) + rows dated inside the stay
+    timeline = {key: [] for key in keys}
+    anchors = base.filter(dt__lt=first).order_by(
+        'hotel_id', 'room_type_id', '-dt', '-id'
+    ).distinct('hotel_id', 'room_type_id').values(*fields)
+    in_range = base.filter(dt__gte=first, dt__lte=last).order_by(
+        'hotel_id', 'room_type_id', 'dt', 'id'
+    ).values(*fields)
+    for rows in (anchors, in_range):
+        for row in rows:
+            key = (row['hotel_id'], row['room_type_id'])
+            if key in wanted:
+                timeline[key].append(row)
+
+    price_refs = dict(RoomType.objects.filter(id__in=type_ids).values_list('id', 'price_ref'))
+
+    result = {}
+    for key, rows in timeline.items():
+        fallback = price_refs.get(key[1]) or ZERO
+        breakdown = []
+        current = None
+        index = 0
+        for night in nights:
+            while index < len(rows) and rows[index]['dt'] <= night:
+                current = rows[index]
+                index += 1
+            if current:
+                usd, uzs, source = current['usd'], current['uzs'], 'room_price'
+            else:
+                usd, uzs, source = fallback, ZERO, 'price_ref'
+            breakdown.append({'date': night.isoformat(), 'usd': usd, 'uzs': uzs, 'source': source})
+
+        result[key] = {
+            'nights': breakdown,
+            'total_usd': sum((n['usd'] for n in breakdown), ZERO),
+            'total_uzs': sum((n['uzs'] for n in breakdown), ZERO),
+        }
+    return result
+
+
+def refresh_price_range(hotel_ids):
+    """
+    Пересчитывает Hotel.min_price_usd / max_price_usd по RoomPrice и депозитам.
+    """
+    from hotels.models import Hotel, RoomPrice
+
+    hotel_ids = list(hotel_ids)
+    ranges = {
+        row['hotel_id']: (row['low'], row['high'])
+        for row in RoomPrice.objects.filter(hotel_id__in=hotel_ids, usd__gt=0).values('hotel_id').annotate(
+            low=Min('usd'), high=Max('usd')
+        )
+    }
+    hotels = list(Hotel.objects.filter(id__in=hotel_ids).only('id', 'deposit', 'deposit_turizm'))
+    for hotel in hotels:
+        values = [v for v in ranges.get(hotel.id, ()) if v is not None]
+        values += [v for v in (hotel.deposit, hotel.deposit_turizm) if v and v > 0]
+        hotel.min_price_usd = min(values) if values else None
+        hotel.max_price_usd = max(values) if values else None
+    Hotel.objects.bulk_update(hotels, ['min_price_usd', 'max_price_usd'])
+
+
+def extend_price_range(hotel_id, usd):
+    """
+    Инкрементально расширяет диапазон цен отеля новой ценой (без агрегата).
+    """
+    from hotels.models import Hotel
+
+    usd = Decimal(str(usd or 0))
+    if usd <= 0:
+        return
+    Hotel.objects.filter(pk=hotel_id).update(
+        min_price_usd=Case(
+            When(min_price_usd__isnull=True, then=usd),
+            When(min_price_usd__gt=usd, then=usd),
+            default=F('min_price_usd'),
+        ),
+        max_price_usd=Case(
+            When(max_price_usd__isnull=True, then=usd),
+            When(max_price_usd__lt=usd, then=usd),
+            default=F('max_price_usd'),
+        ),
+    )
+
+
+def refresh_after_import(hotel_ids, batch_size=1000):
+    """
+    Массовый импорт (bulk_create / bulk_update) не вызывает сигналов: пересчитывает
+    диапазоны цен отелей, сбрасывает их кэш цен и кэш ответов API.
+    """
+    from silkroad_backend import response_cache
+
+    hotel_ids = list(hotel_ids)
+    for start in range(0, len(hotel_ids), batch_size):
+        refresh_price_range(hotel_ids[start:start + batch_size])
+    for hotel_id in hotel_ids:
+        invalidate(hotel_id)
+    response_cache.invalidate('hotels', *(f'hotel:{hotel_id}' for hotel_id in hotel_ids))
@@ -1,2 +1,123 @@
 # Hotels signals (Legacy logic removed)
 # New booking notifications are handled in the bookings app or via Celery tasks.
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from hotels import documents
+from hotels.models import Hotel, Room, RoomPrice, RoomType
+from hotels.services import inventory, pricing
+from vendors.models import TicketSale
+
+
+@receiver(pre_save, sender=Booking)
+def booking_inventory_snapshot(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает прежнюю занятость брони до сохранения.
+    """
+    if raw:
+        return
+    instance._inventory_footprint = None
+    if instance.pk:
+        previous = Booking.objects.filter(pk=instance.pk).only(
+            'hotel_id', 'room_type_id', 'check_in', 'check_out', 'status'
+        ).first()
+        instance._inventory_footprint = inventory.booking_footprint(previous)
+
+
+@receiver(post_save, sender=Booking)
+def booking_inventory_sync(sender, instance, raw=False, **kwargs):
+    """
+    Обновляет журнал занятости при создании/подтверждении/отмене брони.
+    """
+    if raw:
+        return
+    inventory.sync_booking(
+        getattr(instance, '_inventory_footprint', None),
+        inventory.booking_footprint(instance),
+    )
+    instance._inventory_footprint = inventory.booking_footprint(instance)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_inventory_release(sender, instance, **kwargs):
+    inventory.sync_booking(inventory.booking_footprint(instance), None)
+
+
+@receiver(post_save, sender=Booking)
+def booking_render_document(sender, instance, raw=False, **kwargs):
+    """
+    Новая версия брони — PDF подтверждения перерисовывается в фоне (hotels.documents).
+    """
+    if raw:
+        return
+    transaction.on_commit(lambda: documents.schedule('booking', instance))
+
+
+@receiver(post_save, sender=TicketSale)
+def ticket_render_document(sender, instance, raw=False, **kwargs):
+    # Скачать можно только оплаченный билет
+    if raw or instance.status != 'PAID':
+        return
+    transaction.on_commit(lambda: documents.schedule('ticket', instance))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_forget_document(sender, instance, **kwargs):
+    documents.forget('booking', instance.pk)
+
+
+@receiver(post_delete, sender=TicketSale)
+def ticket_forget_document(sender, instance, **kwargs):
+    documents.forget('ticket', instance.pk)
+
+
+@receiver(post_save, sender=RoomPrice)
+@receiver(post_delete, sender=RoomPrice)
+def room_price_invalidate_pricing(sender, instance, **kwargs):
+    pricing.invalidate(instance.hotel_id)
+
+
+@receiver(post_save, sender=RoomPrice)
+def room_price_update_range(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Новая цена только расширяет диапазон; изменённая — требует пересчёта.
+    """
+    if raw:
+        return
+    if created:
+        pricing.extend_price_range(instance.hotel_id, instance.usd)
+    else:
+        pricing.refresh_price_range([instance.hotel_id])
+
+
+@receiver(post_delete, sender=RoomPrice)
+def room_price_shrink_range(sender, instance, **kwargs):
+    pricing.refresh_price_range([instance.hotel_id])
+
+
+@receiver(post_save, sender=Hotel)
+def hotel_update_range(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Депозиты тоже входят в диапазон цен отеля.
+    """
+    if raw:
+        return
+    if update_fields is not None and not {'deposit', 'deposit_turizm'} & set(update_fields):
+        return
+    pricing.refresh_price_range([instance.pk])
+
+
+@receiver(post_save, sender=RoomType)
+def room_type_invalidate_pricing(sender, instance, created=False, **kwargs):
+    """
+    price_ref используется как запасная цена — сбрасываем кэш отелей с этим типом.
+    """
+    if created:
+        return
+    hotel_ids = set(Room.objects.filter(room_type=instance).values_list('hotel_id', flat=True).distinct())
+    if instance.hotel_id:
+        hotel_ids.add(instance.hotel_id)
+    for hotel_id in hotel_ids:
+        pricing.invalidate(hotel_id)
@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from bookings.models import Booking
+from config_module.models import CurrencyRate
+from hotels import documents
+from hotels.models import Hotel
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(prefix='silkroad_test_documents')
+
+
+class FakeGenerator:
+    renders = 0
+
+    def __init__(self, booking):
+        self.booking = booking
+
+    def generate(self):
+        FakeGenerator.renders += 1
+        return io.BytesIO(f"%PDF booking {self.booking.id} {self.booking.status}".encode())
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class BookingDocumentTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        FakeGenerator.renders = 0
+        patcher = mock.patch.dict(documents.KINDS['booking'], {'generator': FakeGenerator})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = User.objects.create_user(email='guest@example.com', password='password')
+        currency = CurrencyRate.objects.create(code='USD', rate_to_uzs=12500)
+        hotel = Hotel.objects.create(name="PDF Hotel")
+        self.booking = Booking.objects.create(
+            user=self.user, hotel=hotel, check_in=date(2026, 7, 1), check_out=date(2026, 7, 3), currency=currency,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/hotels/bookings/{self.booking.id}/download/'
+
+    def test_download_is_rendered_once_and_revalidated(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b"%PDF booking %d NEW" % self.booking.id)
+        etag = response['ETag']
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(FakeGenerator.renders, 1)
+
+    def test_booking_change_renders_new_version_and_drops_old_file(self):
+        first = documents.get('booking', self.booking)
+        self.booking.status = 'CONFIRMED'
+        self.booking.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['etag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['etag'])
+        self.assertEqual(FakeGenerator.renders, 2)
+        self.assertFalse(default_storage.exists(first['path']))
@@ -0,0 +1,48 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from hotels.models import Hotel
+from hotels.serializers import HotelSerializer
+from vendors.models import MediaFile
+
+
+class LegacyHotelImagesTest(TestCase):
+    def setUp(self):
+        MediaFile.objects.bulk_create([
+            MediaFile(id=1, file_path='uploads/main.jpg'),
+            MediaFile(id=2, file_path='uploads/banner.jpg'),
+            MediaFile(id=3, file_path='/media/uploads/gallery.jpg'),
+            MediaFile(id=4, file_path=''),
+        ])
+        for n in range(5):
+            Hotel.objects.create(name=f"Legacy {n}", image_id=1, banner_image_id=2, gallery='3, 1,4,x')
+        Hotel.objects.create(name="Migrated", images='hotels/a.jpg,http://cdn.example.com/b.jpg')
+
+    def test_order_and_url_format(self):
+        hotel = Hotel.objects.filter(image_id=1).first()
+        self.assertEqual(hotel.get_images_list(), [
+            '/media/uploads/main.jpg', '/media/uploads/banner.jpg', '/media/uploads/gallery.jpg',
+        ])
+
+    def test_with_images_resolves_page_in_one_query(self):
+        with self.assertNumQueries(2):
+            hotels = list(Hotel.objects.with_images()[:10])
+            images = [hotel.get_images_list() for hotel in hotels]
+        self.assertEqual(len([i for i in images if len(i) == 3]), 5)
+        self.assertIn(['/media/hotels/a.jpg', 'http://cdn.example.com/b.jpg'], images)
+
+    def test_list_serializer_resolves_in_bulk(self):
+        hotels = Hotel.objects.all()
+        with self.assertNumQueries(2), mock.patch('silkroad_backend.images.schedule'):
+            data = HotelSerializer(hotels, many=True).data
+        self.assertEqual(data[-1]['images'][0], '/media/uploads/main.jpg')
+
+    def test_map_legacy_media_materializes_paths(self):
+        call_command('map_legacy_media', batch_size=2, stdout=io.StringIO())
+        hotel = Hotel.objects.filter(image_id=1).first()
+        self.assertEqual(hotel.images, 'uploads/main.jpg,uploads/banner.jpg,/media/uploads/gallery.jpg')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(hotel.get_images_list()), 3)
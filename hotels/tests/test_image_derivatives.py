@@ -0,0 +1,63 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from silkroad_backend import images
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(prefix='silkroad_test_derivatives')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class ImageDerivativesTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        from PIL import Image
+
+        cache.clear()
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 500), 'red').save(buffer, 'JPEG')
+        self.path = default_storage.save('hotels/test/photo.jpg', ContentFile(buffer.getvalue()))
+
+    def test_generate_skips_sizes_larger_than_original(self):
+        variants = images.generate(self.path)
+
+        self.assertEqual(set(variants), {'thumb', 'card'})
+        self.assertEqual(variants['card']['width'], 640)
+        self.assertTrue(default_storage.exists('hotels/test/photo.card.webp'))
+        self.assertTrue(default_storage.exists('hotels/test/photo.thumb.jpg'))
+
+    def test_responsive_uses_registry_and_schedules_missing(self):
+        url = f'/media/{self.path}'
+        with mock.patch('silkroad_backend.tasks.generate_image_derivatives_task.delay') as delay:
+            self.assertEqual(images.responsive([url])[0]['srcset'], '')
+            images.responsive([url])
+        delay.assert_called_once_with(self.path)
+
+        images.generate(self.path)
+        item = images.responsive([url, 'https://cdn.example.com/a.jpg'])
+        self.assertEqual(
+            item[0]['srcset'],
+            '/media/hotels/test/photo.thumb.webp 320w, /media/hotels/test/photo.card.webp 640w',
+        )
+        self.assertEqual(item[1]['srcset'], '')
+
+    def test_registering_derivatives_refreshes_cached_lists(self):
+        with mock.patch('silkroad_backend.tasks.generate_image_derivatives_task.delay'):
+            self.assertEqual(self.client.get('/api/hotels/')['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get('/api/hotels/')['X-Cache'], 'HIT')
+
+            images.generate(self.path)
+            self.assertEqual(self.client.get('/api/hotels/')['X-Cache'], 'MISS')
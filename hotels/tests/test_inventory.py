@@ -0,0 +1,104 @@
+from datetime import date
+
+from django.test import TestCase
+
+from accounts.models import User
+from bookings.models import Booking
+from config_module.models import CurrencyRate
+from hotels.models import Hotel, RoomType, Room, RoomInventory
+from hotels.services import inventory
+
+
+class RoomInventoryLedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='guest@example.com', password='password')
+        self.currency = CurrencyRate.objects.create(code='USD', rate_to_uzs=12500)
+        self.hotel = Hotel.objects.create(name="Ledger Hotel")
+        self.room_type = RoomType.objects.create(en="Double", hotel=self.hotel, capacity=2)
+        Room.objects.create(hotel=self.hotel, room_type=self.room_type)
+        Room.objects.create(hotel=self.hotel, room_type=self.room_type)
+
+    def make_booking(self, check_in, check_out, status='NEW'):
+        return Booking.objects.create(
+            user=self.user, hotel=self.hotel, room_type=self.room_type,
+            check_in=check_in, check_out=check_out, status=status, currency=self.currency,
+        )
+
+    def test_create_and_cancel_update_ledger(self):
+        booking = self.make_booking(date(2026, 7, 1), date(2026, 7, 4))
+        self.assertEqual(RoomInventory.objects.filter(hotel=self.hotel, booked=1).count(), 3)
+
+        booking.status = 'CANCELLED'
+        booking.save()
+        self.assertFalse(RoomInventory.objects.filter(hotel=self.hotel, booked__gt=0).exists())
+
+    def test_booked_by_type_returns_peak(self):
+        self.make_booking(date(2026, 7, 1), date(2026, 7, 3))
+        self.make_booking(date(2026, 7, 2), date(2026, 7, 5))
+
+        booked = inventory.booked_by_type(self.hotel.id, date(2026, 7, 1), date(2026, 7, 6))
+        self.assertEqual(booked, {self.room_type.id: 2})
+
+        # Check-out day is free for the next guest
+        booked = inventory.booked_by_type(self.hotel.id, date(2026, 7, 5), date(2026, 7, 6))
+        self.assertEqual(booked.get(self.room_type.id, 0), 0)
+
+    def test_rebuild_matches_signals(self):
+        self.make_booking(date(2026, 7, 1), date(2026, 7, 3), status='CONFIRMED')
+        self.make_booking(date(2026, 7, 2), date(2026, 7, 4), status='REJECTED')
+        expected = dict(RoomInventory.objects.filter(booked__gt=0).values_list('date', 'booked'))
+
+        RoomInventory.objects.all().delete()
+        bookings, rows = inventory.rebuild()
+
+        self.assertEqual(bookings, 1)
+        self.assertEqual(dict(RoomInventory.objects.values_list('date', 'booked')), expected)
+
+    def test_search_rooms_uses_ledger(self):
+        self.make_booking(date(2026, 7, 1), date(2026, 7, 3))
+        self.make_booking(date(2026, 7, 1), date(2026, 7, 3))
+
+        response = self.client.post(
+            f'/api/hotels/{self.hotel.id}/search-rooms/',
+            {'check_in': '2026-07-02', 'check_out': '2026-07-04'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rooms'], [])
+
+    def test_bulk_availability_endpoint(self):
+        other = Hotel.objects.create(name="Full Hotel")
+        other_type = RoomType.objects.create(en="Single", hotel=other, capacity=1)
+        Room.objects.create(hotel=other, room_type=other_type)
+        Booking.objects.create(
+            user=self.user, hotel=other, room_type=other_type,
+            check_in=date(2026, 7, 1), check_out=date(2026, 7, 3), currency=self.currency,
+        )
+
+        response = self.client.post(
+            '/api/hotels/availability/',
+            {'hotel_ids': [self.hotel.id, other.id], 'check_in': '2026-07-01', 'check_out': '2026-07-03'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        hotels = response.json()['hotels']
+        self.assertEqual([h['hotel_id'] for h in hotels], [self.hotel.id])
+        self.assertEqual(hotels[0]['available_count'], 2)
+
+    def test_group_split_across_rooms_fits_room_capacity(self):
+        # 4 гостя в 2 номерах — по 2 на номер, двухместные подходят
+        availability = inventory.availability_for_hotels(
+            [self.hotel.id], date(2026, 7, 1), date(2026, 7, 3), guests=4, rooms_requested=2,
+        )
+        self.assertEqual(availability[self.hotel.id]['available_count'], 2)
+        self.assertEqual(inventory.availability_for_hotels(
+            [self.hotel.id], date(2026, 7, 1), date(2026, 7, 3), guests=4, rooms_requested=1,
+        ), {})
+
+    def test_bulk_availability_rejects_non_integer_region(self):
+        response = self.client.post(
+            '/api/hotels/availability/',
+            {'region': 'abc', 'check_in': '2026-07-01', 'check_out': '2026-07-03'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
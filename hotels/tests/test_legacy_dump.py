@@ -0,0 +1,132 @@
+import io
+import os
+import tempfile
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from hotels.models import Hotel
+from silkroad_backend.legacy_dump import Checkpoint, DumpReader, Throughput
+from silkroad_backend.management.commands import migrate_full_db
+
+DUMP = b"""-- MySQL dump
+CREATE TABLE `tb_hotels` (
+  `id` bigint NOT NULL,
+  `name` varchar(255) DEFAULT NULL,
+  `deposit` decimal(12,2) DEFAULT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB;
+INSERT INTO `tb_hotels` VALUES (1,'It\\'s a \\"hotel\\"),(',12.50),(2,NULL,-3);
+INSERT INTO `tb_sights` VALUES (1,'skipped');
+INSERT INTO `tb_hotels` VALUES (3,'line\\nbreak ''q''',0),
+(4,'\xd0\xa1\xd0\xb0\xd0\xbc\xd0\xb0\xd1\x80\xd0\xba\xd0\xb0\xd0\xbd\xd0\xb4',1.5);
+"""
+
+
+class LegacyDumpReaderTest(SimpleTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sql')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(DUMP)
+        self.addCleanup(os.remove, self.path)
+
+    def test_typed_rows_and_escapes(self):
+        rows = list(DumpReader(self.path).rows('tb_hotels'))
+        self.assertEqual(rows, [
+            (1, 'It\'s a "hotel"),(', Decimal('12.50')),
+            (2, None, -3),
+            (3, "line\nbreak 'q'", 0),
+            (4, 'Самарканд', Decimal('1.5')),
+        ])
+
+    def test_untyped_rows_keep_strings(self):
+        rows = list(DumpReader(self.path, typed=False).rows('tb_hotels'))
+        self.assertEqual(rows[1], ('2', None, '-3'))
+
+    def test_columns_from_create_table(self):
+        statement = next(DumpReader(self.path).statements({'tb_hotels'}))
+        self.assertEqual(statement.dicts()[1], {'id': 2, 'name': None, 'deposit': -3})
+
+    def test_resume_from_statement_offset(self):
+        first = next(DumpReader(self.path).statements({'tb_hotels'}))
+        rows = list(DumpReader(self.path).rows('tb_hotels', start=first.end_offset))
+        self.assertEqual([row[0] for row in rows], [3, 4])
+
+    def test_checkpoint_roundtrip(self):
+        checkpoint_path = f'{self.path}.checkpoint'
+        checkpoint = Checkpoint(checkpoint_path, dump_size=100)
+        self.addCleanup(checkpoint.clear)
+        checkpoint.advance('tb_hotels', 42, 2)
+        checkpoint.finish('tb_users')
+
+        self.assertEqual(Checkpoint(checkpoint_path, dump_size=100).state('tb_hotels'),
+                         {'offset': 42, 'rows': 2, 'done': False})
+        self.assertTrue(Checkpoint(checkpoint_path, dump_size=100).state('tb_users')['done'])
+        # Другой дамп — прогресс не применяется
+        self.assertEqual(Checkpoint(checkpoint_path, dump_size=101).state('tb_hotels')['offset'], 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LegacyPriceImportTest(TestCase):
+    def test_imported_room_prices_reach_price_filter(self):
+        hotel = Hotel.objects.create(name="Imported Hotel", is_active=True)
+        fd, path = tempfile.mkstemp(suffix='.sql')
+        with os.fdopen(fd, 'w') as f:
+            f.write(
+                "INSERT INTO `tb_room_types` VALUES (7,'Standard','Стандарт','Standart');\n"
+                f"INSERT INTO `tb_room_prices` VALUES (1,{hotel.id},7,'2026-07-01',50.00,625000.00),"
+                f"(2,{hotel.id},7,'2026-08-01',80.00,1000000.00);\n"
+            )
+        self.addCleanup(os.remove, path)
+
+        call_command('import_remaining_legacy', sql_file=path, stdout=io.StringIO())
+
+        hotel.refresh_from_db()
+        self.assertEqual((hotel.min_price_usd, hotel.max_price_usd), (Decimal('50'), Decimal('80')))
+        response = self.client.get('/api/hotels/', {'price_min': 40, 'price_max': 60})
+        self.assertIn(hotel.id, [h['id'] for h in response.json()['results']])
+
+
+def fake_import_worker(sql_file, table, checkpoint_path, batch_size):
+    # Таблицы без зависимостей "грузятся" дольше — зависимые не должны стартовать раньше них
+    time.sleep(0.05 if not migrate_full_db.DEPENDENCIES[table] else 0.01)
+    if table == os.environ.get('FAIL_LEGACY_TABLE'):
+        raise RuntimeError('broken table')
+    return {'rows': 1, 'bytes': 0, 'started': 0, 'elapsed': 0.01}
+
+
+class ParallelImportSchedulerTest(SimpleTestCase):
+    def run_parallel(self):
+        out = io.StringIO()
+        command = migrate_full_db.Command(stdout=out, no_color=True)
+        command.batch_size = 10
+        with mock.patch.object(migrate_full_db, '_import_worker', fake_import_worker):
+            failed = command.run_parallel(
+                SimpleNamespace(path='dump.sql'), list(migrate_full_db.TABLES),
+                SimpleNamespace(path='dump.sql.checkpoint'), Throughput(), jobs=3,
+            )
+        lines = out.getvalue().splitlines()
+        started = {line.split(':')[0]: i for i, line in enumerate(lines) if line.endswith(': started')}
+        finished = {line.split(':')[0]: i for i, line in enumerate(lines) if ' rows in ' in line}
+        return failed, started, finished
+
+    def test_tables_start_after_their_dependencies(self):
+        failed, started, finished = self.run_parallel()
+
+        self.assertEqual(failed, [])
+        self.assertEqual(set(started), set(migrate_full_db.TABLES))
+        for table, dependencies in migrate_full_db.DEPENDENCIES.items():
+            for dependency in dependencies:
+                self.assertLess(finished[dependency], started[table], f'{table} started before {dependency}')
+
+    @mock.patch.dict(os.environ, {'FAIL_LEGACY_TABLE': 'regions'})
+    def test_failed_table_skips_only_dependents(self):
+        failed, started, _ = self.run_parallel()
+
+        self.assertEqual(set(failed), {'regions', 'districts', 'tb_hotels', 'tb_room_prices'})
+        self.assertNotIn('tb_hotels', started)
+        self.assertIn('tb_sights', started)
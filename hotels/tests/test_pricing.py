@@ -0,0 +1,56 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from hotels.models import Hotel, RoomType, RoomPrice
+from hotels.services import pricing
+
+
+class NightlyPricingTest(TestCase):
+    def setUp(self):
+        self.hotel = Hotel.objects.create(name="Pricing Hotel")
+        self.standard = RoomType.objects.create(en="Standard", hotel=self.hotel, price_ref=40)
+        self.suite = RoomType.objects.create(en="Suite", hotel=self.hotel, price_ref=150)
+        RoomPrice.objects.create(hotel=self.hotel, room_type=self.standard, dt=date(2026, 6, 1), usd=50, uzs=625000)
+        RoomPrice.objects.create(hotel=self.hotel, room_type=self.standard, dt=date(2026, 7, 2), usd=80, uzs=1000000)
+
+    def test_each_night_uses_price_in_effect(self):
+        quotes = pricing.quote(self.hotel.id, [self.standard.id], date(2026, 7, 1), date(2026, 7, 4))
+        nights = quotes[self.standard.id]['nights']
+
+        self.assertEqual([n['usd'] for n in nights], [Decimal('50'), Decimal('80'), Decimal('80')])
+        self.assertEqual(quotes[self.standard.id]['total_usd'], Decimal('210'))
+
+    def test_falls_back_to_price_ref(self):
+        quotes = pricing.quote(self.hotel.id, [self.suite.id], date(2026, 7, 1), date(2026, 7, 3))
+
+        self.assertEqual(quotes[self.suite.id]['total_usd'], Decimal('300'))
+        self.assertEqual({n['source'] for n in quotes[self.suite.id]['nights']}, {'price_ref'})
+
+    def test_price_write_invalidates_cached_quote(self):
+        pricing.quote(self.hotel.id, [self.suite.id], date(2026, 7, 1), date(2026, 7, 2))
+        RoomPrice.objects.create(hotel=self.hotel, room_type=self.suite, dt=date(2026, 7, 1), usd=120, uzs=0)
+
+        quotes = pricing.quote(self.hotel.id, [self.suite.id], date(2026, 7, 1), date(2026, 7, 2))
+        self.assertEqual(quotes[self.suite.id]['total_usd'], Decimal('120'))
+
+    def test_hotel_price_range_follows_room_prices(self):
+        self.hotel.refresh_from_db()
+        self.assertEqual((self.hotel.min_price_usd, self.hotel.max_price_usd), (Decimal('50'), Decimal('80')))
+
+        cheap = RoomPrice.objects.create(hotel=self.hotel, room_type=self.suite, dt=date(2026, 8, 1), usd=30, uzs=0)
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.min_price_usd, Decimal('30'))
+
+        cheap.delete()
+        self.hotel.refresh_from_db()
+        self.assertEqual(self.hotel.min_price_usd, Decimal('50'))
+
+        response = self.client.get('/api/hotels/', {'price_min': 40, 'price_max': 60})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.hotel.id, [h['id'] for h in response.json()['results']])
+
+        # Номера по 50 и 80 — ни один не стоит 60–70
+        response = self.client.get('/api/hotels/', {'price_min': 60, 'price_max': 70})
+        self.assertNotIn(self.hotel.id, [h['id'] for h in response.json()['results']])
@@ -0,0 +1,44 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from hotels.models import Hotel
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class HotelResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hotel = Hotel.objects.create(name="Cached Hotel", is_active=True)
+
+    def test_detail_is_cached_until_hotel_changes(self):
+        url = f'/api/hotels/{self.hotel.id}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        self.hotel.name = "Renamed Hotel"
+        self.hotel.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['name'], "Renamed Hotel")
+
+    def test_query_params_are_normalized(self):
+        self.client.get('/api/hotels/', {'stars': 3, 'region': 1})
+        response = self.client.get('/api/hotels/?region=1&stars=3')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_availability_search_bypasses_cache(self):
+        params = {'available_only': 1, 'check_in': '2026-07-01', 'check_out': '2026-07-03'}
+        self.client.get('/api/hotels/', params)
+        self.assertEqual(self.client.get('/api/hotels/', params)['X-Cache'], 'BYPASS')
+
+    def test_cached_location_search_is_still_logged(self):
+        with mock.patch('silkroad_backend.analytics.AnalyticsService.log_search') as log_search:
+            self.client.get('/api/hotels/', {'location': 'Cached'})
+            response = self.client.get('/api/hotels/', {'location': 'Cached'})
+
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(log_search.call_count, 2)
+        self.assertEqual(log_search.call_args.args[1]['location'], 'Cached')
+        self.assertEqual(log_search.call_args.args[1]['results_count'], response.json()['count'])
@@ -11,6 +11,7 @@ urlpatterns = [
     path('', views.HotelListAPIView.as_view(), name='api_hotel_list'),
     path('<int:pk>/', views.HotelDetailAPIView.as_view(), name='api_hotel_detail'),
     path('<int:hotel_id>/search-rooms/', views.HotelRoomSearchAPIView.as_view(), name='api_hotel_search_rooms'),
+    path('availability/', views.HotelAvailabilityAPIView.as_view(), name='api_hotel_availability'),
     
     # Hotel Comments & Reviews
     path('<int:hotel_id>/comments/', views_api.HotelCommentListCreateView.as_view(), name='api_hotel_comments'),
@@ -29,6 +30,7 @@ urlpatterns = [
     
     # PDF Downloads
     path('tickets/<int:pk>/download/', views_pdf.TicketPDFDownloadView.as_view(), name='api_ticket_download'),
+    path('tickets/qr/', views_pdf.TicketQRBatchView.as_view(), name='api_ticket_qr_batch'),
     path('bookings/<int:pk>/download/', views_pdf.BookingPDFDownloadView.as_view(), name='api_booking_download'),
     path('bookings/<int:pk>/preview/', views_pdf.BookingPDFPreviewView.as_view(), name='api_booking_preview'),
 
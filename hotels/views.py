@@ -6,6 +6,7 @@ from django.http import JsonResponse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
+from django.db import transaction
 from django.db.models import Q
 import re
 from django.utils.decorators import method_decorator
@@ -18,11 +19,14 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from silkroad_backend.permissions import IsObjectOwner
+from silkroad_backend import search
+from silkroad_backend.response_cache import cached_response
 
 from locations.models import Region
 from hotels.models import Category, Sight, SightFacility, Hotel, Room, RoomType, RoomPrice
 from .forms import SightForm
 from .serializers import SightSerializer, HotelSerializer
+from .services import inventory, pricing
 from bookings.models import Booking
 from bookings.serializers import BookingSerializer
 
@@ -164,7 +168,7 @@ class HotelListView(ListView):
     paginate_by = 9
 
     def get_queryset(self):
-        qs = Hotel.objects.filter(is_active=True).select_related('region', 'vendor').prefetch_related('rooms', 'rooms__room_type')
+        qs = Hotel.objects.filter(is_active=True).select_related('region', 'vendor').prefetch_related('rooms', 'rooms__room_type').with_images()
         
         region_id = self.request.GET.get('region')
         name_query = self.request.GET.get('name')
@@ -224,14 +228,13 @@ class HotelDetailView(DetailView):
 
 
 
-@method_decorator(cache_page(60 * 15), name='dispatch')
 class HotelListAPIView(generics.ListAPIView):
     """
     API List for Hotels with search and filtering.
     """
     permission_classes = [AllowAny]
     authentication_classes = []
-    queryset = Hotel.objects.filter(is_active=True).select_related('region', 'vendor').prefetch_related('rooms', 'rooms__room_type')
+    queryset = Hotel.objects.filter(is_active=True).select_related('region', 'vendor').prefetch_related('rooms', 'rooms__room_type').with_images()
     serializer_class = HotelSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
@@ -242,6 +245,18 @@ class HotelListAPIView(generics.ListAPIView):
     }
     search_fields = ['name', 'address', 'description']
     ordering_fields = ['stars', 'rating', 'created_at']
+    # Наличие меняется бронированиями, которые не сбрасывают теги кэша ответов
+    AVAILABILITY_PARAMS = ('available_only', 'check_in', 'check_out')
+
+    def get(self, request, *args, **kwargs):
+        response = self.cached_get(request, *args, **kwargs)
+        # Logged outside the response cache so HIT/STALE searches are counted too
+        self.log_search(request, response)
+        return response
+
+    @cached_response(['hotels', 'regions', 'media'], bypass_params=AVAILABILITY_PARAMS)
+    def cached_get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -250,21 +265,8 @@ class HotelListAPIView(generics.ListAPIView):
         location = self.request.query_params.get('location')
         if location and location.strip():
             term = location.strip()
-            qs = qs.filter(
-                Q(name__icontains=term) |
-                Q(address__icontains=term) |
-                Q(geolocation__icontains=term) |
-                Q(region__name__icontains=term) |
-                Q(region__name_ru__icontains=term) |
-                Q(region__name_uz__icontains=term)
-            ).distinct()
-            
-            # Phase 9: Analytics logging
-            from silkroad_backend.analytics import AnalyticsService
-            AnalyticsService.log_search(
-                self.request.user.id if self.request.user.is_authenticated else 0,
-                {'location': term, 'results_count': qs.count()}
-            )
+            # Full-text (EN/RU/UZ, prefix) + trigram (typos), ranked
+            qs = search.search(qs, term)
 
         # 2. Guest Capacity Filter
         adults = self.request.query_params.get('adults')
@@ -272,12 +274,14 @@ class HotelListAPIView(generics.ListAPIView):
         if adults:
             try:
                 total_guests = int(adults) + int(children or 0)
-                # Filter hotels that have at least one room accommodating this many people
-                qs = qs.filter(rooms__room_type__capacity__gte=total_guests).distinct()
+                rooms_requested = int(self.request.query_params.get('rooms') or 1)
+                # Hotels with a room type that fits the group split across the requested rooms
+                per_room = inventory.guests_per_room(total_guests, rooms_requested)
+                qs = qs.filter(rooms__room_type__capacity__gte=per_room).distinct()
             except ValueError:
                 pass
 
-        # 3. Price Filter (Inclusive of RoomPrice or deposit fields)
+        # 3. Price Filter (RoomPrice + deposit range, denormalized on Hotel)
         min_price = self.request.query_params.get('price_min')
         max_price = self.request.query_params.get('price_max')
         
@@ -286,12 +290,8 @@ class HotelListAPIView(generics.ListAPIView):
                 p_min = float(min_price) if min_price else 0
                 p_max = float(max_price) if max_price else 10000000 
                 
-                # Filter hotels that have ANY room price or deposit in range
-                qs = qs.filter(
-                    Q(room_prices__usd__range=(p_min, p_max)) |
-                    Q(deposit__range=(p_min, p_max)) |
-                    Q(deposit_turizm__range=(p_min, p_max))
-                ).distinct()
+                # "From" price (cheapest room or deposit, denormalized) within budget (no join)
+                qs = qs.filter(min_price_usd__range=(p_min, p_max))
             except ValueError:
                 pass
 
@@ -315,10 +315,47 @@ class HotelListAPIView(generics.ListAPIView):
             for amenity in amenity_list:
                 qs = qs.filter(amenities_services__icontains=amenity)
 
+        # 6. Availability Filter (available_only=1 with check_in/check_out)
+        if self.request.query_params.get('available_only') in ('1', 'true', 'True'):
+            qs = self.filter_available(qs)
+
         return qs
 
+    def log_search(self, request, response):
+        # Phase 9: Analytics logging (non-blocking, reuses the paginator's COUNT from the payload)
+        term = (request.query_params.get('location') or '').strip()
+        if not term or response.status_code != 200:
+            return
+        from silkroad_backend.analytics import AnalyticsService
+        data = response.data
+        AnalyticsService.log_search(
+            request.user.id if request.user.is_authenticated else 0,
+            {'location': term, 'results_count': data['count'] if isinstance(data, dict) else len(data)}
+        )
+
+    def filter_available(self, qs):
+        from datetime import datetime
+
+        params = self.request.query_params
+        try:
+            check_in = datetime.strptime(params.get('check_in', ''), '%Y-%m-%d').date()
+            check_out = datetime.strptime(params.get('check_out', ''), '%Y-%m-%d').date()
+            guests = int(params.get('adults') or 0) + int(params.get('children') or 0)
+            rooms_requested = int(params.get('rooms') or 1)
+        except (ValueError, TypeError):
+            return qs
+
+        availability = inventory.availability_for_hotels(
+            qs.values_list('id', flat=True), check_in, check_out,
+            guests=guests or None,
+            rooms_requested=rooms_requested,
+        )
+        return qs.filter(id__in=list(availability))
+
 class HotelDetailAPIView(APIView):
     permission_classes = [AllowAny]
+
+    @cached_response(['hotel:{pk}', 'regions', 'media'])
     def get(self, request, pk):
         hotel = get_object_or_404(Hotel, pk=pk, is_active=True)
         serializer = HotelSerializer(hotel, context={'request': request})
@@ -382,80 +419,43 @@ class HotelRoomSearchAPIView(APIView):
         # Calculate nights
         nights = (check_out_date - check_in_date).days
         
-        # Get all active room types for this hotel
-        room_types = RoomType.objects.filter(
-            rooms__hotel=hotel,
-            rooms__active=True
-        ).distinct()
-        
-        # Get booked rooms for the date range (overlapping bookings)
-        # Overlap logic: (StartA <= EndB) AND (EndA >= StartB)
-        booked_rooms = Booking.objects.filter(
-            hotel=hotel,
-            status__in=['CONFIRMED', 'NEW']
-        ).filter(
-            Q(check_in__lte=check_out_date) & Q(check_out__gte=check_in_date)
-        ).values_list('selected_rooms_json', flat=True)
-        
-        # Parse booked room counts by type
-        booked_by_type = {}
-        for rooms_json in booked_rooms:
-            try:
-                if isinstance(rooms_json, str):
-                    import json
-                    rooms_data = json.loads(rooms_json)
-                else:
-                    rooms_data = rooms_json
-                
-                if isinstance(rooms_data, list):
-                    for room in rooms_data:
-                        room_type_id = room.get('roomTypeId') or room.get('room_id') or room.get('id_room_type')
-                        count = int(room.get('quantity', room.get('count', 1)))
-                        
-                        if room_type_id:
-                            booked_by_type[room_type_id] = booked_by_type.get(room_type_id, 0) + count
-            except:
-                continue
-        
+        # Active rooms of the hotel in one query (totals, sample room, room types)
+        rooms = Room.objects.filter(hotel=hotel, active=True).select_related('room_type').order_by('id')
+        total_by_type = {}
+        sample_by_type = {}
+        for room in rooms:
+            total_by_type[room.room_type_id] = total_by_type.get(room.room_type_id, 0) + 1
+            sample_by_type.setdefault(room.room_type_id, room)
+
+        # Peak booked count per room type over the stay (inventory ledger)
+        booked_by_type = inventory.booked_by_type(hotel.id, check_in_date, check_out_date)
+
+        # Per-night prices for every room type of the stay (pricing engine)
+        quotes = pricing.quote(hotel.id, list(total_by_type), check_in_date, check_out_date)
+
+        # Get hotel images (use hotel images for room preview)
+        images = hotel.get_images_list()
+        if not images:
+            images = ['/media/images/default-room.jpg']
+
         # Build available rooms response
         rooms_data = []
         
-        for room_type in room_types:
-            # Count total rooms of this type
-            total_rooms = Room.objects.filter(
-                hotel=hotel,
-                room_type=room_type,
-                active=True
-            ).count()
+        for room_type_id, sample_room in sample_by_type.items():
+            room_type = sample_room.room_type
+            total_rooms = total_by_type[room_type_id]
             
             # Subtract booked rooms
-            booked_count = booked_by_type.get(room_type.id, 0)
+            booked_count = booked_by_type.get(room_type_id, 0)
             available_count = max(0, total_rooms - booked_count)
             
             # Skip if no rooms available
             if available_count == 0:
                 continue
             
-            # Get sample room for features
-            sample_room = Room.objects.filter(
-                hotel=hotel,
-                room_type=room_type,
-                active=True
-            ).first()
-            
-            # Get latest price for this room type
-            price_obj = RoomPrice.objects.filter(
-                hotel=hotel,
-                room_type=room_type
-            ).order_by('-dt').first()
-            
-            price_usd = float(price_obj.usd) if price_obj else 0
-            price_uzs = float(price_obj.uzs) if price_obj else 0
-            
-            # Get hotel images (use hotel images for room preview)
-            images = hotel.get_images_list()
-            if not images:
-                images = ['/media/images/default-room.jpg']
+            price = quotes[room_type_id]
+            total_usd = float(price['total_usd'])
+            total_uzs = float(price['total_uzs'])
             
             # Calculate if this room type can fulfill the request
             can_fulfill = available_count >= rooms_requested
@@ -474,10 +474,14 @@ class HotelRoomSearchAPIView(APIView):
                     'tvset': sample_room.tvset if sample_room else False,
                     'freezer': sample_room.freezer if sample_room else False,
                 },
-                'price_per_night_usd': price_usd,
-                'price_per_night_uzs': price_uzs,
-                'total_price_usd': price_usd * nights,
-                'total_price_uzs': price_uzs * nights,
+                'price_per_night_usd': round(total_usd / nights, 2),
+                'price_per_night_uzs': round(total_uzs / nights, 2),
+                'total_price_usd': total_usd,
+                'total_price_uzs': total_uzs,
+                'nightly_prices': [
+                    {'date': n['date'], 'usd': float(n['usd']), 'uzs': float(n['uzs'])}
+                    for n in price['nights']
+                ],
                 'check_in': check_in,
                 'check_out': check_out,
                 'nights': nights,
@@ -509,6 +513,116 @@ class HotelRoomSearchAPIView(APIView):
         })
 
 
+class HotelAvailabilityAPIView(APIView):
+    """
+    Bulk availability search for many hotels at once.
+    POST /api/hotels/availability/
+    {
+        "region": 3,                # or "hotel_ids": [1, 2, 3]
+        "check_in": "2026-07-01",
+        "check_out": "2026-07-04",
+        "adults": 2, "children": 0, "rooms": 1
+    }
+
+    Returns the cheapest available room type per hotel using a constant
+    number of queries (rooms, inventory ledger, prices).
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    MAX_HOTELS = 200
+
+    def get(self, request):
+        return self.search(request.query_params)
+
+    def post(self, request):
+        return self.search(request.data)
+
+    def search(self, params):
+        from datetime import datetime
+
+        check_in = params.get('check_in')
+        check_out = params.get('check_out')
+        if not check_in or not check_out:
+            return Response(
+                {'error': 'check_in and check_out dates are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
+            check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
+            adults = int(params.get('adults', 1))
+            children = int(params.get('children', 0) or 0)
+            rooms_requested = int(params.get('rooms', 1))
+        except (ValueError, TypeError) as e:
+            return Response(
+                {'error': f'Invalid date format or parameters: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if check_out_date <= check_in_date:
+            return Response(
+                {'error': 'check_out must be after check_in'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if adults < 1 or rooms_requested < 1:
+            return Response(
+                {'error': 'At least 1 adult and 1 room required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        hotels = Hotel.objects.filter(is_active=True)
+        hotel_ids = params.get('hotel_ids')
+        if hotel_ids:
+            if isinstance(hotel_ids, str):
+                hotel_ids = hotel_ids.split(',')
+            try:
+                hotel_ids = [int(h) for h in hotel_ids if str(h).strip()]
+            except (ValueError, TypeError):
+                return Response({'error': 'hotel_ids must be a list of integers'}, status=status.HTTP_400_BAD_REQUEST)
+            hotels = hotels.filter(id__in=hotel_ids)
+        elif params.get('region'):
+            try:
+                region_id = int(params.get('region'))
+            except (ValueError, TypeError):
+                return Response({'error': 'region must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            hotels = hotels.filter(region_id=region_id)
+        else:
+            return Response(
+                {'error': 'region or hotel_ids is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = list(hotels.values_list('id', flat=True)[:self.MAX_HOTELS])
+        nights = (check_out_date - check_in_date).days
+        availability = inventory.availability_for_hotels(
+            ids, check_in_date, check_out_date,
+            guests=adults + children,
+            rooms_requested=rooms_requested,
+        )
+
+        results = []
+        for hotel_id in ids:
+            best = availability.get(hotel_id)
+            if not best:
+                continue
+            results.append({'hotel_id': hotel_id, **best})
+
+        return Response({
+            'success': True,
+            'search_params': {
+                'check_in': check_in,
+                'check_out': check_out,
+                'nights': nights,
+                'adults': adults,
+                'children': children,
+                'rooms_requested': rooms_requested,
+            },
+            'hotels': results,
+            'total_hotels': len(results),
+        })
+
+
 
 class SightListAPIView(APIView):
     """
@@ -516,6 +630,7 @@ class SightListAPIView(APIView):
     """
     permission_classes = [AllowAny]
 
+    @cached_response(['sights', 'regions', 'media'])
     def get(self, request):
         qs = Sight.objects.filter(status='active').select_related(
             'vendor', 'category', 'vendor__region'
@@ -530,11 +645,7 @@ class SightListAPIView(APIView):
         location = request.query_params.get('location')
         if location and location.strip():
             term = location.strip()
-            qs = qs.filter(
-                Q(name__icontains=term) |
-                Q(address__icontains=term) |
-                Q(vendor__region__name__icontains=term)
-            )
+            qs = search.search(qs, term)
 
         # Guests Filter (Capacity)
         guests = request.query_params.get('guests')
@@ -569,6 +680,7 @@ class SightDetailAPIView(APIView):
     """
     permission_classes = [AllowAny]
 
+    @cached_response(['sight:{pk}', 'regions'])
     def get(self, request, pk):
         sight = get_object_or_404(Sight, pk=pk, status='active')
         serializer = SightSerializer(sight, context={'request': request})
@@ -827,6 +939,12 @@ class BookingViewSet(viewsets.ModelViewSet):
             
             # Logic: Iterate rooms, find price, sum up
             # Legacy: loop rooms, find tb_room_prices
+            # All requested types are priced per night in one pass (pricing engine)
+            quotes = pricing.quote(
+                int(hotel_id),
+                [int(item.get('room_id')) for item in selected_rooms if item.get('room_id')],
+                check_in, check_out,
+            )
             for room_item in selected_rooms:
                 room_id = room_item.get('room_id') # Legacy used roomTypeId sometimes, here we might map room_id to room
                 # Adjust key based on frontend. Frontend sends: [{ room_id: 1, count: 1 }]
@@ -840,16 +958,11 @@ class BookingViewSet(viewsets.ModelViewSet):
                 type_id = room_item.get('room_id') 
                 count = int(room_item.get('count', 1))
                 
-                # Find Price
-                # Legacy: tb_room_prices where id_hotel & id_type order by dt desc
-                price_obj = RoomPrice.objects.filter(
-                    hotel_id=hotel_id, 
-                    room_type_id=type_id
-                ).order_by('-dt').first()
-                
-                price_per_night = price_obj.usd if price_obj else 0 # Default 0 if not found
+                # Sum of the nightly prices covering the stay (falls back to RoomType.price_ref)
+                quote = quotes.get(int(type_id)) if type_id else None
+                stay_price = quote['total_usd'] if quote else 0 # Default 0 if not found
                 
-                total_price += (float(price_per_night) * nights * count)
+                total_price += (float(stay_price) * count)
 
             # Override total_price with calculated one (Security)
             # data['total_price'] = total_price 
@@ -883,7 +996,9 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking.confirmed_by = request.user
         booking.confirmed_at = timezone.now()
         
-        booking.save()
+        # Booking row and inventory ledger change together
+        with transaction.atomic():
+            booking.save()
         
         # Phase 9: Analytics logging
         from silkroad_backend.analytics import AnalyticsService
@@ -895,9 +1010,9 @@ class BookingViewSet(viewsets.ModelViewSet):
         
         # Notify User
         if booking.user:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=booking.user,
+            from notifications import dispatch
+            dispatch.notify(
+                booking.user_id,
                 title="Booking Confirmed",
                 message=f"Your booking at {booking.hotel.name} has been confirmed!",
                 type="success",
@@ -925,13 +1040,15 @@ class BookingViewSet(viewsets.ModelViewSet):
         booking.confirmed_by = request.user # Acted by
         booking.confirmed_at = timezone.now()
         
-        booking.save()
+        # Releases the nights in the inventory ledger
+        with transaction.atomic():
+            booking.save()
         
         # Notify User
         if booking.user:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=booking.user,
+            from notifications import dispatch
+            dispatch.notify(
+                booking.user_id,
                 title="Booking Declined",
                 message=f"Your booking at {booking.hotel.name} was declined. Reason: {reason}",
                 type="danger",
@@ -941,13 +1058,14 @@ class BookingViewSet(viewsets.ModelViewSet):
         return Response({'status': 'cancelled'})
 
     def perform_create(self, serializer):
-        booking = serializer.save(user=self.request.user)
+        with transaction.atomic():
+            booking = serializer.save(user=self.request.user)
         
         # Notify Vendor
         if booking.hotel.vendor and booking.hotel.vendor.user:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=booking.hotel.vendor.user,
+            from notifications import dispatch
+            dispatch.notify(
+                booking.hotel.vendor.user_id,
                 title="New Booking Request",
                 message=f"New booking #{booking.id} for {booking.hotel.name} from {booking.guest_name}",
                 type="info",
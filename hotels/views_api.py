@@ -3,8 +3,6 @@ from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import transaction
-from django.utils import timezone
 from django.db.models import Avg, Count, Q
 from captcha.models import CaptchaStore
 from captcha.helpers import captcha_image_url
@@ -13,109 +11,9 @@ from .serializers import HotelCommentSerializer, HotelSerializer
 from bookings.models import Booking
 from bookings.serializers import BookingSerializer
 from analytics.recommendations import get_trending_hotels
-import base64
-import hashlib
-import json
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 
-class TicketPurchaseView(APIView):
-    def post(self, request):
-        serializer = TicketCreateSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        data = serializer.validated_data
-        sight_id = data['sight_id']
-        guests = data['guests']
-        user = request.user
-
-        if not user.is_authenticated:
-            return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
-
-        try:
-            sight = Sight.objects.get(id=sight_id)
-        except Sight.DoesNotExist:
-            return Response({"error": "Sight not found"}, status=status.HTTP_404_NOT_FOUND)
-
-        tour_date = data.get('tour_date', timezone.now().date())
-        is_weekend = tour_date.weekday() >= 5 # 5=Sat, 6=Sun
-
-        total_amount = 0
-        valid_guests = []
-
-        # Calculate Price
-        for guest in guests:
-            citizen_id = guest.get('citizen')
-            # 173 = Local (Uzbekistan)
-            is_local = citizen_id == 173
-            
-            # Select correct price attribute
-            if is_local:
-                price = sight.is_weekend_local if is_weekend else sight.is_local
-            else:
-                price = sight.is_weekend_foreg if is_weekend else sight.is_foreg
-            
-            # Fallback if weekend price is 0 but weekday isn't
-            if is_weekend and price == 0:
-                price = sight.is_local if is_local else sight.is_foreg
-
-            valid_guests.append({
-                'name': guest['name'],
-                'passport': guest['passport'],
-                'citizen': citizen_id,
-                'amount': float(price),
-                'is_weekend': is_weekend
-            })
-            total_amount += price
-
-        if not valid_guests:
-            return Response({"error": "No valid guests"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Create Transaction
-        try:
-            with transaction.atomic():
-                # Create Ticket (Order)
-                ticket = Ticket.objects.create(
-                    sight=sight,
-                    vendor=sight.vendor,
-                    created_by=user,
-                    total_qty=len(valid_guests),
-                    total_amount=total_amount,
-                    is_paid=True, # Assuming immediate payment/mock
-                    is_valid=True
-                )
-
-                # Create details
-                for guest in valid_guests:
-                    # Hash Generation (Mimic Laravel: json(guest) + ticketId + salt)
-                    salt = 'ittopmaskuchukyurmassourcesalttuz' 
-                    hash_source = json.dumps(guest, sort_keys=True) + str(ticket.id) + salt
-                    hash_val = hashlib.md5(hash_source.encode()).hexdigest()
-                    # Base64 Encode URL (Localhost for now)
-                    # config('app.url') -> using relative for now or hardcoded 'http://localhost:8000'
-                    ticket_hash = base64.b64encode(f"http://localhost:8000/check-ticket/{hash_val}".encode()).decode()
-
-                    TicketDetail.objects.create(
-                        ticket=ticket,
-                        guest_name=guest['name'],
-                        guest_info=guest,
-                        amount=guest['amount'],
-                        hash=ticket_hash,
-                        # valid_until logic omitted for brevity (e.g. +1 month)
-                        valid_until=timezone.now() + timezone.timedelta(days=30)
-                    )
-
-            return Response({
-                "ticket_id": ticket.id,
-                "total_amount": total_amount,
-                "message": "Ticket successfully created"
-            }, status=status.HTTP_201_CREATED)
-
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-
 class CategoryListAPIView(generics.ListAPIView):
     permission_classes = [AllowAny]
     def get(self, request):
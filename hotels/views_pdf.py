@@ -2,8 +2,9 @@
 PDF Download Views for Bookings and Tickets.
 """
 
-from django.http import FileResponse, HttpResponse, Http404
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, Http404
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -11,7 +12,31 @@ from rest_framework import status
 
 from bookings.models import Booking
 from vendors.models import TicketSale
-from .pdf_generator import BookingPDFGenerator, TicketPDFGenerator
+from vendors.services import qr
+from . import documents
+
+
+def document_response(request, kind, obj, filename, as_attachment=True):
+    """
+    Готовый PDF из хранилища (hotels.documents) с ETag; If-None-Match -> 304 без чтения файла.
+    """
+    entry = documents.get(kind, obj)
+    headers = {'ETag': entry['etag'], 'Cache-Control': 'private, no-cache'}
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if entry['etag'] in etags or '*' in etags:
+        response = HttpResponseNotModified()
+    else:
+        entry, pdf_file = documents.open_file(kind, obj, entry)
+        headers['ETag'] = entry['etag']
+        response = FileResponse(
+            pdf_file,
+            content_type='application/pdf',
+            as_attachment=as_attachment,
+            filename=filename
+        )
+    for name, value in headers.items():
+        response[name] = value
+    return response
 
 
 class BookingPDFDownloadView(APIView):
@@ -30,19 +55,8 @@ class BookingPDFDownloadView(APIView):
         )
         
         try:
-            # Generate PDF
-            generator = BookingPDFGenerator(booking)
-            pdf_buffer = generator.generate()
-            
-            # Return as file download
-            response = FileResponse(
-                pdf_buffer,
-                content_type='application/pdf',
-                as_attachment=True,
-                filename=f'booking-{booking.id}.pdf'
-            )
-            
-            return response
+            # Pre-rendered PDF (rendered once per booking version)
+            return document_response(request, 'booking', booking, f'booking-{booking.id}.pdf')
             
         except Exception as e:
             return Response(
@@ -74,19 +88,8 @@ class TicketPDFDownloadView(APIView):
             )
         
         try:
-            # Generate PDF
-            generator = TicketPDFGenerator(ticket)
-            pdf_buffer = generator.generate()
-            
-            # Return as file download
-            response = FileResponse(
-                pdf_buffer,
-                content_type='application/pdf',
-                as_attachment=True,
-                filename=f'ticket-{ticket.id}.pdf'
-            )
-            
-            return response
+            # Pre-rendered PDF (rendered once per ticket version)
+            return document_response(request, 'ticket', ticket, f'ticket-{ticket.id}.pdf')
             
         except Exception as e:
             return Response(
@@ -95,6 +98,38 @@ class TicketPDFDownloadView(APIView):
             )
 
 
+class TicketQRBatchView(APIView):
+    """
+    QR payloads for a whole order at once (the client renders the codes itself).
+    GET /api/hotels/tickets/qr/?ids=1,2,3  — without ids: all paid tickets of the user.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_TICKETS = 200
+
+    def get(self, request):
+        tickets = TicketSale.objects.filter(user=request.user, status='PAID').order_by('id')
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                ids = [int(value) for value in ids.split(',') if value.strip()]
+            except ValueError:
+                return Response({"error": "ids must be a comma-separated list of ticket ids"},
+                                status=status.HTTP_400_BAD_REQUEST)
+            tickets = tickets.filter(id__in=ids)
+        tickets = qr.ensure_hashes(list(tickets[:self.MAX_TICKETS]))
+
+        return Response([
+            {
+                'id': ticket.id,
+                'hash': ticket.qr_code,
+                'payload': qr.payload(ticket),
+                'is_valid': ticket.is_valid,
+                'total_qty': ticket.total_qty,
+            }
+            for ticket in tickets
+        ])
+
+
 class BookingPDFPreviewView(APIView):
     """
     Preview booking PDF in browser (not downloaded).
@@ -106,18 +141,8 @@ class BookingPDFPreviewView(APIView):
         booking = get_object_or_404(Booking, pk=pk, user=request.user)
         
         try:
-            generator = BookingPDFGenerator(booking)
-            pdf_buffer = generator.generate()
-            
             # Return inline (browser displays)
-            response = FileResponse(
-                pdf_buffer,
-                content_type='application/pdf',
-                as_attachment=False,  # Show in browser
-                filename=f'booking-{booking.id}.pdf'
-            )
-            
-            return response
+            return document_response(request, 'booking', booking, f'booking-{booking.id}.pdf', as_attachment=False)
             
         except Exception as e:
             return Response(
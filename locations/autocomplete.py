@@ -0,0 +1,177 @@
+"""
+In-memory префиксный индекс регионов и районов для автодополнения.
+
+Названия (EN/RU/UZ) приводятся к единой латинской форме: кириллица
+(русская и узбекская) транслитерируется, апострофы узбекской латиницы
+убираются, q/x/kh сводятся к k/h. Поэтому "самар", "Samarq" и "samark"
+находят один и тот же Samarkand / Самарканд / Samarqand.
+
+Индекс строится лениво в каждом воркере. При сохранении Region/District
+версия в кэше (Redis) увеличивается, и воркеры перестраивают индекс при
+следующей проверке версии (не чаще раза в VERSION_CHECK_INTERVAL секунд).
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'locations:autocomplete:version'
+VERSION_CHECK_INTERVAL = 5
+
+CYRILLIC = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu',
+    'я': 'ya',
+    # Uzbek Cyrillic
+    'ў': 'o', 'қ': 'k', 'ғ': 'g', 'ҳ': 'h',
+}
+APOSTROPHES = "'`‘’ʻʼ"
+LATIN_FOLD = (('kh', 'h'), ('q', 'k'), ('x', 'h'))
+
+
+def fold(text):
+    """
+    Нормализует строку к ключу поиска: нижний регистр, латиница, без апострофов.
+    """
+    out = []
+    for ch in (text or '').lower():
+        if ch in APOSTROPHES:
+            continue
+        out.append(CYRILLIC.get(ch, ch))
+    folded = ''.join(out)
+    for src, dst in LATIN_FOLD:
+        folded = folded.replace(src, dst)
+    return folded
+
+
+def tokens(text):
+    words = []
+    current = []
+    for ch in fold(text):
+        if ch.isalnum():
+            current.append(ch)
+        elif current:
+            words.append(''.join(current))
+            current = []
+    if current:
+        words.append(''.join(current))
+    return words
+
+
+class _Node:
+    __slots__ = ('children', 'keys')
+
+    def __init__(self):
+        self.children = {}
+        self.keys = set()
+
+
+class LocationIndex:
+    """
+    Trie по словам названий. Каждый узел хранит ключи всех записей,
+    у которых есть слово с этим префиксом, поэтому поиск — O(длина запроса).
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.entries = {}
+
+    def add(self, key, entry, names):
+        self.entries[key] = entry
+        for name in names:
+            for word in tokens(name):
+                node = self.root
+                for ch in word:
+                    node = node.children.setdefault(ch, _Node())
+                    node.keys.add(key)
+
+    def _prefix(self, word):
+        node = self.root
+        for ch in word:
+            node = node.children.get(ch)
+            if node is None:
+                return set()
+        return node.keys
+
+    def search(self, query, kind=None, limit=10):
+        words = tokens(query)
+        if not words:
+            return []
+        matched = None
+        for word in words:
+            keys = self._prefix(word)
+            matched = set(keys) if matched is None else matched & keys
+            if not matched:
+                return []
+        results = [self.entries[k] for k in matched if kind is None or k[0] == kind]
+        results.sort(key=lambda e: e['name'])
+        return results[:limit]
+
+    def top(self, kind, limit=10):
+        results = sorted((e for k, e in self.entries.items() if k[0] == kind), key=lambda e: e['name'])
+        return results[:limit]
+
+    @classmethod
+    def build(cls):
+        from .models import Region, District
+
+        index = cls()
+        regions = {}
+        for r in Region.objects.filter(is_active=True).values('id', 'name', 'name_ru', 'name_uz'):
+            regions[r['id']] = r
+            index.add(('region', r['id']), {**r, 'region': None}, [r['name'], r['name_ru'], r['name_uz']])
+        for d in District.objects.filter(is_active=True).values('id', 'name', 'name_ru', 'name_uz', 'region_id'):
+            region = regions.get(d.pop('region_id'))
+            index.add(('district', d['id']), {**d, 'region': region}, [d['name'], d['name_ru'], d['name_uz']])
+        return index
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None, 'checked_at': 0.0}
+
+
+def _current_version():
+    try:
+        return cache.get(VERSION_KEY, 0)
+    except Exception as e:
+        logger.warning(f"Autocomplete version check failed: {e}")
+        return _state['version']
+
+
+def get_index():
+    """
+    Индекс текущего воркера; перестраивается, если версия в кэше изменилась.
+    """
+    now = time.monotonic()
+    if _state['index'] is not None and now - _state['checked_at'] < VERSION_CHECK_INTERVAL:
+        return _state['index']
+
+    version = _current_version()
+    with _lock:
+        if _state['index'] is None or version != _state['version']:
+            started = time.monotonic()
+            _state['index'] = LocationIndex.build()
+            _state['version'] = version
+            logger.info(
+                f"Location autocomplete index built: {len(_state['index'].entries)} entries "
+                f"in {(time.monotonic() - started) * 1000:.1f} ms (version {version})"
+            )
+        _state['checked_at'] = now
+    return _state['index']
+
+
+def invalidate():
+    """
+    Сбрасывает индекс во всех воркерах (локально сразу, остальным — через версию в кэше).
+    """
+    _state['index'] = None
+    try:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        cache.incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Failed to bump autocomplete version: {e}")
@@ -0,0 +1,91 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:25
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+# Заполняет search_vector/search_text одним UPDATE на таблицу. SQL зафиксирован здесь, чтобы миграция
+# не зависела от silkroad_backend.search; документ тот же (A — названия, B — адрес/регион, C — описания),
+# `manage.py reindex_search` пересобирает колонки текущим кодом.
+BUILD_SEARCH_SQL = """
+UPDATE {table} AS t SET
+    search_vector = setweight(to_tsvector('simple', d.a), 'A')
+                 || setweight(to_tsvector('simple', d.b), 'B')
+                 || setweight(to_tsvector('simple', d.c), 'C'),
+    search_text = btrim(regexp_replace(lower(concat_ws(' ', d.a, d.b)), '[^[:alnum:]_]+', ' ', 'g'))
+FROM (
+    SELECT o.id,
+           concat_ws(' ', {a}) AS a,
+           concat_ws(' ', {b}) AS b,
+           concat_ws(' ', {c}) AS c
+    FROM {table} AS o {joins}
+) AS d
+WHERE t.id = d.id
+"""
+
+NAMES = "{0}.name, {0}.name_ru, {0}.name_uz"
+
+
+def build_search_index(apps, schema_editor):
+    table = lambda model: schema_editor.quote_name(apps.get_model('locations', model)._meta.db_table)
+
+    schema_editor.execute(BUILD_SEARCH_SQL.format(
+        table=table('Region'), a=NAMES.format('o'), b="''", c="''", joins='',
+    ))
+    schema_editor.execute(BUILD_SEARCH_SQL.format(
+        table=table('District'),
+        a=NAMES.format('o'),
+        b=NAMES.format('r'),
+        c="''",
+        joins=f"LEFT JOIN {table('Region')} AS r ON r.id = o.region_id",
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0004_delete_sight'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='district',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='district',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='district',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='districts_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='district',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='districts_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='regions_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='regions_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
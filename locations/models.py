@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -39,11 +41,19 @@ class Region(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('создано'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('обновлено'))
 
+    # Full-text search (silkroad_backend.search)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
+
     class Meta:
         db_table = 'regions'
         verbose_name = _('регион')
         verbose_name_plural = _('регионы')
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='regions_search_vector_gin'),
+            GinIndex(fields=['search_text'], name='regions_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -66,11 +76,19 @@ class District(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('создано'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('обновлено'))
 
+    # Full-text search (silkroad_backend.search)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    search_text = models.TextField(blank=True, default='', editable=False)
+
     class Meta:
         db_table = 'districts'
         verbose_name = _('район')
         verbose_name_plural = _('районы')
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='districts_search_vector_gin'),
+            GinIndex(fields=['search_text'], name='districts_search_text_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
     def __str__(self) -> str:
         return self.name
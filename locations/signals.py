@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from locations import autocomplete
+from locations.models import Region, District
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=District)
+@receiver(post_delete, sender=District)
+def autocomplete_invalidate(sender, raw=False, **kwargs):
+    """
+    Перестроить индекс автодополнения во всех воркерах после коммита.
+    """
+    if raw:
+        return
+    transaction.on_commit(autocomplete.invalidate)
@@ -1,3 +1,51 @@
 from django.test import TestCase
 
-# Create your tests here.
+from . import autocomplete
+from .models import Country, Region, District
+
+
+class LocationSearchTest(TestCase):
+    def setUp(self):
+        country = Country.objects.create(name="Uzbekistan", iso_code="UZ")
+        self.region = Region.objects.create(
+            name="Samarkand", name_ru="Самарканд", name_uz="Samarqand", country=country
+        )
+        District.objects.create(name="Urgut", name_ru="Ургут", region=self.region)
+        # on_commit hooks don't fire inside TestCase
+        autocomplete.invalidate()
+
+    def test_prefix_search_in_any_language(self):
+        for query in ('sama', 'самар', 'samarq'):
+            response = self.client.get('/api/locations/search/', {'q': query})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(self.region.id, [r['id'] for r in response.json()], query)
+
+    def test_typo_tolerant_search(self):
+        response = self.client.get('/api/locations/search/', {'q': 'Samarkant'})
+        self.assertIn("Samarkand", [r['name'] for r in response.json()])
+
+    def test_region_rename_reindexes_districts(self):
+        self.region.name_ru = "Самарқанд"
+        self.region.save()
+        district = District.objects.get(name="Urgut")
+        self.assertIn("самарқанд", district.search_text)
+
+
+class AutocompleteIndexTest(TestCase):
+    def test_transliteration_folds_to_same_key(self):
+        self.assertEqual(autocomplete.fold("Самарканд"), autocomplete.fold("Samarkand"))
+        self.assertEqual(autocomplete.fold("Samarqand"), autocomplete.fold("Samarkand"))
+        self.assertEqual(autocomplete.fold("Фарғона"), autocomplete.fold("Farg'ona"))
+        self.assertEqual(autocomplete.fold("Хорезм"), autocomplete.fold("Xorezm"))
+
+    def test_district_carries_region(self):
+        index = autocomplete.LocationIndex()
+        region = {'id': 1, 'name': "Samarkand", 'name_ru': "Самарканд", 'name_uz': None}
+        index.add(('region', 1), {**region, 'region': None}, ["Samarkand", "Самарканд"])
+        index.add(('district', 7), {'id': 7, 'name': "Urgut", 'name_ru': "Ургут", 'name_uz': None, 'region': region},
+                  ["Urgut", "Ургут"])
+
+        self.assertEqual([e['id'] for e in index.search("ург", kind='district')], [7])
+        self.assertEqual(index.search("ург", kind='district')[0]['region']['name'], "Samarkand")
+        self.assertEqual([e['id'] for e in index.search("самар", kind='region')], [1])
+        self.assertEqual(index.search("tashkent"), [])
@@ -1,5 +1,4 @@
 
-from django.db.models import Q
 from rest_framework import generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
@@ -7,6 +6,8 @@ from rest_framework.response import Response
 from .models import Region, District, Country
 from hotels.models import Sight
 from .serializers import CountrySerializer, SightSerializer
+from silkroad_backend import search
+from . import autocomplete
 
 class SightListAPIView(generics.ListAPIView):
     queryset = Sight.objects.filter(status='active')
@@ -20,114 +21,76 @@ class CountryListAPIView(generics.ListAPIView):
     permission_classes = [AllowAny]
     pagination_class = None
 
+TYPE_NAMES = {
+    'region': {'en': 'Region', 'ru': 'Регион', 'uz': 'Viloyat'},
+    'district': {'en': 'City', 'ru': 'Город', 'uz': 'Shahar'},
+}
+
+
+def _localized(entry, lang_code):
+    if lang_code == 'ru':
+        return entry['name_ru'] or entry['name']
+    elif lang_code == 'uz':
+        return entry['name_uz'] or entry['name']
+    return entry['name']
+
+
+def _location_result(kind, entry, lang):
+    display_name = _localized(entry, lang)
+    # Region name for context
+    if entry.get('region'):
+        display_name = f"{display_name}, {_localized(entry['region'], lang)}"
+    return {
+        'id': entry['id'],
+        'name': entry['name'],
+        'type': TYPE_NAMES[kind].get(lang, TYPE_NAMES[kind]['en']),
+        'display_name': display_name,
+    }
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def search_locations(request):
     """
     Search for regions or districts by name (multi-lingual).
     Query param: ?q=...&lang=...
+
+    Answers from the in-memory autocomplete index (locations.autocomplete);
+    falls back to the full-text/trigram DB search only when the prefix index
+    has no match (typos).
     """
     query = request.GET.get('q', '').strip()
     lang = request.GET.get('lang', 'en')
-    
+    index = autocomplete.get_index()
+
     # If query is empty, return top regions/districts as default suggestions
     if not query:
-        # Get all active regions
-        regions = Region.objects.filter(is_active=True).order_by('name')[:10]
-        results = []
-        
-        def get_name(obj, lang_code):
-            if lang_code == 'ru': return obj.name_ru or obj.name
-            elif lang_code == 'uz': return obj.name_uz or obj.name
-            return obj.name
-
-        for r in regions:
-            display_name = get_name(r, lang)
-            type_name = 'Region'
-            if lang == 'ru': type_name = 'Регион'
-            if lang == 'uz': type_name = 'Viloyat'
-            results.append({
-                'id': r.id, 'name': r.name, 'type': type_name, 'display_name': display_name
-            })
-            
-        # Also add some popular districts (cities)
-        districts = District.objects.filter(is_active=True).order_by('name')[:10]
-        for d in districts:
-            display_name = get_name(d, lang)
-            region_name = get_name(d.region, lang) if d.region else ""
-            full_display = f"{display_name}, {region_name}" if region_name else display_name
-            type_name = 'City'
-            if lang == 'ru': type_name = 'Город'
-            if lang == 'uz': type_name = 'Shahar'
-            results.append({
-                'id': d.id, 'name': d.name, 'type': type_name, 'display_name': full_display
-            })
-        return Response(results)
+        return Response(
+            [_location_result('region', e, lang) for e in index.top('region', 10)]
+            + [_location_result('district', e, lang) for e in index.top('district', 10)]
+        )
 
     if len(query) < 2:
         return Response([])
 
-    results = []
-    
-    # Helper to get name
-    def get_name(obj, lang_code):
-        if lang_code == 'ru':
-            return obj.name_ru or obj.name
-        elif lang_code == 'uz':
-            return obj.name_uz or obj.name
-        return obj.name
-
-    # 1. Search Regions
-    regions = Region.objects.filter(
-        Q(name__icontains=query) | 
-        Q(name_ru__icontains=query) | 
-        Q(name_uz__icontains=query),
-        is_active=True
-    )[:5]
-
-    for r in regions:
-        display_name = get_name(r, lang)
-        # Type localization
-        type_name = 'Region'
-        if lang == 'ru': type_name = 'Регион'
-        if lang == 'uz': type_name = 'Viloyat'
-
-        results.append({
-            'id': r.id,
-            'name': r.name,
-            'type': type_name, 
-            'display_name': display_name
-        })
-
-    # 2. Search Districts (Cities)
-    districts = District.objects.filter(
-        Q(name__icontains=query) | 
-        Q(name_ru__icontains=query) | 
-        Q(name_uz__icontains=query),
-        is_active=True
-    )[:10]
-
-    for d in districts:
-        display_name = get_name(d, lang)
-        
-        # Region name for context
-        region_name = ""
-        if d.region:
-            region_name = get_name(d.region, lang)
-            
-        full_display = f"{display_name}, {region_name}" if region_name else display_name
-        
-        type_name = 'City'
-        if lang == 'ru': type_name = 'Город'
-        if lang == 'uz': type_name = 'Shahar'
-
-        results.append({
-            'id': d.id,
-            'name': d.name,
-            'type': type_name,
-            'display_name': full_display
-        })
-
+    regions = index.search(query, kind='region', limit=5)
+    districts = index.search(query, kind='district', limit=10)
+
+    if not regions and not districts:
+        # Typo-tolerant fallback (full-text + trigram index, ranked)
+        regions = [
+            index.entries[('region', pk)]
+            for pk in search.search(Region.objects.filter(is_active=True), query).values_list('id', flat=True)[:5]
+            if ('region', pk) in index.entries
+        ]
+        districts = [
+            index.entries[('district', pk)]
+            for pk in search.search(District.objects.filter(is_active=True), query).values_list('id', flat=True)[:10]
+            if ('district', pk) in index.entries
+        ]
+
+    results = [_location_result('region', e, lang) for e in regions]
+    results += [_location_result('district', e, lang) for e in districts]
     return Response(results)
 
 
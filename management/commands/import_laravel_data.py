@@ -12,6 +12,8 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction, connection
 from django.contrib.auth.hashers import make_password
 
+from silkroad_backend.legacy_dump import DumpReader
+
 
 class Command(BaseCommand):
     """
@@ -87,124 +89,22 @@ class Command(BaseCommand):
             cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
         self.stdout.write("Таблицы очищены")
 
-    def parse_inserts(self, file_path: Path, table_name: str) -> list:
-        """Извлекает все INSERT-запросы для указанной таблицы"""
-        inserts = []
-        current = ""
-        in_insert = False
-
-        with file_path.open('r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith(f"INSERT INTO `{table_name}`"):
-                    in_insert = True
-                    current = line
-                elif in_insert:
-                    current += " " + line
-                    if line.endswith(';'):
-                        inserts.append(current.strip())
-                        in_insert = False
-                        current = ""
-
-        return inserts
-
-    def parse_row_values(self, insert_stmt: str) -> list:
-        """Парсит VALUES (...) из INSERT с улучшенной обработкой экранирования"""
-        match = re.search(r'VALUES\s*(.+?);$', insert_stmt, re.DOTALL | re.IGNORECASE)
-        if not match:
-            return []
-
-        values_str = match.group(1).strip()
-        # Улучшенный разбор рядов с учётом вложенных скобок
-        rows = []
-        current_row = ""
-        depth = 0
-        for char in values_str:
-            if char == '(' and depth == 0:
-                depth += 1
-            elif char == '(':
-                depth += 1
-                current_row += char
-            elif char == ')' and depth == 1:
-                depth -= 1
-                rows.append(current_row.strip())
-                current_row = ""
-            elif char == ')':
-                depth -= 1
-                current_row += char
-            elif depth > 0:
-                current_row += char
-            # Игнорируем запятые вне рядов
-
-        parsed_rows = []
-        for row_str in rows:
-            values = []
-            current = ""
-            in_quotes = False
-            escaped = False
-            i = 0
-            while i < len(row_str):
-                char = row_str[i]
-                if escaped:
-                    current += char
-                    escaped = False
-                    i += 1
-                    continue
-                if char == '\\':
-                    escaped = True
-                    i += 1
-                    continue
-                if char == "'" and not in_quotes:
-                    in_quotes = True
-                    current += char
-                elif char == "'" and in_quotes:
-                    in_quotes = False
-                    current += char
-                elif char == ',' and not in_quotes:
-                    if current:
-                        values.append(current.strip())
-                    current = ""
-                else:
-                    current += char
-                i += 1
-            if current:
-                values.append(current.strip())
-
-            # Очистка и приведение типов с fallback
-            cleaned = []
-            for v in values:
-                v = v.strip()
-                if v == 'NULL':
-                    cleaned.append(None)
-                elif v.startswith("'") and v.endswith("'"):
-                    cleaned.append(v[1:-1].replace("\\'", "'").replace("''", "'").replace("\\", ""))
-                elif v == 'CURRENT_TIMESTAMP':
-                    cleaned.append(datetime.now())
-                else:
-                    try:
-                        if re.match(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2})?$', v):
-                            cleaned.append(datetime.strptime(v, '%Y-%m-%d %H:%M:%S') if ' ' in v else datetime.strptime(v, '%Y-%m-%d').date())
-                        elif re.match(r'^-?\d+$', v):
-                            cleaned.append(int(v))
-                        elif re.match(r'^-?\d+\.\d+$', v):
-                            cleaned.append(Decimal(v))
-                        else:
-                            try:
-                                cleaned.append(json.loads(v))
-                            except json.JSONDecodeError:
-                                cleaned.append(v)
-                    except ValueError:
-                        cleaned.append(v)  # fallback to str if conversion fails
-
-            parsed_rows.append(cleaned)
-
-        return parsed_rows
+    def parse_inserts(self, file_path: Path, table_name: str):
+        """Потоково отдаёт INSERT-инструкции таблицы (память — одна инструкция)"""
+        return DumpReader(file_path).statements({table_name})
+
+    def parse_row_values(self, insert_stmt) -> list:
+        """Строки инструкции: NULL -> None, числа -> int/Decimal, строки без экранирования"""
+        return [
+            [datetime.now() if v == 'CURRENT_TIMESTAMP' else v for v in row]
+            for row in insert_stmt.rows
+        ]
 
     def import_users(self, file_path: Path):
         from accounts.models import User  # локальный импорт
 
         inserts = self.parse_inserts(file_path, 'tb_users')
-        self.stdout.write(f"Найдено INSERT для tb_users: {len(inserts)}")
+        password = make_password('admin2026')  # хэш один на всех: PBKDF2 на строку — секунды на тысячу
 
         for stmt in inserts:
             rows = self.parse_row_values(stmt)
@@ -236,7 +136,7 @@ class Command(BaseCommand):
                         social_type=values[11] if len(values) > 11 else None,
                         is_active=True,
                         role='admin' if 'admin' in email.lower() else 'agent',
-                        password=make_password('admin2026'),
+                        password=password,
                     )
                     self.stdout.write(self.style.SUCCESS(f"Создан пользователь: {user.email}"))
                 except Exception as e:
@@ -247,7 +147,6 @@ class Command(BaseCommand):
         from hotels.models import Category  # локальный импорт
 
         inserts = self.parse_inserts(file_path, 'tb_categories')
-        self.stdout.write(f"Найдено INSERT для tb_categories: {len(inserts)}")
 
         for stmt in inserts:
             rows = self.parse_row_values(stmt)
@@ -271,7 +170,6 @@ class Command(BaseCommand):
         from vendors.models import Vendor  # локальный импорт
 
         inserts = self.parse_inserts(file_path, 'tb_vendors')
-        self.stdout.write(f"Найдено INSERT для tb_vendors: {len(inserts)}")
 
         for stmt in inserts:
             rows = self.parse_row_values(stmt)
@@ -305,7 +203,6 @@ class Command(BaseCommand):
         from hotels.models import Sight  # локальный импорт
 
         inserts = self.parse_inserts(file_path, 'tb_sights')
-        self.stdout.write(f"Найдено INSERT для tb_sights: {len(inserts)}")
 
         for stmt in inserts:
             rows = self.parse_row_values(stmt)
@@ -355,7 +252,6 @@ class Command(BaseCommand):
         from hotels.models import Ticket  # локальный импорт
 
         inserts = self.parse_inserts(file_path, 'tb_tickets')
-        self.stdout.write(f"Найдено INSERT для tb_tickets: {len(inserts)}")
 
         for stmt in inserts:
             rows = self.parse_row_values(stmt)
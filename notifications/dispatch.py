@@ -0,0 +1,159 @@
+"""
+Рассылка уведомлений пачками.
+
+    dispatch.notify(booking.user_id, "Booking Confirmed", message, type='success', link='/profile/bookings')
+    dispatch.notify(dispatch.STAFF, "Sales Drop Alert", message, dedupe_key='sales_drop')
+
+- notify() из запроса только ставит Celery-задачу (после коммита транзакции);
+  без брокера — рассылка синхронно, чтобы уведомление не потерялось.
+- deliver() записывает всех получателей через bulk_create пачками NOTIFICATIONS_BATCH_SIZE.
+- Рассылка с dedupe_key (например, алерты аналитики) внутри окна dedupe_window
+  (по умолчанию DEDUPE_WINDOW) отправляется один раз (cache.add). Без ключа не
+  дедуплицируется: одинаковые по тексту уведомления о разных бронях — разные события.
+- Размер рассылки и задержка (ожидание в очереди + запись) копятся в Redis — stats().
+- Созданные уведомления сразу увеличивают счётчик непрочитанных (notifications.unread)
+  и публикуются в push-канал (notifications.realtime).
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import realtime, unread
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+STAFF = 'staff'
+
+BATCH_SIZE = getattr(settings, 'NOTIFICATIONS_BATCH_SIZE', 500)
+DEDUPE_WINDOW = getattr(settings, 'NOTIFICATIONS_DEDUPE_WINDOW', 60 * 5)
+
+STATS_KEY = 'notifications:dispatch:stats'
+
+
+def notify(recipients, title, message, type='info', link=None, dedupe_key=None, dedupe_window=None):
+    """
+    Ставит рассылку в очередь. recipients — id пользователя, список id или STAFF.
+    """
+    if recipients is None:
+        return
+    payload = {
+        'recipients': recipients if recipients == STAFF or isinstance(recipients, int) else list(recipients),
+        'title': title,
+        'message': message,
+        'type': type,
+        'link': link,
+        'dedupe_key': dedupe_key,
+        'dedupe_window': dedupe_window,
+    }
+    transaction.on_commit(lambda: _enqueue(payload))
+
+
+def _enqueue(payload):
+    from .tasks import dispatch_notifications_task
+
+    payload['queued_at'] = time.time()
+    try:
+        dispatch_notifications_task.delay(payload)
+    except Exception as e:
+        logger.warning(f"Notification queue unavailable, delivering inline: {e}")
+        deliver(**payload)
+
+
+def _recipient_ids(recipients):
+    if recipients == STAFF:
+        from accounts.models import User
+        return list(User.objects.filter(is_staff=True).values_list('id', flat=True))
+    if isinstance(recipients, int):
+        return [recipients]
+    return list(dict.fromkeys(user_id for user_id in recipients if user_id))
+
+
+def _claim(dedupe_key, window):
+    """
+    True, если рассылка с этим ключом в окне ещё не отправлялась.
+    """
+    key = f'notifications:dedupe:{hashlib.sha1(dedupe_key.encode()).hexdigest()}'
+    try:
+        return cache.add(key, 1, timeout=window)
+    except Exception as e:
+        logger.warning(f"Notification dedupe unavailable: {e}")
+        return True
+
+
+def deliver(recipients, title, message, type='info', link=None, dedupe_key=None,
+            dedupe_window=None, queued_at=None):
+    """
+    Записывает уведомления всем получателям. Возвращает
+    {'recipients', 'created', 'deduplicated', 'write_ms', 'latency_ms'}.
+    """
+    started = time.time()
+    result = {'recipients': 0, 'created': 0, 'deduplicated': False, 'write_ms': 0, 'latency_ms': 0}
+
+    if dedupe_key is not None and not _claim(dedupe_key, dedupe_window or DEDUPE_WINDOW):
+        result['deduplicated'] = True
+        _record(result)
+        return result
+
+    user_ids = _recipient_ids(recipients)
+    result['recipients'] = len(user_ids)
+    for i in range(0, len(user_ids), BATCH_SIZE):
+        created = Notification.objects.bulk_create([
+            Notification(user_id=user_id, title=title, message=message, type=type, link=link)
+            for user_id in user_ids[i:i + BATCH_SIZE]
+        ])
+        result['created'] += len(created)
+        unread.add({notification.user_id: 1 for notification in created})
+        realtime.publish_created(created)
+
+    finished = time.time()
+    result['write_ms'] = round((finished - started) * 1000, 1)
+    result['latency_ms'] = round((finished - (queued_at or started)) * 1000, 1)
+    _record(result)
+    if user_ids:
+        logger.info(
+            f"Notification '{title}' fanned out to {result['created']} users "
+            f"(write {result['write_ms']} ms, latency {result['latency_ms']} ms)"
+        )
+    return result
+
+
+def _record(result):
+    try:
+        from django_redis import get_redis_connection
+        pipe = get_redis_connection('default').pipeline()
+        if result['deduplicated']:
+            pipe.hincrby(STATS_KEY, 'deduplicated', 1)
+        else:
+            pipe.hincrby(STATS_KEY, 'fanouts', 1)
+            pipe.hincrby(STATS_KEY, 'notifications', result['created'])
+            pipe.hincrby(STATS_KEY, 'write_ms', int(result['write_ms']))
+            pipe.hincrby(STATS_KEY, 'latency_ms', int(result['latency_ms']))
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def stats():
+    """
+    Счётчики по всем воркерам и средние размер/время рассылки.
+    """
+    from django_redis import get_redis_connection
+
+    counters = {
+        (k.decode() if isinstance(k, bytes) else k): int(v)
+        for k, v in get_redis_connection('default').hgetall(STATS_KEY).items()
+    }
+    fanouts = counters.get('fanouts', 0)
+    return {
+        'fanouts': fanouts,
+        'notifications': counters.get('notifications', 0),
+        'deduplicated': counters.get('deduplicated', 0),
+        'avg_fanout_size': round(counters.get('notifications', 0) / fanouts, 1) if fanouts else 0,
+        'avg_write_ms': round(counters.get('write_ms', 0) / fanouts, 1) if fanouts else 0,
+        'avg_latency_ms': round(counters.get('latency_ms', 0) / fanouts, 1) if fanouts else 0,
+    }
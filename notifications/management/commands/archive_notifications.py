@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import Notification, NotificationArchive
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'title', 'message', 'type', 'link', 'created_at')
+
+
+class Command(BaseCommand):
+    help = 'Moves read notifications older than --days from the hot table into notifications_archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90, help='Archive read notifications older than this')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--purge-archive-days', type=int,
+                            help='Also delete archived notifications older than this many days')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+        candidates = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"Would archive {candidates.count()} notifications read before {cutoff:%Y-%m-%d}.")
+            return
+
+        # Пачки по id: копия в архив и удаление из горячей таблицы в одной транзакции,
+        # непрочитанные не трогаются — счётчик непрочитанных не меняется.
+        moved = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    candidates.filter(id__gt=last_id).order_by('id').select_for_update()
+                    .values(*ARCHIVE_FIELDS)[:batch_size]
+                )
+                if not rows:
+                    break
+                NotificationArchive.objects.bulk_create(
+                    [NotificationArchive(**row) for row in rows], ignore_conflicts=True
+                )
+                Notification.objects.filter(id__in=[row['id'] for row in rows], is_read=True).delete()
+            last_id = rows[-1]['id']
+            moved += len(rows)
+            if self.verbosity > 1:
+                self.stdout.write(f"Archived {moved} notifications...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} notifications read before {cutoff:%Y-%m-%d}."))
+
+        if options['purge_archive_days'] is not None:
+            purge_cutoff = timezone.now() - timedelta(days=options['purge_archive_days'])
+            purged, _ = NotificationArchive.objects.filter(created_at__lt=purge_cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f"Purged {purged} archived notifications."))
@@ -23,6 +23,40 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Счётчик непрочитанных и список непрочитанных
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_unread_idx'),
+            # Keyset-пагинация ленты пользователя
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.title}"
+
+
+class NotificationArchive(models.Model):
+    """
+    Старые прочитанные уведомления, вынесенные из горячей таблицы (archive_notifications).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    type = models.CharField(max_length=20, choices=Notification.TYPES, default='info')
+    link = models.CharField(max_length=255, blank=True, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notifications_archive'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notif_archive_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.title}"
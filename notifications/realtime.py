@@ -0,0 +1,284 @@
+"""
+Push-доставка уведомлений вместо опроса NotificationViewSet.
+
+События пользователя публикуются в канал `notifications:user:<id>`:
+    {'type': 'notification', 'notification': {...}, 'unread_delta': 1}
+    {'type': 'unread', 'unread_delta': -3}
+    {'type': 'unread', 'unread_count': 5}      # первое событие после подключения
+
+Транспорты (оба поверх events()):
+    - WebSocket: ws(s)://<host>/ws/notifications/?token=<JWT access>   (silkroad_backend.asgi)
+    - SSE:       GET /api/notifications/stream/?token=<JWT access>      (только под ASGI)
+
+Бэкенды (NOTIFICATIONS_REALTIME_BACKEND):
+    - 'redis'  — pub/sub, работает между воркерами. Один pub/sub-коннект на процесс:
+                 каналы подписываются, пока в процессе есть хоть один слушатель пользователя;
+    - 'memory' — внутри процесса (тесты, разработка без Redis).
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager, suppress
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = getattr(settings, 'NOTIFICATIONS_REALTIME_HEARTBEAT', 25)
+QUEUE_SIZE = 100
+WEBSOCKET_PATH = '/ws/notifications/'
+
+
+def channel(user_id):
+    return f'notifications:user:{user_id}'
+
+
+class MemoryBackend:
+    """
+    Подписчики — asyncio-очереди своих event loop; publish потокобезопасен.
+    """
+
+    def __init__(self):
+        self._subscribers = {}  # channel -> {(loop, queue)}
+        self._lock = threading.Lock()
+
+    def publish_many(self, messages):
+        for name, data in messages:
+            self._deliver_local(name, data)
+
+    def _deliver_local(self, name, data):
+        with self._lock:
+            targets = list(self._subscribers.get(name, ()))
+        for loop, queue in targets:
+            with suppress(RuntimeError):  # loop уже закрыт
+                loop.call_soon_threadsafe(self._put, queue, data)
+
+    @staticmethod
+    def _put(queue, data):
+        try:
+            queue.put_nowait(data)
+        except asyncio.QueueFull:
+            logger.warning("Realtime subscriber is too slow, event dropped")
+
+    def _add(self, name, entry):
+        with self._lock:
+            listeners = self._subscribers.setdefault(name, set())
+            listeners.add(entry)
+            return len(listeners) == 1
+
+    def _remove(self, name, entry):
+        with self._lock:
+            listeners = self._subscribers.get(name, set())
+            listeners.discard(entry)
+            if not listeners:
+                self._subscribers.pop(name, None)
+                return True
+            return False
+
+    @asynccontextmanager
+    async def subscribe(self, name):
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        self._add(name, entry)
+        try:
+            yield entry[1].get
+        finally:
+            self._remove(name, entry)
+
+
+class RedisBackend(MemoryBackend):
+    """
+    Публикация — pipeline PUBLISH через django_redis; приём — общий на процесс
+    pub/sub-коннект, сообщения раздаются локальным подписчикам.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+        self._loop = None
+        self._pubsub = None
+        self._reader = None
+        self._pubsub_lock = None
+
+    def publish_many(self, messages):
+        from django_redis import get_redis_connection
+
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for name, data in messages:
+            pipe.publish(name, data)
+        pipe.execute()
+
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            import redis.asyncio as aioredis
+
+            self._loop = loop
+            self._pubsub = aioredis.from_url(self.url).pubsub()
+            self._pubsub_lock = asyncio.Lock()
+            self._reader = None
+        return self._pubsub
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Realtime pub/sub connection error: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message and message['type'] == 'message':
+                name, data = message['channel'], message['data']
+                self._deliver_local(
+                    name.decode() if isinstance(name, bytes) else name,
+                    data.decode() if isinstance(data, bytes) else data,
+                )
+
+    @asynccontextmanager
+    async def subscribe(self, name):
+        pubsub = await self._connect()
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        async with self._pubsub_lock:
+            if self._add(name, entry):
+                await pubsub.subscribe(name)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._listen())
+        try:
+            yield entry[1].get
+        finally:
+            async with self._pubsub_lock:
+                if self._remove(name, entry):
+                    with suppress(Exception):
+                        await pubsub.unsubscribe(name)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    name = getattr(settings, 'NOTIFICATIONS_REALTIME_BACKEND', 'redis')
+    with _backends_lock:
+        if name not in _backends:
+            if name == 'memory':
+                _backends[name] = MemoryBackend()
+            else:
+                _backends[name] = RedisBackend(settings.CACHES['default']['LOCATION'])
+        return _backends[name]
+
+
+def publish(events):
+    """
+    events: [(user_id, event_dict)]. Ошибки доставки не мешают вызывающему коду.
+    """
+    if not events:
+        return
+    try:
+        get_backend().publish_many([(channel(user_id), json.dumps(event, default=str)) for user_id, event in events])
+    except Exception as e:
+        logger.warning(f"Realtime publish failed: {e}")
+
+
+def publish_created(notifications):
+    from .serializers import NotificationSerializer
+
+    publish([
+        (notification.user_id, {
+            'type': 'notification',
+            'notification': NotificationSerializer(notification).data,
+            'unread_delta': 1,
+        })
+        for notification in notifications
+    ])
+
+
+def publish_unread_delta(user_id, delta):
+    if delta:
+        publish([(user_id, {'type': 'unread', 'unread_delta': delta})])
+
+
+@sync_to_async
+def authenticate(token):
+    """
+    JWT access token -> id активного пользователя или None.
+    """
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from accounts.models import User
+
+    if not token:
+        return None
+    try:
+        user_id = AccessToken(token)[api_settings.USER_ID_CLAIM]
+    except (TokenError, KeyError):
+        return None
+    return user_id if User.objects.filter(pk=user_id, is_active=True).exists() else None
+
+
+@sync_to_async
+def unread_count(user_id):
+    from . import unread
+    return unread.get(user_id)
+
+
+async def events(user_id, heartbeat=HEARTBEAT):
+    """
+    Поток событий пользователя; None — пауза дольше heartbeat (пора слать ping).
+    Подписка оформляется до подсчёта непрочитанных, чтобы не потерять события между ними.
+    """
+    async with get_backend().subscribe(channel(user_id)) as next_message:
+        yield {'type': 'unread', 'unread_count': await unread_count(user_id)}
+        while True:
+            try:
+                data = await asyncio.wait_for(next_message(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            yield json.loads(data)
+
+
+def _query_token(scope):
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return (query.get('token') or [None])[0]
+
+
+async def websocket_application(scope, receive, send):
+    """
+    ASGI-приложение WebSocket: сервер только шлёт события, входящие сообщения игнорируются.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope['path'].rstrip('/') != WEBSOCKET_PATH.rstrip('/'):
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    user_id = await authenticate(_query_token(scope))
+    if user_id is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+    await send({'type': 'websocket.accept'})
+
+    async def pump():
+        async for event in events(user_id):
+            await send({'type': 'websocket.send', 'text': json.dumps(event or {'type': 'ping'})})
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'websocket.disconnect':
+            pass
+
+    tasks = {asyncio.create_task(pump()), asyncio.create_task(wait_disconnect())}
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    for task in done:
+        if task.exception() is not None:
+            logger.warning(f"Notification websocket for user {user_id} failed: {task.exception()}")
+            with suppress(Exception):
+                await send({'type': 'websocket.close', 'code': 1011})
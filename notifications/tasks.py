@@ -11,3 +11,27 @@ def send_notification_task(user_id, message):
     logger.info(f"Sending notification to user {user_id}: {message}")
     # TODO: Implement real email sending
     return f"Notification sent to {user_id}"
+
+@shared_task(ignore_result=True)
+def dispatch_notifications_task(payload):
+    """
+    Fan-out of one notification to its recipients (notifications.dispatch).
+    """
+    from .dispatch import deliver
+    return deliver(**payload)
+
+
+@shared_task(ignore_result=True)
+def reconcile_unread_counters_task():
+    """
+    Corrects cached unread counters that drifted after writes bypassing the dispatcher (admin, raw creates).
+    """
+    from . import unread
+
+    try:
+        fixed = unread.reconcile()
+    except Exception as e:
+        logger.warning(f"Unread counter reconcile failed: {e}")
+        return
+    if fixed:
+        logger.info(f"Reconciled {fixed} unread counters")
@@ -1,3 +1,172 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from notifications import dispatch, realtime, unread
+from notifications.models import Notification, NotificationArchive
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class NotificationDispatchTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.staff = [
+            User.objects.create_user(email=f'staff{n}@example.com', password='password', is_staff=True)
+            for n in range(3)
+        ]
+        self.user = User.objects.create_user(email='guest@example.com', password='password')
+
+    def test_staff_fanout_is_bulk(self):
+        with self.assertNumQueries(2):
+            result = dispatch.deliver(dispatch.STAFF, "Alert", "Body", type='warning')
+        self.assertEqual((result['recipients'], result['created']), (3, 3))
+        self.assertEqual(Notification.objects.filter(user__is_staff=True, title="Alert").count(), 3)
+
+    def test_identical_alert_is_deduplicated(self):
+        dispatch.deliver(dispatch.STAFF, "Surge", "Vendor 1: 30%", dedupe_key='alert:surge:1')
+        result = dispatch.deliver(dispatch.STAFF, "Surge", "Vendor 1: 35%", dedupe_key='alert:surge:1')
+        self.assertTrue(result['deduplicated'])
+        dispatch.deliver(dispatch.STAFF, "Surge", "Vendor 2: 40%", dedupe_key='alert:surge:2')
+        self.assertEqual(Notification.objects.filter(title="Surge").count(), 6)
+
+    def test_identical_text_without_key_is_delivered(self):
+        # Тексты "Booking Confirmed" не содержат id брони — повтор не должен теряться
+        dispatch.deliver(self.user.id, "Booking Confirmed", "Your booking is confirmed")
+        result = dispatch.deliver(self.user.id, "Booking Confirmed", "Your booking is confirmed")
+        self.assertFalse(result['deduplicated'])
+        self.assertEqual(self.user.notifications.count(), 2)
+
+    def test_notify_runs_after_commit_through_task(self):
+        with mock.patch('notifications.tasks.dispatch_notifications_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                dispatch.notify(self.user.id, "Booking Confirmed", "Done", type='success')
+                delay.assert_not_called()
+        payload = delay.call_args.args[0]
+        self.assertEqual(payload['recipients'], self.user.id)
+        dispatch.deliver(**payload)
+        self.assertEqual(self.user.notifications.get().type, 'success')
+
+    def test_notify_delivers_inline_without_broker(self):
+        with mock.patch('notifications.tasks.dispatch_notifications_task.delay', side_effect=ConnectionError):
+            with self.captureOnCommitCallbacks(execute=True):
+                dispatch.notify([self.user.id, self.user.id], "Declined", "Reason")
+        self.assertEqual(self.user.notifications.count(), 1)
+
+
+class MemoryBackendTest(SimpleTestCase):
+    def test_publish_reaches_only_channel_subscribers(self):
+        backend = realtime.MemoryBackend()
+
+        async def scenario():
+            async with backend.subscribe('a') as next_message:
+                backend.publish_many([('b', 'other'), ('a', 'mine')])
+                return await asyncio.wait_for(next_message(), 1)
+
+        self.assertEqual(asyncio.run(scenario()), 'mine')
+        self.assertEqual(backend._subscribers, {})
+
+
+@override_settings(
+    NOTIFICATIONS_REALTIME_BACKEND='memory',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class NotificationWebSocketTest(TestCase):
+    def connect(self, token, path='/ws/notifications/'):
+        inbox, outbox = asyncio.Queue(), asyncio.Queue()
+        inbox.put_nowait({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': path, 'query_string': f'token={token}'.encode()}
+        app = asyncio.create_task(realtime.websocket_application(scope, inbox.get, outbox.put))
+        return app, inbox, outbox
+
+    async def test_streams_new_notifications_and_unread_deltas(self):
+        user = await sync_to_async(User.objects.create_user)(email='ws@example.com', password='password')
+        app, inbox, outbox = self.connect(AccessToken.for_user(user))
+        receive = lambda: asyncio.wait_for(outbox.get(), 5)
+
+        self.assertEqual((await receive())['type'], 'websocket.accept')
+        self.assertEqual(json.loads((await receive())['text']), {'type': 'unread', 'unread_count': 0})
+
+        await sync_to_async(dispatch.deliver)(user.id, "Booking Confirmed", "Done")
+        event = json.loads((await receive())['text'])
+        self.assertEqual((event['type'], event['unread_delta']), ('notification', 1))
+        self.assertEqual(event['notification']['title'], "Booking Confirmed")
+
+        await sync_to_async(realtime.publish_unread_delta)(user.id, -1)
+        self.assertEqual(json.loads((await receive())['text']), {'type': 'unread', 'unread_delta': -1})
+
+        inbox.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(app, 5)
+
+    async def test_rejects_invalid_token(self):
+        app, _, outbox = self.connect('not-a-jwt')
+        await asyncio.wait_for(app, 5)
+        self.assertEqual(outbox.get_nowait(), {'type': 'websocket.close', 'code': 4401})
+
+
+@override_settings(
+    NOTIFICATIONS_REALTIME_BACKEND='memory',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class UnreadCounterAndPaginationTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(email='vendor@example.com', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_counter_follows_deliver_and_mark_read(self):
+        self.assertEqual(unread.get(self.user.id), 0)
+        dispatch.deliver([self.user.id], "One", "1")
+        dispatch.deliver([self.user.id], "Two", "2")
+        with self.assertNumQueries(0):
+            self.assertEqual(unread.get(self.user.id), 2)
+
+        first = self.user.notifications.order_by('id').first()
+        self.client.patch(f'/api/notifications/{first.id}/mark_as_read/')
+        self.assertEqual(self.client.get('/api/notifications/unread_count/').data, {'unread_count': 1})
+        self.client.post('/api/notifications/mark_all_as_read/')
+        self.assertEqual(unread.get(self.user.id), 0)
+
+    def test_counter_is_recounted_after_drift(self):
+        unread.get(self.user.id)
+        Notification.objects.create(user=self.user, title="Bypass", message="no counter")
+        self.assertEqual(unread.reconcile([self.user.id]), 1)
+        self.assertEqual(unread.get(self.user.id), 1)
+
+    def test_cursor_pagination(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title=f"N{n}", message="m") for n in range(5)
+        ])
+        seen = []
+        url = '/api/notifications/?pagination=cursor&page_size=2'
+        while url:
+            page = self.client.get(url).data
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(len(seen), 5)
+
+    def test_archive_moves_only_old_read_notifications(self):
+        old = timezone.now() - timedelta(days=120)
+        keep_unread = Notification.objects.create(user=self.user, title="Old unread", message="m")
+        archived = Notification.objects.create(user=self.user, title="Old read", message="m", is_read=True)
+        recent = Notification.objects.create(user=self.user, title="New read", message="m", is_read=True)
+        Notification.objects.filter(id__in=[keep_unread.id, archived.id]).update(created_at=old)
+
+        call_command('archive_notifications', days=90, batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(set(Notification.objects.values_list('id', flat=True)), {keep_unread.id, recent.id})
+        self.assertEqual(NotificationArchive.objects.get().id, archived.id)
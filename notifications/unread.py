@@ -0,0 +1,107 @@
+"""
+Счётчик непрочитанных уведомлений на пользователя.
+
+Значение живёт в кэше (Redis) и поддерживается инкрементами: рассылка (+1 каждому
+получателю), mark_as_read / mark_all_as_read / удаление (минус прочитанные).
+Инкремент применяется только к существующему ключу, поэтому счётчик не «изобретается»:
+нет ключа — следующее чтение пересчитывает его по БД (индекс user, is_read, created_at).
+TTL ограничивает дрейф после изменений в обход счётчика (админка, ручные create);
+reconcile() сверяет счётчики с БД (Celery beat, NOTIFICATIONS_UNREAD_RECONCILE_INTERVAL).
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = getattr(settings, 'NOTIFICATIONS_UNREAD_TIMEOUT', 60 * 60)
+
+# INCRBY только для существующего ключа (django_redis хранит int как есть)
+_INCR_IF_EXISTS = "if redis.call('exists', KEYS[1]) == 1 then return redis.call('incrby', KEYS[1], ARGV[1]) end"
+
+
+def _key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _db_count(user_id):
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get(user_id):
+    try:
+        value = cache.get(_key(user_id))
+    except Exception as e:
+        logger.warning(f"Unread counter unavailable: {e}")
+        return _db_count(user_id)
+    if value is None or value < 0:
+        value = _db_count(user_id)
+        try:
+            cache.set(_key(user_id), value, timeout=TIMEOUT)
+        except Exception:
+            pass
+    return value
+
+
+def add(deltas):
+    """
+    deltas: {user_id: delta}. Отсутствующие ключи не создаются.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    try:
+        from django_redis import get_redis_connection
+        redis = get_redis_connection('default')
+    except Exception:
+        redis = None  # не Redis (тесты, locmem) — по одному incr
+
+    try:
+        if redis is not None:
+            pipe = redis.pipeline(transaction=False)
+            for user_id, delta in deltas.items():
+                pipe.eval(_INCR_IF_EXISTS, 1, cache.make_key(_key(user_id)), delta)
+            pipe.execute()
+            return
+        for user_id, delta in deltas.items():
+            try:
+                cache.incr(_key(user_id), delta)
+            except ValueError:
+                pass
+    except Exception as e:
+        logger.warning(f"Unread counter update failed, resetting: {e}")
+        forget(deltas)
+
+
+def forget(user_ids):
+    try:
+        cache.delete_many([_key(user_id) for user_id in user_ids])
+    except Exception:
+        pass
+
+
+def reconcile(user_ids=None):
+    """
+    Пересчитывает закэшированные счётчики по БД одним GROUP BY.
+    Без user_ids — по пользователям, у которых есть непрочитанные в БД
+    (завышенные до нуля счётчики остальных исправит TTL). Возвращает число исправленных.
+    """
+    from django.db.models import Count
+
+    counts = dict(
+        Notification.objects.filter(is_read=False, **({'user_id__in': user_ids} if user_ids is not None else {}))
+        .values_list('user_id').annotate(n=Count('id')).order_by()
+    )
+    ids = list(user_ids) if user_ids is not None else list(counts)
+    cached = cache.get_many([_key(user_id) for user_id in ids])
+    fixed = {
+        _key(user_id): counts.get(user_id, 0)
+        for user_id in ids
+        if _key(user_id) in cached and cached[_key(user_id)] != counts.get(user_id, 0)
+    }
+    if fixed:
+        cache.set_many(fixed, timeout=TIMEOUT)
+    return len(fixed)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import NotificationViewSet, notification_stream
 
 router = DefaultRouter()
 router.register(r'', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    # До роутера: иначе 'stream' попадёт в detail-маршрут <pk>
+    path('stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
 ]
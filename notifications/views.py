@@ -1,24 +1,108 @@
+import json
+
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
+from . import realtime, unread
 from .models import Notification
 from .serializers import NotificationSerializer
 
+
+class NotificationCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация (?cursor=...): без OFFSET, по индексу (user, created_at, id).
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+def unread_changed(user_id, delta):
+    unread.add({user_id: delta})
+    realtime.publish_unread_delta(user_id, delta)
+
+
 class NotificationViewSet(viewsets.ModelViewSet):
+    """
+    Уведомления текущего пользователя.
+    ?is_read=false — только непрочитанные; ?pagination=cursor (или ?cursor=) — keyset-страницы.
+    """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user)
+        qs = Notification.objects.filter(user=self.request.user)
+        is_read = self.request.query_params.get('is_read')
+        if is_read in ('true', 'false'):
+            qs = qs.filter(is_read=is_read == 'true')
+        return qs
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params or params.get('pagination') == 'cursor':
+                self._paginator = NotificationCursorPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': unread.get(request.user.id)})
 
     @action(detail=True, methods=['patch'])
     def mark_as_read(self, request, pk=None):
         notification = self.get_object()
-        notification.is_read = True
-        notification.save(update_fields=['is_read'])
+        if not notification.is_read:
+            notification.is_read = True
+            notification.save(update_fields=['is_read'])
+            unread_changed(request.user.id, -1)
         return Response({'status': 'notification marked as read'})
 
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        unread_changed(request.user.id, -updated)
         return Response({'status': 'all notifications marked as read'})
+
+    def perform_update(self, serializer):
+        was_read = serializer.instance.is_read
+        notification = serializer.save()
+        if notification.is_read != was_read:
+            unread_changed(notification.user_id, -1 if notification.is_read else 1)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        if not instance.is_read:
+            unread_changed(instance.user_id, -1)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events: новые уведомления и изменения счётчика непрочитанных.
+    EventSource не умеет заголовки, поэтому JWT access передаётся в ?token=.
+    Работает только под ASGI (silkroad_backend.asgi).
+    """
+    token = request.GET.get('token')
+    auth_header = request.headers.get('Authorization', '')
+    if not token and auth_header.startswith('Bearer '):
+        token = auth_header[len('Bearer '):]
+    user_id = await realtime.authenticate(token)
+    if user_id is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+
+    async def stream():
+        async for event in realtime.events(user_id):
+            if event is None:
+                yield ': ping\n\n'
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,62 +1,178 @@
+import atexit
 import logging
 import json
+import os
+import queue
+import threading
+import time
 from django.conf import settings
 
 logger = logging.getLogger('silkroad.analytics')
 
+
+class _EventChannel:
+    """
+    Fire-and-forget канал событий для одного процесса воркера.
+
+    log_event только кладёт событие в ограниченную очередь (put_nowait);
+    фоновый поток-флашер собирает пачки и пишет их в ClickHouse одним INSERT.
+    При переполнении событие отбрасывается (счётчик dropped) — запрос никогда не ждёт аналитику.
+    Значения-callable в data вычисляются в потоке-флашере (отложенные метрики).
+    """
+
+    def __init__(self, maxsize, batch_size, flush_interval):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self.counters = {'enqueued': 0, 'dropped': 0, 'sent': 0, 'failed': 0}
+
+    def _ensure_started(self):
+        # После fork поток родителя не существует — запускаем свой
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.maxsize)
+            thread = threading.Thread(target=self._run, name='analytics-flusher', daemon=True)
+            thread.start()
+            self._pid = os.getpid()
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def put(self, event):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def _take_batch(self, timeout):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch(timeout=None)
+            self.flush(batch)
+
+    def drain(self):
+        """
+        Синхронно выгружает всё, что осталось в очереди (при завершении процесса).
+        """
+        if self._queue is None or self._pid != os.getpid():
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.flush(batch)
+
+    def flush(self, batch):
+        from django.db import close_old_connections
+
+        try:
+            rows = [AnalyticsService._to_row(*event) for event in batch]
+            AnalyticsService._push_to_clickhouse(rows)
+            self._count('sent', len(rows))
+        except Exception as e:
+            # Silent fail for analytics to prevent blocking transactions
+            self._count('failed', len(batch))
+            logger.error(f"ClickHouse Push Error ({len(batch)} events): {e}")
+        finally:
+            close_old_connections()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                'queued': self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0,
+                'capacity': self.maxsize,
+            }
+
+
 class AnalyticsService:
     """
     Enterprise Analytics Layer.
     Transfers events to Kafka/ClickHouse for high-scale reporting.
     """
-    
+
+    channel = _EventChannel(
+        maxsize=getattr(settings, 'ANALYTICS_QUEUE_SIZE', 10000),
+        batch_size=getattr(settings, 'ANALYTICS_QUEUE_BATCH_SIZE', 500),
+        flush_interval=getattr(settings, 'ANALYTICS_QUEUE_FLUSH_INTERVAL', 1.0),
+    )
+
     @staticmethod
     def log_event(event_type, user_id, data):
         """
-        Logs an analytical event.
-        In production, this pushes to a Kafka topic.
+        Logs an analytical event without blocking the caller.
+        Callable values in `data` are resolved later in the background flusher,
+        e.g. {'results_count': qs.count}.
         """
-        event_payload = {
-            'event': event_type,
-            'user_id': user_id,
-            'data': data,
-            'timestamp': 'auto' # Handled by consumer/DB
-        }
-        
+        from django.utils import timezone
+
+        # ClickHouse Integration (async, bounded queue)
+        if not AnalyticsService.channel.put((event_type, user_id, data, timezone.now())):
+            logger.warning(f"Analytics queue full, dropped event {event_type}")
+
+    @staticmethod
+    def _to_row(event_type, user_id, data, event_time):
+        data = {key: value() if callable(value) else value for key, value in data.items()}
+
         # Local Logging (ClickHouse local buffer simulation)
-        logger.info(f"ANALYTICS_EVENT: {json.dumps(event_payload)}")
-        
-        # ClickHouse Integration
-        AnalyticsService._push_to_clickhouse(event_type, user_id, data)
+        logger.info(f"ANALYTICS_EVENT: {json.dumps({'event': event_type, 'user_id': user_id, 'data': data}, default=str)}")
+
+        # Simple mapping to booking_events table
+        # In a real system, we'd use multiple tables or a more generic one
+        return {
+            'event_time': event_time,
+            'booking_id': data.get('booking_id', 0),
+            'user_id': user_id or 0,
+            'vendor_id': data.get('vendor_id', 0),
+            'booking_type': event_type,
+            'status': data.get('status', 'new'),
+            'amount': float(data.get('amount', 0)),
+            'created_at': event_time,
+        }
 
     @staticmethod
-    def _push_to_clickhouse(event_type, user_id, data):
+    def _push_to_clickhouse(rows):
         """
-        Internal method to push events to ClickHouse.
+        Internal method to push a batch of events to ClickHouse (one columnar INSERT,
+        pooled per-thread client).
         """
-        try:
-            from analytics.schema import get_client
-            from django.utils import timezone
-            client = get_client()
-            
-            # Simple mapping to booking_events table
-            # In a real system, we'd use multiple tables or a more generic one
-            client.execute(
-                'INSERT INTO booking_events (event_time, booking_id, user_id, vendor_id, booking_type, status, amount, created_at) VALUES',
-                [{
-                    'event_time': timezone.now(),
-                    'booking_id': data.get('booking_id', 0),
-                    'user_id': user_id or 0,
-                    'vendor_id': data.get('vendor_id', 0),
-                    'booking_type': event_type,
-                    'status': data.get('status', 'new'),
-                    'amount': float(data.get('amount', 0)),
-                    'created_at': timezone.now()
-                }]
-            )
-        except Exception as e:
-            # Silent fail for analytics to prevent blocking transactions
-            logger.error(f"ClickHouse Push Error: {e}")
+        from analytics.sink import insert
+        insert('booking_events', rows)
+
+    @staticmethod
+    def stats():
+        """Per-worker queue counters: enqueued / dropped / sent / failed / queued."""
+        return AnalyticsService.channel.stats()
 
     @staticmethod
     def get_user_stats(user_id):
@@ -82,3 +198,6 @@ class AnalyticsService:
             'booking_id': booking_id,
             'amount': float(amount)
         })
+
+
+atexit.register(AnalyticsService.channel.drain)
@@ -6,4 +6,7 @@ class SilkroadBackendConfig(AppConfig):
     Конфигурация основного приложения проекта.
     """
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'silkroad_backend'
\ No newline at end of file
+    name = 'silkroad_backend'
+
+    def ready(self):
+        import silkroad_backend.signals
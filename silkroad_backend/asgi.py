@@ -2,6 +2,13 @@
 ASGI config for silkroad_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the notification push channel
+(notifications.realtime).
+
+This is the production entry point:
+    uvicorn silkroad_backend.asgi:application --workers 4
+The WebSocket channel and the streaming chat (/api/chat/stream/) need it;
+under WSGI (wsgi.py, runserver) they are unavailable.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +20,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'silkroad_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from notifications.realtime import websocket_application  # noqa: E402  (after Django setup)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,185 @@
+"""
+Производные изображения (миниатюры, карточки, hero) в WebP и JPEG.
+
+Оригинал не меняется; производные лежат рядом с ним:
+    hotels/2025/photo.jpg -> hotels/2025/photo.card.webp, hotels/2025/photo.card.jpg, ...
+
+Генерация — Celery-задача generate_image_derivatives_task (после загрузки фото) или
+команда build_image_derivatives (бэкфилл существующих файлов). Какие производные есть,
+хранится в кэше (реестр), чтобы сериализаторы собирали srcset одним get_many,
+не обращаясь к хранилищу. Для изображения без производных srcset пуст, а задача
+генерации ставится один раз (дедупликация через cache.add). Запись в реестр сбрасывает
+тег 'media' кэша ответов (silkroad_backend.response_cache), иначе списки до TTL отдают пустой srcset.
+"""
+import hashlib
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from silkroad_backend import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Имя -> максимальная ширина в пикселях
+SIZES = getattr(settings, 'IMAGE_DERIVATIVE_SIZES', {'thumb': 320, 'card': 640, 'hero': 1600})
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+
+REGISTRY_TIMEOUT = None
+FAILED_TIMEOUT = 60 * 60 * 24
+PENDING_TIMEOUT = 60 * 10
+
+
+def _registry_key(path):
+    return f'imgderiv:{hashlib.sha1(path.encode()).hexdigest()}'
+
+
+def _pending_key(path):
+    return f'imgderiv:pending:{hashlib.sha1(path.encode()).hexdigest()}'
+
+
+def media_path(url):
+    """
+    '/media/hotels/a.jpg' -> 'hotels/a.jpg'. Внешние URL и не-изображения -> None.
+    """
+    if not url or url.startswith(('http://', 'https://', '//')):
+        return None
+    path = url[len(settings.MEDIA_URL):] if url.startswith(settings.MEDIA_URL) else url
+    path = path.lstrip('/')
+    if not path.lower().endswith(SOURCE_EXTENSIONS) or is_derivative(path):
+        return None
+    return path
+
+
+def derivative_path(path, size, fmt):
+    stem, _ = os.path.splitext(path)
+    return f'{stem}.{size}.{fmt}'
+
+
+def is_derivative(path):
+    stem, ext = os.path.splitext(path)
+    return ext.lstrip('.') in FORMATS and os.path.splitext(stem)[1].lstrip('.') in SIZES
+
+
+def generate(path, storage=default_storage, force=False):
+    """
+    Строит производные для файла хранилища и записывает их в реестр.
+    """
+    variants = build(path, storage=storage, force=force)
+    register(path, variants)
+    return variants
+
+
+def build(path, storage=default_storage, force=False):
+    """
+    Только файлы, без кэша (для пула процессов команды бэкфилла).
+    Возвращает {size: {'width': w, 'webp': path, 'jpg': path}}.
+    Размеры крупнее оригинала не создаются (кроме самого маленького).
+    """
+    from PIL import Image, ImageOps
+
+    with storage.open(path, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'P') else 'RGB')
+
+    variants = {}
+    smallest = min(SIZES, key=SIZES.get)
+    for size, width in sorted(SIZES.items(), key=lambda item: item[1]):
+        if width >= image.width and size != smallest:
+            continue
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        variant = {'width': resized.width}
+        for fmt, options in FORMATS.items():
+            target = derivative_path(path, size, fmt)
+            if force or not storage.exists(target):
+                frame = resized.convert('RGB') if options['format'] == 'JPEG' else resized
+                buffer = io.BytesIO()
+                frame.save(buffer, **options)
+                if storage.exists(target):
+                    storage.delete(target)
+                storage.save(target, ContentFile(buffer.getvalue()))
+            variant[fmt] = target
+        variants[size] = variant
+    return variants
+
+
+def register(path, variants, invalidate=True):
+    """
+    invalidate=False — вызывающий код сбросит тег 'media' сам (один раз на бэкфилл).
+    """
+    cache.set(_registry_key(path), variants, timeout=REGISTRY_TIMEOUT)
+    cache.delete(_pending_key(path))
+    if invalidate:
+        response_cache.invalidate('media')
+
+
+def schedule(path):
+    """
+    Ставит генерацию в очередь Celery, если она ещё не поставлена.
+    """
+    if not path or not cache.add(_pending_key(path), 1, timeout=PENDING_TIMEOUT):
+        return
+    from silkroad_backend.tasks import generate_image_derivatives_task
+    try:
+        generate_image_derivatives_task.delay(path)
+    except Exception as e:
+        cache.delete(_pending_key(path))
+        logger.warning(f"Could not schedule image derivatives for {path}: {e}")
+
+
+def mark_failed(path):
+    """
+    Файл не читается (нет на диске, битый): пустая запись, чтобы сутки не ставить генерацию снова.
+    """
+    cache.set(_registry_key(path), {}, timeout=FAILED_TIMEOUT)
+    cache.delete(_pending_key(path))
+
+
+def forget(path):
+    cache.delete_many([_registry_key(path), _pending_key(path)])
+
+
+def _srcset(variants, fmt):
+    return ', '.join(
+        f"{settings.MEDIA_URL}{variant[fmt]} {variant['width']}w"
+        for variant in sorted(variants.values(), key=lambda v: v['width'])
+    )
+
+
+def responsive(urls, schedule_missing=True):
+    """
+    Для списка URL изображений: [{'src', 'srcset', 'srcset_jpeg', 'sizes': {size: url}}].
+    Один запрос к кэшу на весь список; без производных — только src (и генерация в фоне).
+    """
+    paths = [media_path(url) for url in urls]
+    keys = {path: _registry_key(path) for path in paths if path}
+    try:
+        found = cache.get_many(list(keys.values())) if keys else {}
+    except Exception as e:
+        logger.warning(f"Image derivative registry unavailable: {e}")
+        found, schedule_missing = {}, False
+
+    result = []
+    for url, path in zip(urls, paths):
+        item = {'src': url, 'srcset': '', 'srcset_jpeg': '', 'sizes': {}}
+        variants = found.get(keys.get(path)) if path else None
+        if variants:
+            item['srcset'] = _srcset(variants, 'webp')
+            item['srcset_jpeg'] = _srcset(variants, 'jpg')
+            item['sizes'] = {size: f"{settings.MEDIA_URL}{variant['webp']}" for size, variant in variants.items()}
+        elif variants is None and path and schedule_missing:
+            schedule(path)
+        result.append(item)
+    return result
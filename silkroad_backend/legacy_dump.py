@@ -0,0 +1,386 @@
+"""
+Потоковое чтение legacy MySQL-дампа (mysqldump) и пакетная загрузка в Django-модели.
+
+    reader = DumpReader(path)
+    for statement in reader.statements({'tb_users'}):
+        ...  # statement.rows — список кортежей одной INSERT-инструкции
+
+Файл читается построчно в бинарном режиме: в памяти только одна INSERT-инструкция
+(mysqldump режет их по net_buffer_length, ~1 МБ), поэтому память постоянна при любом
+размере дампа. Значения разбираются регулярным выражением, а не посимвольно:
+NULL -> None, целые -> int, дробные -> Decimal, строки -> str с MySQL-экранированием.
+С typed=False числа остаются строками (совместимость со старыми импортёрами).
+
+statement.end_offset — байтовое смещение после инструкции; его сохраняет Checkpoint,
+чтобы повторный запуск продолжил с места остановки.
+"""
+import glob
+import json
+import logging
+import os
+import re
+import time
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class DumpParseError(ValueError):
+    pass
+
+
+_INSERT_RE = re.compile(rb'^INSERT INTO `([^`]+)`')
+_CREATE_RE = re.compile(rb'^CREATE TABLE `([^`]+)`')
+_COLUMN_RE = re.compile(rb'^\s+`([^`]+)`\s')
+_COLUMN_LIST_RE = re.compile(r'^INSERT INTO `[^`]+`\s*\(([^)]*)\)\s*VALUES\s*', re.IGNORECASE)
+_VALUES_RE = re.compile(r'^INSERT INTO `[^`]+`\s*VALUES\s*', re.IGNORECASE)
+
+_ROW_START = re.compile(r'\s*\(')
+_ROW_END = re.compile(r'\s*([,;])?')
+_VALUE = re.compile(r"""
+    \s*(?:
+        (?:_binary\s*)?'(?P<str>(?:[^'\\]|\\.|'')*)'
+      | (?P<null>NULL)
+      | (?P<dec>-?\d+\.\d*(?:[eE][-+]?\d+)?|-?\d+[eE][-+]?\d+)
+      | (?P<int>-?\d+)
+      | 0x(?P<hex>[0-9A-Fa-f]*)
+      | (?P<raw>[A-Za-z_][A-Za-z0-9_()]*)
+    )\s*(?P<sep>[,)])
+""", re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {'0': '\x00', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_ESCAPE_RE = re.compile(r"\\(.)|''", re.DOTALL)
+
+
+def _unescape_match(match):
+    char = match.group(1)
+    if char is None:
+        return "'"
+    if char in '%_':
+        return '\\' + char
+    return _ESCAPES.get(char, char)
+
+
+def unescape(value):
+    if '\\' not in value and "''" not in value:
+        return value
+    return _ESCAPE_RE.sub(_unescape_match, value)
+
+
+def parse_values(text, pos=0, typed=True):
+    """
+    Разбирает "(...),(...);" начиная с pos. Возвращает список кортежей.
+    """
+    rows = []
+    while True:
+        match = _ROW_START.match(text, pos)
+        if not match:
+            break
+        pos = match.end()
+        row = []
+        while True:
+            match = _VALUE.match(text, pos)
+            if not match:
+                raise DumpParseError(f"Unexpected token at {pos}: {text[pos:pos + 40]!r}")
+            if match.group('str') is not None:
+                row.append(unescape(match.group('str')))
+            elif match.group('null') is not None:
+                row.append(None)
+            elif match.group('int') is not None:
+                row.append(int(match.group('int')) if typed else match.group('int'))
+            elif match.group('dec') is not None:
+                row.append(Decimal(match.group('dec')) if typed else match.group('dec'))
+            elif match.group('hex') is not None:
+                row.append(bytes.fromhex(match.group('hex')) if typed else '0x' + match.group('hex'))
+            else:
+                row.append(match.group('raw'))
+            pos = match.end()
+            if match.group('sep') == ')':
+                break
+        rows.append(tuple(row))
+        match = _ROW_END.match(text, pos)
+        pos = match.end()
+        if match.group(1) != ',':
+            break
+    return rows
+
+
+class Statement:
+    __slots__ = ('table', 'columns', 'rows', 'start_offset', 'end_offset')
+
+    def __init__(self, table, columns, rows, start_offset, end_offset):
+        self.table = table
+        self.columns = columns
+        self.rows = rows
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+
+    def dicts(self):
+        if not self.columns:
+            raise DumpParseError(f"No column names known for `{self.table}`")
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+
+class DumpReader:
+    """
+    Потоковый читатель INSERT-инструкций mysqldump.
+    Имена колонок берутся из CREATE TABLE (если чтение идёт с начала) или из списка колонок INSERT.
+    """
+
+    def __init__(self, path, typed=True, encoding='utf-8'):
+        self.path = str(path)
+        self.typed = typed
+        self.encoding = encoding
+        self.columns = {}
+        self.size = os.path.getsize(self.path)
+
+    def _lines(self, start):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                yield offset, line
+                offset += len(line)
+
+    def statements(self, tables=None, start=0):
+        """
+        Генератор Statement для INSERT в таблицы `tables` (все, если None), начиная с байта start.
+        """
+        tables = set(tables) if tables else None
+        lines = self._lines(start)
+        for offset, line in lines:
+            create = _CREATE_RE.match(line)
+            if create:
+                self._read_create(create.group(1).decode(), lines)
+                continue
+            insert = _INSERT_RE.match(line)
+            if not insert:
+                continue
+            table = insert.group(1).decode()
+            end = offset + len(line)
+            chunks = [line]
+            # Инструкция может занимать несколько строк (не mysqldump-формат)
+            while not line.rstrip().endswith(b';'):
+                try:
+                    _, line = next(lines)
+                except StopIteration:
+                    break
+                end += len(line)
+                if tables is None or table in tables:
+                    chunks.append(line)
+            if tables is not None and table not in tables:
+                continue
+            yield self._parse(table, b''.join(chunks), offset, end)
+
+    def rows(self, table, start=0):
+        for statement in self.statements({table}, start=start):
+            yield from statement.rows
+
+    def _read_create(self, table, lines):
+        columns = []
+        for _, line in lines:
+            if line.startswith(b')'):
+                break
+            match = _COLUMN_RE.match(line)
+            if match:
+                columns.append(match.group(1).decode())
+        self.columns[table] = columns
+
+    def _parse(self, table, raw, start, end):
+        text = raw.decode(self.encoding, errors='replace')
+        columns = self.columns.get(table)
+        match = _COLUMN_LIST_RE.match(text)
+        if match:
+            columns = [c.strip().strip('`') for c in match.group(1).split(',')]
+        else:
+            match = _VALUES_RE.match(text)
+            if not match:
+                raise DumpParseError(f"Malformed INSERT for `{table}` at byte {start}")
+        try:
+            rows = parse_values(text, match.end(), typed=self.typed)
+        except DumpParseError as e:
+            raise DumpParseError(f"`{table}` at byte {start}: {e}") from e
+        return Statement(table, columns, rows, start, end)
+
+
+def table_rows(path, table, typed=False):
+    """
+    Все строки таблицы из дампа (генератор). По умолчанию значения как в старых парсерах: str/None.
+    """
+    return DumpReader(path, typed=typed).rows(table)
+
+
+class BulkLoader:
+    """
+    Пакетная запись объектов модели: bulk_create кусками batch_size.
+    С update_fields — upsert (ON CONFLICT (unique_fields) DO UPDATE), иначе конфликты пропускаются.
+    Сигналы save не вызываются.
+    """
+
+    def __init__(self, model, batch_size=1000, unique_fields=None, update_fields=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.unique_fields = unique_fields or ['id']
+        self.update_fields = update_fields
+        self.pending = []
+        self.count = 0
+
+    def add(self, obj):
+        if obj is not None:
+            self.pending.append(obj)
+
+    def flush(self):
+        if not self.pending:
+            return 0
+        objs, self.pending = self.pending, []
+        options = {'ignore_conflicts': True}
+        if self.update_fields:
+            options = {
+                'update_conflicts': True,
+                'unique_fields': self.unique_fields,
+                'update_fields': self.update_fields,
+            }
+        self.model._default_manager.bulk_create(objs, batch_size=self.batch_size, **options)
+        self.count += len(objs)
+        return len(objs)
+
+
+class Checkpoint:
+    """
+    Прогресс импорта: по JSON-файлу на таблицу (<path>.<table>.json) с {'offset', 'rows', 'done'}.
+    Отдельные файлы позволяют параллельным воркерам писать прогресс без гонок.
+    Прогресс привязан к размеру дампа — чужой/изменённый дамп начинается с нуля.
+    """
+
+    def __init__(self, path, dump_size, enabled=True):
+        self.path = str(path)
+        self.dump_size = dump_size
+        self.enabled = enabled
+        self.tables = {}
+
+    def _file(self, table):
+        return f'{self.path}.{table}.json'
+
+    def state(self, table):
+        if table not in self.tables:
+            state = {'offset': 0, 'rows': 0, 'done': False}
+            if self.enabled and os.path.exists(self._file(table)):
+                with open(self._file(table), encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('dump_size') == self.dump_size:
+                    state = data['state']
+            self.tables[table] = state
+        return self.tables[table]
+
+    def advance(self, table, offset, rows):
+        state = self.state(table)
+        self.tables[table] = {'offset': offset, 'rows': state['rows'] + rows, 'done': False}
+        self._save(table)
+
+    def finish(self, table):
+        self.tables[table] = {**self.state(table), 'done': True}
+        self._save(table)
+
+    def clear(self):
+        self.tables = {}
+        for path in glob.glob(f'{glob.escape(self.path)}.*.json'):
+            os.remove(path)
+
+    def _save(self, table):
+        if not self.enabled:
+            return
+        path = self._file(table)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'dump_size': self.dump_size, 'state': self.tables[table]}, f)
+        os.replace(tmp, path)
+
+
+class Throughput:
+    """
+    Счётчики строк/байт по таблицам и итоговый отчёт (строк/с, МБ/с).
+    """
+
+    def __init__(self):
+        self.tables = {}
+
+    def start(self, table):
+        self.tables[table] = {'rows': 0, 'bytes': 0, 'started': time.monotonic(), 'elapsed': 0.0}
+
+    def merge(self, table, stats):
+        """Счётчики таблицы, посчитанные в другом процессе (migrate_full_db --jobs)."""
+        self.tables[table] = stats
+
+    def add(self, table, rows, nbytes):
+        stats = self.tables[table]
+        stats['rows'] += rows
+        stats['bytes'] += nbytes
+        stats['elapsed'] = time.monotonic() - stats['started']
+
+    def line(self, table):
+        stats = self.tables[table]
+        elapsed = max(stats['elapsed'], 1e-6)
+        return (
+            f"{table}: {stats['rows']:,} rows in {stats['elapsed']:.1f}s "
+            f"({stats['rows'] / elapsed:,.0f} rows/s, {stats['bytes'] / elapsed / 1e6:.1f} MB/s)"
+        )
+
+    def report(self, wall=None):
+        """
+        wall — общее время выполнения; при параллельной загрузке оно меньше суммы по таблицам.
+        """
+        lines = [self.line(table) for table in self.tables]
+        rows = sum(s['rows'] for s in self.tables.values())
+        elapsed = wall if wall is not None else sum(s['elapsed'] for s in self.tables.values())
+        lines.append(f"TOTAL: {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-6):,.0f} rows/s)")
+        return lines
+
+
+def load_table(reader, table, build, loader, checkpoint=None, throughput=None, on_progress=None):
+    """
+    Загружает одну таблицу дампа: build(row) -> объект модели или None.
+    После каждой INSERT-инструкции объекты записываются, а смещение сохраняется в checkpoint.
+    """
+    state = checkpoint.state(table) if checkpoint else {'offset': 0, 'done': False}
+    if state['done']:
+        return 0
+    if throughput:
+        throughput.start(table)
+    loaded = 0
+    for statement in reader.statements({table}, start=state['offset']):
+        for row in statement.rows:
+            loader.add(build(row))
+        with transaction.atomic():
+            written = loader.flush()
+        loaded += written
+        if checkpoint:
+            checkpoint.advance(table, statement.end_offset, written)
+        if throughput:
+            throughput.add(table, written, statement.end_offset - statement.start_offset)
+        if on_progress:
+            on_progress(table, loaded)
+    if checkpoint:
+        checkpoint.finish(table)
+    return loaded
+
+
+def lookup_map(queryset, key='id', value='id'):
+    """
+    Словарь для FK-подстановки без запроса на строку: {key: value}.
+    """
+    return dict(queryset.values_list(key, value))
+
+
+def reset_sequences(*models):
+    """
+    Выравнивает последовательности PK после вставки с явными id.
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if not statements:
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
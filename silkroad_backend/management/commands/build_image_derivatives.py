@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from accounts.models import UserImage
+from hotels.models import Hotel, Sight
+from vendors.models import MediaFile, VendorImage
+from silkroad_backend import images as image_derivatives, response_cache
+
+SOURCES = ('users', 'vendors', 'sights', 'hotels', 'media')
+
+
+def _build(path, force):
+    try:
+        return path, image_derivatives.build(path, force=force), None
+    except (OSError, ValueError) as e:
+        return path, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Generates thumb/card/hero derivatives (WebP + JPEG) for existing uploaded and legacy images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', action='append', dest='sources', choices=SOURCES,
+                            help='Limit to this image source (can be repeated)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                            help='Pillow worker processes')
+        parser.add_argument('--async', action='store_true', dest='use_celery',
+                            help='Enqueue Celery tasks instead of generating locally')
+        parser.add_argument('--force', action='store_true', help='Rebuild existing derivatives')
+
+    def handle(self, *args, **options):
+        paths = sorted(self.collect(options['sources'] or SOURCES))
+        self.stdout.write(f"Images: {len(paths)}")
+
+        if options['use_celery']:
+            from silkroad_backend.tasks import generate_image_derivatives_task
+            for path in paths:
+                generate_image_derivatives_task.delay(path, force=options['force'])
+            self.stdout.write(self.style.SUCCESS(f"Enqueued {len(paths)} images"))
+            return
+
+        # Воркеры только читают/пишут файлы; реестр в кэше обновляет этот процесс
+        connections.close_all()
+        built = failed = 0
+        # fork: воркер наследует настроенный Django (в Python 3.14 по умолчанию forkserver — без django.setup())
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(_build, path, options['force']) for path in paths]
+            for done, future in enumerate(as_completed(futures), 1):
+                path, variants, error = future.result()
+                if error:
+                    failed += 1
+                    image_derivatives.mark_failed(path)
+                    self.stdout.write(self.style.WARNING(f"{path}: {error}"))
+                else:
+                    built += 1
+                    image_derivatives.register(path, variants, invalidate=False)
+                if done % 500 == 0:
+                    self.stdout.write(f"  {done}/{len(paths)}")
+        if built:
+            response_cache.invalidate('media')
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {built} images, {failed} failed"))
+
+    def collect(self, sources):
+        urls = []
+        if 'users' in sources:
+            urls += [f'/{name}' for name in UserImage.objects.exclude(image='').values_list('image', flat=True)]
+        if 'vendors' in sources:
+            urls += [f'/{name}' for name in VendorImage.objects.exclude(image='').values_list('image', flat=True)]
+        if 'sights' in sources:
+            for images in Sight.objects.exclude(images__isnull=True).exclude(images='').values_list('images', flat=True).iterator():
+                urls += Sight(images=images).get_images_list()
+        if 'hotels' in sources:
+            for images in Hotel.objects.exclude(images__isnull=True).exclude(images='').values_list('images', flat=True).iterator():
+                urls += Hotel(images=images).get_images_list()
+        if 'media' in sources:
+            # Legacy-галереи отелей (image_id / gallery) ссылаются на MediaFile
+            urls += [f'/{path.lstrip("/")}' for path in MediaFile.objects.exclude(file_path__isnull=True)
+                     .exclude(file_path='').values_list('file_path', flat=True)]
+        return {path for path in map(image_derivatives.media_path, urls) if path}
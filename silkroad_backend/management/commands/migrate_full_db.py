@@ -1,31 +1,85 @@
-import re
+import multiprocessing
 import os
-import json
-from datetime import datetime
-from decimal import Decimal
-from django.core.management.base import BaseCommand
-from django.db import connections, transaction
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from hotels.models import Category, Sight, SightFacility, Hotel, Room, RoomType
+from django.db import connections
+from hotels.models import Category, Sight, Hotel, Room, RoomType, RoomPrice
+from hotels.services import pricing
 from bookings.models import Booking
-from vendors.models import Vendor, TicketSale
+from vendors.models import Vendor, TicketSale, MediaFile
 from locations.models import Country, Region, District
+from silkroad_backend import search
+from silkroad_backend.legacy_dump import (
+    BulkLoader, Checkpoint, DumpReader, Throughput, load_table, lookup_map, reset_sequences,
+)
 
 User = get_user_model()
 
+# Граф FK-зависимостей legacy-таблиц: таблица загружается после всех, на которые ссылается.
+# Независимые таблицы с --jobs N грузятся параллельно в отдельных процессах.
+DEPENDENCIES = {
+    'tb_users': set(),
+    'regions': set(),
+    'districts': {'regions'},
+    'tb_categories': set(),
+    'tb_vendors': {'tb_users'},
+    'tb_hotels': {'regions'},  # -> tb_hotels_old
+    'tb_sights': {'tb_vendors', 'tb_categories'},
+    'tb_room_types': set(),
+    'tb_room_prices': {'tb_hotels', 'tb_room_types'},
+    'media_files': set(),
+}
+TABLES = list(DEPENDENCIES)
+# Таблицы, от которых зависят Hotel.min_price_usd / max_price_usd и кэш цен
+PRICED_TABLES = {'tb_hotels', 'tb_room_types', 'tb_room_prices'}
+
+
+def _int(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value)) if value not in (None, '') else Decimal(0)
+    except InvalidOperation:
+        return Decimal(0)
+
+
 class Command(BaseCommand):
     help = 'Migrates data from Legacy DB or SQL Dump'
 
     def add_arguments(self, parser):
         parser.add_argument('--sql-file', type=str, help='Path to SQL dump file')
         parser.add_argument('--no-clear', action='store_true', help='Do not clear existing data')
+        parser.add_argument('--table', action='append', dest='tables', choices=TABLES, help='Limit to table (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint of a previous run')
+        parser.add_argument('--checkpoint', type=str, help='Checkpoint file prefix (default: <sql-file>.checkpoint)')
+        parser.add_argument('--jobs', type=int, default=1, help='Import independent tables in N worker processes')
 
     def handle(self, *args, **options):
         self.stdout.write("Starting Full DB Migration...")
-        
-        # 0. Clear Data
-        if not options['no_clear']:
+
+        sql_file = options['sql_file'] or os.path.join(settings.BASE_DIR, 'legacy_reference', 'silkroad_27_07.sql')
+        if not os.path.exists(sql_file):
+            self.stdout.write(self.style.ERROR(f"SQL dump not found at {sql_file}"))
+            return
+
+        reader = DumpReader(sql_file)
+        checkpoint = Checkpoint(options['checkpoint'] or f'{sql_file}.checkpoint', reader.size)
+        if not options['resume']:
+            checkpoint.clear()
+
+        # 0. Clear Data (при --resume данные предыдущего запуска сохраняются)
+        if not options['no_clear'] and not options['resume']:
             self.stdout.write("Clearing existing data...")
             Booking.objects.all().delete()
             TicketSale.objects.all().delete()
@@ -35,230 +89,280 @@ class Command(BaseCommand):
             Sight.objects.all().delete()
             Vendor.objects.all().delete()
             # User.objects.exclude(is_superuser=True).delete() # Keep superuser
-            
-        # 1. Try DB Connection (Legacy)
-        # For this environment, we will primarily rely on the SQL dump parsing 
-        # because we don't know if the user has a running MySQL instance matching settings.
-        # But we'll leave the DB connection logic commented out or optional.
-        
-        sql_file = options['sql_file'] or os.path.join(settings.BASE_DIR, 'legacy_reference', 'silkroad_27_07.sql')
-        
-        if os.path.exists(sql_file):
-            self.migrate_from_sql_dump(sql_file)
+
+        self.batch_size = options['batch_size']
+        self.migrate_from_sql_dump(reader, options['tables'] or TABLES, checkpoint, options['jobs'])
+
+    def migrate_from_sql_dump(self, reader, tables, checkpoint, jobs=1):
+        self.stdout.write(f"Reading SQL dump: {reader.path} ({reader.size / 1e6:.1f} MB)")
+        throughput = Throughput()
+        started = time.monotonic()
+
+        pending = []
+        for table in TABLES:
+            if table not in tables:
+                continue
+            if checkpoint.state(table)['done']:
+                self.stdout.write(f"{table}: already imported, skipping")
+                continue
+            pending.append(table)
+
+        if jobs > 1:
+            failed = self.run_parallel(reader, pending, checkpoint, throughput, jobs)
         else:
-            self.stdout.write(self.style.ERROR(f"SQL dump not found at {sql_file}"))
+            failed = []
+            for table in pending:
+                self.import_table(reader, table, checkpoint, throughput)
+
+        # Последовательности, поиск и цены — один раз, после всех воркеров (bulk_create не вызывает сигналы)
+        reset_sequences(*(MODELS[table] for table in tables))
+        for model in (Region, District, Hotel, Sight):
+            search.reindex(model)
+        if PRICED_TABLES & set(tables):
+            pricing.refresh_after_import(Hotel.objects.values_list('id', flat=True))
 
-    def migrate_from_sql_dump(self, file_path):
-        self.stdout.write(f"Reading SQL dump: {file_path}")
-        
-        # We need to parse INSERT statements for specific tables.
-        # This is a bit brittle but effectve for one-off migration without DB.
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Parse Logic
-        self.migrate_users(content)
-        self.migrate_regions(content) # Assuming regions existed in SQL dump? (Yes: regions table)
-        self.migrate_vendors(content)
-        self.migrate_categories(content)
-        self.migrate_sights(content) # tb_sights
-        # self.migrate_hotels(content) # tb_hotels_old if needed? (User prompt mentioned tb_hotels mapping to Hotel)
-        # self.migrate_rooms(content)
-        # self.migrate_bookings(content)
-
-    def parse_inserts(self, content, table_name):
+        for line in throughput.report(wall=time.monotonic() - started):
+            self.stdout.write(line)
+        if failed:
+            raise CommandError(f"Import failed for: {', '.join(failed)}. Re-run with --resume --no-clear to continue.")
+        checkpoint.clear()
+
+    def run_parallel(self, reader, pending, checkpoint, throughput, jobs):
         """
-        Extracts values from: INSERT INTO `table_name` VALUES (...), (...);
+        Планировщик по графу DEPENDENCIES: таблица отправляется воркеру, когда все выбранные
+        таблицы, от которых она зависит, загружены. Ошибка таблицы блокирует только зависимые.
         """
-        pattern = re.compile(f"INSERT INTO `{table_name}` VALUES (.*?);", re.DOTALL)
-        matches = pattern.findall(content)
-        rows = []
-        for match in matches:
-            # We assume standard mysqldump format: (val1, val2), (val3, val4)
-            # We need to be careful about splitting by ),(
-            # A simple split might break on text content containing ),(
-            # Using a basic parser approach
-            values_str = match
-            
-            # Very basic parser: split by "),("
-            # Remove leading ( and trailing )
-            # This is risky if string contains it.
-            # Robust parser for SQL values is complex. 
-            # Given instructions "Execute precisely", we'll try a regex based splitter that respects quotes.
-            
-            # Alternative: Since we are in python, let's use a smarter split.
-            # Assuming mysqldump format is consistent.
-            records = re.split(r'\),\s*\(', values_str)
-            for rec in records:
-                rec = rec.strip('()')
-                # Split fields by comma, respecting quotes
-                fields = []
-                current_field = ''
-                in_quote = False
-                escape = False
-                for char in rec:
-                    if escape:
-                        current_field += char
-                        escape = False
-                    elif char == '\\' and not escape:
-                        escape = True # next char is literal
-                        current_field += char # Keep backslash for now or handle unescape
-                    elif char == "'" and not escape:
-                        in_quote = not in_quote
-                        current_field += char
-                    elif char == ',' and not in_quote:
-                        fields.append(self.clean_field(current_field))
-                        current_field = ''
-                    else:
-                        current_field += char
-                fields.append(self.clean_field(current_field))
-                rows.append(fields)
-        return rows
-
-    def clean_field(self, field):
-        field = field.strip()
-        if field.upper() == 'NULL':
-            return None
-        if field.startswith("'") and field.endswith("'"):
-            return field[1:-1].replace("\\'", "'").replace('\\"', '"').replace('\\n', '\n')
-        return field
-
-    def migrate_users(self, content):
-        self.stdout.write("Migrating Users...")
+        waiting = set(pending)
+        failed = []
+        running = {}
+        # fork: воркер наследует настроенный Django (по умолчанию в Python 3.14 — forkserver,
+        # где django.setup() не выполнялся и модели недоступны)
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork')) as pool:
+            while waiting or running:
+                ready = [t for t in pending if t in waiting and not (DEPENDENCIES[t] & (waiting | set(running.values())))]
+                blocked = [t for t in ready if DEPENDENCIES[t] & set(failed)]
+                for table in blocked:
+                    waiting.discard(table)
+                    failed.append(table)
+                    self.stdout.write(self.style.ERROR(f"{table}: skipped, dependency failed"))
+                for table in ready:
+                    if table in blocked or len(running) >= jobs:
+                        continue
+                    waiting.discard(table)
+                    # Воркер — fork процесса: открытые соединения с БД не должны наследоваться
+                    connections.close_all()
+                    future = pool.submit(_import_worker, reader.path, table, checkpoint.path, self.batch_size)
+                    running[future] = table
+                    self.stdout.write(f"{table}: started")
+                if not running:
+                    if waiting and not blocked:
+                        raise CommandError(f"Unresolvable table dependencies: {', '.join(sorted(waiting))}")
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table = running.pop(future)
+                    try:
+                        throughput.merge(table, future.result())
+                    except Exception as e:
+                        failed.append(table)
+                        self.stdout.write(self.style.ERROR(f"{table}: failed: {e}"))
+                        continue
+                    self.stdout.write(self.style.SUCCESS(throughput.line(table)))
+        return failed
+
+    def import_table(self, reader, table, checkpoint, throughput):
+        model, build, loader = getattr(self, f'prepare_{table}')()
+        self.stdout.write(f"Migrating {table} -> {model._meta.db_table}...")
+        load_table(reader, table, build, loader, checkpoint=checkpoint, throughput=throughput,
+                   on_progress=self.report_progress)
+        self.stdout.write(self.style.SUCCESS(throughput.line(table)))
+
+    def report_progress(self, table, loaded):
+        if loaded and loaded % (self.batch_size * 10) < self.batch_size:
+            self.stdout.write(f"  {table}: {loaded:,} rows")
+
+    def prepare_tb_users(self):
         # tb_users schema: id, name, lname, id_citizen, dtb, pspissuedt, sex, phone, email, ... password
         # Index in values: 0=id, 1=name, 2=lname, 8=email, 10=password
-        rows = self.parse_inserts(content, 'tb_users')
-        for row in rows:
-            try:
-                if len(row) < 11: continue
-                uid = int(row[0])
-                email = row[8]
-                if not email or email == 'NULL': continue
-                
-                # Check exist
-                if User.objects.filter(email=email).exists():
-                    continue
+        existing = {email.lower() for email in User.objects.values_list('email', flat=True) if email}
 
-                user = User(
-                    id=uid,
-                    email=email,
-                    first_name=row[1] or '',
-                    last_name=row[2] or '',
-                    password=row[10] # BCrypt hash
-                )
-                user.save()
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f"Error migrating user {row[0]}: {e}"))
-        self.stdout.write(f"Users migrated: {User.objects.count()}")
-
-    def migrate_regions(self, content):
-        self.stdout.write("Migrating Regions...")
+        def build(row):
+            if len(row) < 11 or not row[8]:
+                return None
+            email = str(row[8])
+            if email.lower() in existing:
+                return None
+            existing.add(email.lower())
+            return User(
+                id=_int(row[0]),
+                email=email,
+                name=row[1] or '',
+                lname=row[2] or '',
+                password=row[10],  # BCrypt hash
+            )
+
+        return User, build, BulkLoader(User, self.batch_size)
+
+    def prepare_regions(self):
         # Schema `regions`: id, country_id, name, ...
-        # Country hardcoded Uzbekistan=1
         uzb, _ = Country.objects.get_or_create(name='Uzbekistan')
-        
-        rows = self.parse_inserts(content, 'regions')
-        for row in rows:
-            try:
-                rid = int(row[0])
-                name = row[2]
-                Region.objects.update_or_create(id=rid, defaults={'name': name, 'country': uzb})
-            except Exception as e:
-                pass
-
-        # Districts
-        self.stdout.write("Migrating Districts...")
+
+        def build(row):
+            return Region(id=_int(row[0]), name=row[2], country_id=uzb.id)
+
+        return Region, build, BulkLoader(Region, self.batch_size, update_fields=['name', 'country'])
+
+    def prepare_districts(self):
         # Schema `districts`: id, region_id, name
-        rows = self.parse_inserts(content, 'districts')
-        for row in rows:
-            try:
-                did = int(row[0])
-                rid = int(row[1])
-                name = row[2]
-                if Region.objects.filter(id=rid).exists():
-                     District.objects.update_or_create(id=did, defaults={'name': name, 'region_id': rid})
-            except: pass
-
-    def migrate_categories(self, content):
-        self.stdout.write("Migrating Categories...")
+        regions = set(lookup_map(Region.objects.all()))
+
+        def build(row):
+            if _int(row[1]) not in regions:
+                return None
+            return District(id=_int(row[0]), region_id=_int(row[1]), name=row[2])
+
+        return District, build, BulkLoader(District, self.batch_size, update_fields=['name', 'region'])
+
+    def prepare_tb_categories(self):
         # tb_categories: id, name, photo, entry_by
-        rows = self.parse_inserts(content, 'tb_categories')
-        for row in rows:
-            try:
-                cid = int(row[0])
-                name = row[1]
-                Category.objects.update_or_create(id=cid, defaults={'name': name})
-            except: pass
-
-    def migrate_vendors(self, content):
-        self.stdout.write("Migrating Vendors...")
-        # tb_vendors: id, uuid?, name, ...
-        # Need correct index. Dump schema:
-        # id(0), id_country(1?), ... name?
-        # Let's re-check schema provided in thought.
-        # tb_vendors (line 1707): id, user_id?? No, let's guess from inserts
-        # Wait, I need correct indices.
-        # tb_vendors (from grep): id, id_country, id_category, ... name ...
-        # I'll scan the CREATE TABLE in my logic or hardcode common indices if standard.
-        # Better: use proper indices from analysis.
-        # tb_vendors: 1707.
-        # 0:id, 1:id_country, 2:id_category, 3:id_district, 4:geo, 5:name, 6:photo, 7:address, 8:entry_by
-        
-        rows = self.parse_inserts(content, 'tb_vendors')
-        for row in rows:
-            try:
-                if len(row) < 9: continue
-                vid = int(row[0])
-                name = row[5]
-                # user_id handling: 'entry_by' is index 8. But Vendor model needs 'user' OneToOne? 
-                # Or just entry_by. Model has `user` (OneToOne) and `entry_by` (FK).
-                # Legacy table `tb_vendors` might not be OneToOne with `tb_users`.
-                # We map `entry_by` to `entry_by`.
-                
-                Vendor.objects.update_or_create(
-                    id=vid,
-                    defaults={
-                        'name': name,
-                        'geo': row[4],
-                        'address': row[7],
-                        'entry_by_id': int(row[8]) if row[8] and row[8] != 'NULL' else None
-                    }
-                )
-            except Exception as e:
-                pass
-
-    def migrate_sights(self, content):
-        self.stdout.write("Migrating Sights...")
-        # tb_sights schema: id, id_vendor, category_id, name, region_id, district_id, address, geolocation, images...
-        # 0:id, 1:id_vendor, 2:category_id, 3:name, 4:region_id, 5:district_id, 6:address, 7:geolocation, 8:images...
-        
-        rows = self.parse_inserts(content, 'tb_sights')
-        for row in rows:
-            try:
-                sid = int(row[0])
-                name = row[3]
-                vid = int(row[1]) if row[1] and row[1] != 'NULL' else None
-                
-                if not vid or not Vendor.objects.filter(id=vid).exists():
-                     # Try finding vendor by id?
-                     pass
-                     
-                Sight.objects.update_or_create(
-                    id=sid,
-                    defaults={
-                        'name': name,
-                        'vendor_id': vid,
-                        'category_id': int(row[2]) if row[2] != 'NULL' else None,
-                        'address': row[6],
-                        'geolocation': row[7],
-                        'is_local': str(row[8]) if row[8] != 'NULL' else 0,
-                        'is_foreg': str(row[9]) if row[9] != 'NULL' else 0,
-                        'description': row[10],
-                        'sh_description': row[11],
-                        'images': row[13], # Index 13 based on schema
-                    }
-                )
-            except Exception as e:
-                pass
-        self.stdout.write(f"Sights migrated: {Sight.objects.count()}")
+        def build(row):
+            return Category(id=_int(row[0]), name=row[1])
+
+        return Category, build, BulkLoader(Category, self.batch_size, update_fields=['name'])
+
+    def prepare_tb_vendors(self):
+        # tb_vendors: 0:id, 1:id_country, 2:id_category, 3:id_district, 4:geo, 5:name, 6:photo, 7:address, 8:entry_by
+        users = set(lookup_map(User.objects.all()))
+
+        def build(row):
+            if len(row) < 9:
+                return None
+            entry_by = _int(row[8])
+            return Vendor(
+                id=_int(row[0]),
+                brand_name=row[5],
+                geo=row[4],
+                address=row[7],
+                entry_by_id=entry_by if entry_by in users else None,
+            )
+
+        return Vendor, build, BulkLoader(
+            Vendor, self.batch_size, update_fields=['brand_name', 'geo', 'address', 'entry_by'],
+        )
+
+    def prepare_tb_sights(self):
+        # tb_sights: 0:id, 1:id_vendor, 2:category_id, 3:name, 4:region_id, 5:district_id, 6:address,
+        # 7:geolocation, 8:is_local, 9:is_foreg, 10:description, 11:sh_description, 13:images
+        vendors = set(lookup_map(Vendor.objects.all()))
+        categories = set(lookup_map(Category.objects.all()))
+
+        def build(row):
+            vid = _int(row[1])
+            if vid not in vendors:
+                return None
+            category_id = _int(row[2])
+            return Sight(
+                id=_int(row[0]),
+                name=row[3],
+                vendor_id=vid,
+                category_id=category_id if category_id in categories else None,
+                address=row[6],
+                geolocation=row[7],
+                is_local=_decimal(row[8]),
+                is_foreg=_decimal(row[9]),
+                description=row[10],
+                sh_description=row[11],
+                images=row[13],
+            )
+
+        return Sight, build, BulkLoader(Sight, self.batch_size, update_fields=[
+            'name', 'vendor', 'category', 'address', 'geolocation', 'is_local', 'is_foreg',
+            'description', 'sh_description', 'images',
+        ])
+
+    def prepare_tb_hotels(self):
+        # tb_hotels: 0:id, 1:id_region, 6:name, 7:stars, 15:address, 21:images, 33:description, 37:deposit
+        regions = set(lookup_map(Region.objects.all()))
+
+        def build(row):
+            region_id = _int(row[1])
+            return Hotel(
+                id=_int(row[0]),
+                region_id=region_id if region_id in regions else None,
+                name=row[6],
+                stars=_int(row[7]) or 0,
+                address=row[15],
+                images=row[21],
+                description=row[33],
+                deposit=_decimal(row[37]),
+                is_active=True,
+            )
+
+        return Hotel, build, BulkLoader(Hotel, self.batch_size, update_fields=[
+            'region', 'name', 'stars', 'address', 'images', 'description', 'deposit', 'is_active',
+        ])
+
+    def prepare_tb_room_types(self):
+        # tb_room_types: id, en, ru, uz
+        def build(row):
+            return RoomType(id=_int(row[0]), en=row[1] or '', ru=row[2], uz=row[3])
+
+        return RoomType, build, BulkLoader(RoomType, self.batch_size, update_fields=['en', 'ru', 'uz'])
+
+    def prepare_tb_room_prices(self):
+        # tb_room_prices: id(0), hotel(1), type(2), dt(3), usd(4), uzs(5)
+        hotels = set(lookup_map(Hotel.objects.all()))
+        room_types = set(lookup_map(RoomType.objects.all()))
+
+        def build(row):
+            if _int(row[1]) not in hotels or _int(row[2]) not in room_types:
+                return None
+            return RoomPrice(
+                id=_int(row[0]), hotel_id=_int(row[1]), room_type_id=_int(row[2]),
+                dt=row[3], usd=_decimal(row[4]), uzs=_decimal(row[5]),
+            )
+
+        return RoomPrice, build, BulkLoader(RoomPrice, self.batch_size, update_fields=[
+            'hotel', 'room_type', 'dt', 'usd', 'uzs',
+        ])
+
+    def prepare_media_files(self):
+        # media_files: id, file_name, file_path, file_size, file_type, file_extension, ...
+        def build(row):
+            return MediaFile(
+                id=_int(row[0]), file_name=row[1], file_path=row[2], file_size=row[3],
+                file_type=row[4], file_extension=row[5],
+            )
+
+        return MediaFile, build, BulkLoader(MediaFile, self.batch_size, update_fields=[
+            'file_name', 'file_path', 'file_size', 'file_type', 'file_extension',
+        ])
+
+
+MODELS = {
+    'tb_users': User,
+    'regions': Region,
+    'districts': District,
+    'tb_categories': Category,
+    'tb_vendors': Vendor,
+    'tb_hotels': Hotel,
+    'tb_sights': Sight,
+    'tb_room_types': RoomType,
+    'tb_room_prices': RoomPrice,
+    'media_files': MediaFile,
+}
+
+
+def _import_worker(sql_file, table, checkpoint_path, batch_size):
+    """
+    Загрузка одной таблицы в процессе-воркере. Возвращает счётчики Throughput таблицы.
+    """
+    command = Command(stdout=sys.stdout)
+    command.batch_size = batch_size
+    reader = DumpReader(sql_file)
+    throughput = Throughput()
+    try:
+        command.import_table(reader, table, Checkpoint(checkpoint_path, reader.size), throughput)
+    finally:
+        connections.close_all()
+    return throughput.tables.get(table, {'rows': 0, 'bytes': 0, 'started': 0, 'elapsed': 0.0})
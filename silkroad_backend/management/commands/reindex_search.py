@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hotels.models import Hotel, Sight
+from locations.models import Region, District
+from silkroad_backend import search
+
+MODELS = {
+    'hotels': Hotel,
+    'sights': Sight,
+    'regions': Region,
+    'districts': District,
+}
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds full-text search columns (search_vector / search_text) for hotels, sights and locations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help=f"Limit to these indexes: {', '.join(MODELS)} (default: all)")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        names = options['models'] or list(MODELS)
+        unknown = set(names) - set(MODELS)
+        if unknown:
+            raise CommandError(f"Unknown index: {', '.join(sorted(unknown))}")
+        for name in names:
+            count = search.reindex(MODELS[name], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Reindexed {count} {name}"))
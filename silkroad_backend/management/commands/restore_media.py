@@ -1,37 +1,82 @@
 import os
-import shutil
+from pathlib import Path
+from collections import Counter
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from hotels.models import Sight
+from vendors.models import MediaFile
+from silkroad_backend.media_migration import CopyJob, MediaCopier
+
+PLACEHOLDER = '/home/mrnurali/.gemini/antigravity/brain/abaead10-79e4-4cde-9741-4d1ddf896194/silk_road_hero_1769096479411.png'
+
 
 class Command(BaseCommand):
-    help = 'Restore missing media files with placeholders'
+    help = 'Restore missing media files from the legacy storage (or with placeholders)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source-root', action='append', dest='source_roots', default=[],
+                            help='Legacy public/storage directory to copy originals from (repeatable)')
+        parser.add_argument('--placeholder', type=str, default=PLACEHOLDER,
+                            help='Image used when the original is not found (empty string: leave missing)')
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--manifest', type=str, help='Default: MEDIA_ROOT/.restore_media.jsonl')
+        parser.add_argument('--batch-size', type=int, default=1000)
 
     def handle(self, *args, **options):
-        # Source placeholder (Hero image)
-        # We assume it exists at the location we saved earlier
-        hero_path = '/home/mrnurali/.gemini/antigravity/brain/abaead10-79e4-4cde-9741-4d1ddf896194/silk_road_hero_1769096479411.png'
-        
-        if not os.path.exists(hero_path):
-             self.stdout.write(self.style.ERROR("Placeholder source not found"))
-             return
-
-        sights = Sight.objects.all()
-        count = 0
-        for sight in sights:
-            images = sight.get_images_list()
-            for img_url in images:
+        media_root = Path(settings.MEDIA_ROOT)
+        placeholder = options['placeholder']
+        if placeholder and not os.path.exists(placeholder):
+            self.stdout.write(self.style.ERROR("Placeholder source not found"))
+            return
+
+        missing = {}  # rel_path -> MediaFile id или None
+        for images in Sight.objects.exclude(images__isnull=True).exclude(images='').values_list('images', flat=True).iterator():
+            for img_url in Sight(images=images).get_images_list():
                 # img_url is like /media/images/permanent/...
-                # We need filesystem path: BASE_DIR + /media/ + ... (minus /media/ prefix)
-                
-                # Strip /media/
                 rel_path = img_url.replace('/media/', '', 1)
-                full_path = os.path.join(settings.MEDIA_ROOT, rel_path)
-                
-                if not os.path.exists(full_path):
-                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-                    shutil.copy(hero_path, full_path)
-                    self.stdout.write(f"Restored {rel_path}")
-                    count += 1
-        
-        self.stdout.write(self.style.SUCCESS(f"Restored {count} images"))
+                if rel_path and not img_url.startswith('http') and not (media_root / rel_path).exists():
+                    missing.setdefault(rel_path, None)
+        for media_id, rel_path in MediaFile.objects.exclude(file_path__isnull=True).exclude(file_path='').values_list('id', 'file_path').iterator():
+            rel_path = rel_path.lstrip('/')
+            if not (media_root / rel_path).exists():
+                missing[rel_path] = media_id
+
+        self.stdout.write(f"Missing files: {len(missing)}")
+        if not missing:
+            return
+
+        # Оригиналы ищутся в legacy-хранилищах; не найденные получают заглушку.
+        # Одинаковые файлы (и все заглушки) становятся жёсткими ссылками на одну копию.
+        roots = [Path(root) for root in options['source_roots']]
+        jobs = [
+            CopyJob(
+                key=media_id,
+                candidates=[root / rel_path for root in roots] + ([placeholder] if placeholder else []),
+                dest=rel_path,
+            )
+            for rel_path, media_id in missing.items()
+        ]
+        copier = MediaCopier(options['manifest'] or str(media_root / '.restore_media.jsonl'), workers=options['workers'])
+        results = copier.run(jobs, on_result=self.report)
+
+        # MediaFile: размер/расширение восстановленных файлов одним bulk_update
+        updates = [
+            MediaFile(id=result.job.key, file_size=str(result.size), file_extension=Path(result.dest).suffix.lstrip('.'))
+            for result in results
+            if result.job.key is not None and result.dest
+        ]
+        MediaFile.objects.bulk_update(updates, ['file_size', 'file_extension'], batch_size=options['batch_size'])
+
+        counts = Counter(result.status for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {len(results) - counts['missing'] - counts['error']} images ("
+            + ', '.join(f"{status}={count}" for status, count in sorted(counts.items())) + ')'
+        ))
+
+    def report(self, result):
+        if result.status == 'error':
+            self.stdout.write(self.style.ERROR(f"Failed {result.job.dest}: {result.error}"))
+        elif result.status == 'missing':
+            self.stdout.write(self.style.WARNING(f"Not found: {result.job.dest}"))
+        elif self.verbosity > 1:
+            self.stdout.write(f"Restored {result.job.dest} ({result.status})")
@@ -0,0 +1,175 @@
+"""
+Параллельный перенос legacy-файлов в MEDIA_ROOT с дедупликацией по содержимому.
+
+    copier = MediaCopier(manifest_path, workers=8)
+    results = copier.run([CopyJob(key, candidates, subfolder='vendor_photos'), ...])
+
+- Копирование идёт в пуле потоков (I/O отпускает GIL).
+- Файл адресуется по sha256: одинаковые фото (legacy-вендоры массово переиспользовали
+  одни и те же картинки) хранятся один раз — `<subfolder>/<aa>/<sha256><ext>`.
+  Если путь назначения задан явно (CopyJob.dest), он делается жёсткой ссылкой на уже
+  скопированный файл с тем же хэшем (копия, если ФС не поддерживает ссылки).
+- Manifest (JSON Lines) дописывается после каждого файла: повторный запуск пропускает
+  источники с тем же размером/mtime, чей файл назначения на месте, без повторного хэширования.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class CopyJob:
+    key: object                      # идентификатор для вызывающего кода (id сущности и т.п.)
+    candidates: list                 # возможные пути источника, берётся первый существующий
+    subfolder: str = 'legacy'        # для content-addressed пути
+    dest: str = None                 # фиксированный относительный путь назначения
+    meta: dict = field(default_factory=dict)
+
+
+@dataclass
+class CopyResult:
+    job: CopyJob
+    dest: str = None                 # относительный путь в MEDIA_ROOT
+    sha256: str = None
+    size: int = 0
+    status: str = 'copied'           # copied | linked | exists | skipped (по manifest) | missing | error
+    error: str = None
+
+
+class Manifest:
+    """
+    Журнал перенесённых файлов: JSON Lines {src, size, mtime, sha256, dest}.
+    """
+
+    def __init__(self, path, media_root):
+        self.path = Path(path) if path else None
+        self.media_root = Path(media_root)
+        self.entries = {}
+        self.by_hash = {}
+        if self.path and self.path.exists():
+            with self.path.open(encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._remember(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue  # недописанная строка после сбоя
+        self._file = self.path.open('a', encoding='utf-8') if self.path else None
+
+    def _remember(self, entry):
+        self.entries.setdefault(entry['src'], {})[entry['dest']] = entry
+        self.by_hash.setdefault(entry['sha256'], entry['dest'])
+
+    def lookup(self, src, stat, dest=None):
+        """
+        Запись для источника, если он не менялся и файл назначения существует.
+        """
+        for entry_dest, entry in self.entries.get(src, {}).items():
+            if dest is not None and entry_dest != dest:
+                continue
+            if entry['size'] == stat.st_size and entry['mtime'] == int(stat.st_mtime) \
+                    and (self.media_root / entry_dest).exists():
+                return entry
+        return None
+
+    def record(self, src, stat, sha256, dest):
+        entry = {'src': src, 'size': stat.st_size, 'mtime': int(stat.st_mtime), 'sha256': sha256, 'dest': dest}
+        self._remember(entry)
+        if self._file:
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class MediaCopier:
+    def __init__(self, manifest_path=None, workers=8, dry_run=False, media_root=None):
+        self.media_root = Path(media_root or settings.MEDIA_ROOT)
+        self.manifest = Manifest(manifest_path, self.media_root)
+        self.workers = workers
+        self.dry_run = dry_run
+        # sha256 -> путь, куда файл уже помещён (в т.ч. другим потоком в этом запуске)
+        self._placed = dict(self.manifest.by_hash)
+        self._lock = threading.Lock()
+
+    def run(self, jobs, on_result=None):
+        """
+        Выполняет задания в пуле потоков. Manifest пишется из вызывающего потока по мере готовности.
+        """
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                futures = {pool.submit(self._process, job): job for job in jobs}
+                for future in as_completed(futures):
+                    try:
+                        result, stat, src = future.result()
+                    except Exception as e:
+                        result, stat, src = CopyResult(futures[future], status='error', error=str(e)), None, None
+                    if result.status in ('copied', 'linked', 'exists') and not self.dry_run:
+                        self.manifest.record(src, stat, result.sha256, result.dest)
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+        finally:
+            self.manifest.close()
+        return results
+
+    def _process(self, job):
+        src = next((Path(p) for p in job.candidates if Path(p).is_file()), None)
+        if src is None:
+            return CopyResult(job, status='missing'), None, None
+        stat = src.stat()
+        entry = self.manifest.lookup(str(src), stat, job.dest)
+        if entry:
+            return CopyResult(job, dest=entry['dest'], sha256=entry['sha256'], size=stat.st_size, status='skipped'), stat, str(src)
+
+        sha256 = content_hash(src)
+        dest = job.dest or f"{job.subfolder}/{sha256[:2]}/{sha256}{src.suffix.lower()}"
+        result = CopyResult(job, dest=dest, sha256=sha256, size=stat.st_size)
+        if self.dry_run:
+            return result, stat, str(src)
+
+        target = self.media_root / dest
+        with self._lock:
+            existing = self._placed.get(sha256)
+            if existing is None:
+                self._placed[sha256] = dest
+        if target.exists():
+            result.status = 'exists'
+            return result, stat, str(src)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f'.{target.name}.{threading.get_ident()}.tmp')
+        origin = self.media_root / existing if existing and existing != dest else None
+        if origin is not None and origin.exists():
+            try:
+                os.link(origin, tmp)
+            except OSError:
+                shutil.copyfile(origin, tmp)
+            result.status = 'linked'
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, target)  # атомарно: прерванная копия не оставляет битый файл
+        return result, stat, str(src)
@@ -0,0 +1,143 @@
+"""
+Кэш ответов публичных API (списки/карточки отелей и достопримечательностей).
+
+Ключ: view + хост + язык + путь + нормализованные (отсортированные) GET-параметры.
+Инвалидация по тегам: каждый ответ помнит версии своих тегов ('hotels', 'hotel:<pk>',
+'regions', ...); сигналы (silkroad_backend.signals) увеличивают версии при записи моделей.
+
+Stale-while-revalidate: устаревшая (по времени или по версии тега) запись ещё
+STALE_TIMEOUT секунд отдаётся всем запросам, кроме одного — он под блокировкой
+пересчитывает ответ. Счётчики hit/stale/miss хранятся в Redis (stats()).
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.translation import get_language
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+FRESH_TIMEOUT = 60 * 5
+STALE_TIMEOUT = 60 * 30
+LOCK_TIMEOUT = 30
+
+STATS_KEY = 'respcache:stats'
+
+
+def _version_key(tag):
+    return f'respcache:tag:{tag}'
+
+
+def _versions(tags):
+    stored = cache.get_many([_version_key(t) for t in tags])
+    return tuple(stored.get(_version_key(t), 0) for t in tags)
+
+
+def invalidate(*tags):
+    """
+    Помечает устаревшими все ответы с любым из тегов.
+    """
+    for tag in tags:
+        key = _version_key(tag)
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate response cache tag {tag}: {e}")
+
+
+def _cache_key(view, request):
+    params = sorted((k, v) for k in request.query_params for v in request.query_params.getlist(k))
+    raw = '|'.join([
+        request.get_host(),
+        get_language() or '',
+        request.path,
+        '&'.join(f'{k}={v}' for k, v in params),
+    ])
+    return f'respcache:{type(view).__name__}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+def _count(view, outcome):
+    try:
+        from django_redis import get_redis_connection
+        get_redis_connection('default').hincrby(STATS_KEY, f'{type(view).__name__}:{outcome}', 1)
+    except Exception:
+        pass
+
+
+def stats():
+    """
+    {view: {'hit', 'stale', 'miss'}} по всем воркерам.
+    """
+    from django_redis import get_redis_connection
+
+    result = {}
+    for field, value in get_redis_connection('default').hgetall(STATS_KEY).items():
+        field = field.decode() if isinstance(field, bytes) else field
+        view, outcome = field.rsplit(':', 1)
+        result.setdefault(view, {'hit': 0, 'stale': 0, 'miss': 0})[outcome] = int(value)
+    return result
+
+
+def _respond(entry, outcome):
+    response = Response(entry['data'], status=entry['status'])
+    response['X-Cache'] = outcome
+    return response
+
+
+def cached_response(tags, timeout=FRESH_TIMEOUT, stale_timeout=STALE_TIMEOUT, bypass_params=()):
+    """
+    Декоратор метода get() APIView. tags — шаблоны с kwargs URL: ['hotels', 'hotel:{pk}'].
+    Кэшируются только ответы 200. Запросы с любым из bypass_params (например, фильтр
+    по наличию — бронирования не инвалидируют теги) идут мимо кэша.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if any(param in request.query_params for param in bypass_params):
+                response = method(view, request, *args, **kwargs)
+                response['X-Cache'] = 'BYPASS'
+                return response
+
+            tag_list = [tag.format(**kwargs) for tag in tags]
+            try:
+                key = _cache_key(view, request)
+                versions = _versions(tag_list)
+                entry = cache.get(key)
+            except Exception as e:
+                logger.warning(f"Response cache unavailable: {e}")
+                return method(view, request, *args, **kwargs)
+
+            if entry is not None:
+                if entry['versions'] == versions and time.time() < entry['fresh_until']:
+                    _count(view, 'hit')
+                    return _respond(entry, 'HIT')
+                # Устарело: пересчитывает только владелец блокировки, остальные получают старый ответ
+                try:
+                    locked = cache.add(f'{key}:lock', 1, timeout=LOCK_TIMEOUT)
+                except Exception:
+                    locked = True
+                if not locked:
+                    _count(view, 'stale')
+                    return _respond(entry, 'STALE')
+
+            _count(view, 'miss')
+            response = method(view, request, *args, **kwargs)
+            try:
+                if response.status_code == 200:
+                    cache.set(key, {
+                        'data': response.data,
+                        'status': response.status_code,
+                        'versions': versions,
+                        'fresh_until': time.time() + timeout,
+                    }, timeout=timeout + stale_timeout)
+                cache.delete(f'{key}:lock')
+            except Exception as e:
+                logger.warning(f"Failed to store cached response: {e}")
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
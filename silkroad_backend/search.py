@@ -0,0 +1,156 @@
+"""
+Единый полнотекстовый поиск (PostgreSQL tsvector + pg_trgm) по отелям,
+достопримечательностям и локациям на EN/RU/UZ.
+
+Каждая индексируемая модель хранит две колонки:
+    search_vector — tsvector с весами (A — названия, B — адрес/регион, C — описания);
+    search_text   — нормализованные названия и адреса для триграммного (опечатки) поиска.
+Колонки обновляются сигналами (silkroad_backend.signals) и командой reindex_search.
+"""
+import logging
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity,
+)
+from django.db import transaction
+from django.db.models import F, Q, Value
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = 'simple'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(_TOKEN_RE.findall((text or '').lower()))
+
+
+def _names(obj):
+    if obj is None:
+        return []
+    return [obj.name, getattr(obj, 'name_ru', None), getattr(obj, 'name_uz', None)]
+
+
+def hotel_document(hotel):
+    return {
+        'A': _names(hotel),
+        'B': [hotel.address, hotel.geolocation] + _names(hotel.region),
+        'C': [hotel.description, hotel.description_ru, hotel.description_uz],
+    }
+
+
+def sight_document(sight):
+    vendor_region = sight.vendor.region if sight.vendor_id and sight.vendor.region_id else None
+    return {
+        'A': _names(sight),
+        'B': [sight.address] + _names(sight.region) + _names(sight.district) + _names(vendor_region),
+        'C': [
+            sight.sh_description, sight.sh_description_ru, sight.sh_description_uz,
+            sight.description, sight.description_ru, sight.description_uz,
+        ],
+    }
+
+
+def region_document(region):
+    return {'A': _names(region), 'B': [], 'C': []}
+
+
+def district_document(district):
+    return {'A': _names(district), 'B': _names(district.region), 'C': []}
+
+
+DOCUMENTS = {
+    'hotels.hotel': (hotel_document, ('region',)),
+    'hotels.sight': (sight_document, ('region', 'district', 'vendor__region')),
+    'locations.region': (region_document, ()),
+    'locations.district': (district_document, ('region',)),
+}
+
+
+def _document_for(model):
+    return DOCUMENTS[model._meta.label_lower]
+
+
+def _join(parts):
+    return ' '.join(p.strip() for p in parts if p and p.strip())
+
+
+def document_values(document):
+    """
+    (tsvector expression, search_text) для одного документа.
+    """
+    vector = None
+    for weight in ('A', 'B', 'C'):
+        text = _join(document.get(weight, []))
+        part = SearchVector(Value(text), weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    search_text = normalize(_join(document.get('A', []) + document.get('B', [])))
+    return vector, search_text
+
+
+def index_instance(instance):
+    """
+    Обновляет поисковые колонки одной записи (UPDATE без сигналов save).
+    """
+    builder, _ = _document_for(type(instance))
+    vector, search_text = document_values(builder(instance))
+    type(instance)._default_manager.filter(pk=instance.pk).update(
+        search_vector=vector, search_text=search_text
+    )
+
+
+def reindex(model, queryset=None, batch_size=500):
+    """
+    Переиндексирует модель (или её queryset) пачками. Возвращает число записей.
+    """
+    builder, related = _document_for(model)
+    qs = queryset if queryset is not None else model._default_manager.all()
+    if related:
+        qs = qs.select_related(*related)
+    count = 0
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            for pk, vector, search_text in batch:
+                model._default_manager.filter(pk=pk).update(search_vector=vector, search_text=search_text)
+
+    for obj in qs.order_by('pk').iterator(chunk_size=batch_size):
+        vector, search_text = document_values(builder(obj))
+        batch.append((obj.pk, vector, search_text))
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    return count
+
+
+def prefix_query(term):
+    """
+    tsquery с префиксами: "samar buk" -> samar:* & buk:*
+    """
+    tokens = _TOKEN_RE.findall((term or '').lower())
+    if not tokens:
+        return None
+    return SearchQuery(' & '.join(f'{t}:*' for t in tokens), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search(queryset, term):
+    """
+    Фильтрует queryset по поисковому запросу и сортирует по релевантности.
+    Совпадение: полнотекстовое по префиксам ИЛИ триграммное (опечатки) по названиям/адресам.
+    """
+    term = (term or '').strip()
+    query = prefix_query(term)
+    if query is None:
+        return queryset
+    normalized = normalize(term)
+    return queryset.annotate(
+        search_rank=SearchRank(F('search_vector'), query) + TrigramWordSimilarity(normalized, 'search_text'),
+    ).filter(
+        Q(search_vector=query) | Q(search_text__trigram_word_similar=normalized)
+    ).order_by('-search_rank')
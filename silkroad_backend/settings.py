@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # CORS
     'corsheaders',
@@ -89,6 +90,8 @@ MIDDLEWARE = [
 # ───────────────────────────────────────────────
 
 ROOT_URLCONF = 'silkroad_backend.urls'
+# runserver / WSGI-серверы; продакшен — ASGI (silkroad_backend.asgi под uvicorn): WebSocket
+# уведомлений и SSE чата работают только там
 WSGI_APPLICATION = 'silkroad_backend.wsgi.application'
 
 # ───────────────────────────────────────────────
@@ -276,6 +279,16 @@ CLICKHOUSE_DATABASE = os.getenv('CLICKHOUSE_DATABASE')
 CLICKHOUSE_USERNAME = os.getenv('CLICKHOUSE_USERNAME')
 CLICKHOUSE_PASSWORD = os.getenv('CLICKHOUSE_PASSWORD')
 
+# Buffered analytics sink (analytics.sink): batch size and max buffered events per table
+ANALYTICS_SINK_BATCH_SIZE = int(os.getenv('ANALYTICS_SINK_BATCH_SIZE', 1000))
+ANALYTICS_SINK_MAX_BUFFER = int(os.getenv('ANALYTICS_SINK_MAX_BUFFER', 100000))
+ANALYTICS_SINK_FLUSH_INTERVAL = int(os.getenv('ANALYTICS_SINK_FLUSH_INTERVAL', 5))
+
+# In-process analytics queue (silkroad_backend.analytics): per-worker bound, events dropped beyond it
+ANALYTICS_QUEUE_SIZE = int(os.getenv('ANALYTICS_QUEUE_SIZE', 10000))
+ANALYTICS_QUEUE_BATCH_SIZE = int(os.getenv('ANALYTICS_QUEUE_BATCH_SIZE', 500))
+ANALYTICS_QUEUE_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_QUEUE_FLUSH_INTERVAL', 1.0))
+
 # AI Chatbot
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
@@ -353,6 +366,26 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Перенос проходов по билетам из Redis-индекса сканирования в БД (vendors.services.scan), секунды
+TICKET_SCAN_SYNC_INTERVAL = int(os.getenv('TICKET_SCAN_SYNC_INTERVAL', 30))
+# Сверка кэшированных счётчиков непрочитанных уведомлений с БД (notifications.unread), секунды
+NOTIFICATIONS_UNREAD_RECONCILE_INTERVAL = int(os.getenv('NOTIFICATIONS_UNREAD_RECONCILE_INTERVAL', 60 * 10))
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-clickhouse-buffer': {
+        'task': 'analytics.tasks.flush_clickhouse_buffer_task',
+        'schedule': ANALYTICS_SINK_FLUSH_INTERVAL,
+        'options': {'queue': 'analytics_queue'},
+    },
+    'sync-ticket-scans': {
+        'task': 'vendors.tasks.sync_ticket_scans_task',
+        'schedule': TICKET_SCAN_SYNC_INTERVAL,
+    },
+    'reconcile-unread-notifications': {
+        'task': 'notifications.tasks.reconcile_unread_counters_task',
+        'schedule': NOTIFICATIONS_UNREAD_RECONCILE_INTERVAL,
+    },
+}
 
 # Cache configuration (Redis)
 CACHES = {
@@ -364,3 +397,7 @@ CACHES = {
         }
     }
 }
+
+# Push-уведомления (notifications.realtime): 'redis' — pub/sub между воркерами, 'memory' — один процесс
+NOTIFICATIONS_REALTIME_BACKEND = os.getenv('NOTIFICATIONS_REALTIME_BACKEND', 'redis')
+NOTIFICATIONS_REALTIME_HEARTBEAT = int(os.getenv('NOTIFICATIONS_REALTIME_HEARTBEAT', 25))
@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import UserImage
+from hotels.models import Hotel, Sight, SightFacility, RoomPrice
+from locations.models import Region, District
+from vendors.models import MediaFile, VendorImage
+from silkroad_backend import search, response_cache
+from silkroad_backend import images as image_derivatives
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_save, sender=Sight)
+@receiver(post_save, sender=District)
+def search_index_instance(sender, instance, raw=False, **kwargs):
+    """
+    Обновляет поисковый документ записи после сохранения.
+    """
+    if raw:
+        return
+    search.index_instance(instance)
+
+
+@receiver(post_save, sender=Region)
+def search_index_region(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Названия региона входят в документы отелей, достопримечательностей и районов.
+    """
+    if raw:
+        return
+    search.index_instance(instance)
+    if created:
+        return
+    search.reindex(District, District.objects.filter(region=instance))
+    search.reindex(Hotel, Hotel.objects.filter(region=instance))
+    search.reindex(Sight, Sight.objects.filter(Q(region=instance) | Q(vendor__region=instance)))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def response_cache_hotel(sender, instance, **kwargs):
+    response_cache.invalidate('hotels', f'hotel:{instance.pk}')
+
+
+@receiver(post_save, sender=RoomPrice)
+@receiver(post_delete, sender=RoomPrice)
+def response_cache_room_price(sender, instance, **kwargs):
+    """
+    Цена "от" входит в список и карточку отеля.
+    """
+    response_cache.invalidate('hotels', f'hotel:{instance.hotel_id}')
+
+
+@receiver(post_save, sender=Sight)
+@receiver(post_delete, sender=Sight)
+def response_cache_sight(sender, instance, **kwargs):
+    response_cache.invalidate('sights', f'sight:{instance.pk}')
+
+
+@receiver(post_save, sender=SightFacility)
+@receiver(post_delete, sender=SightFacility)
+def response_cache_sight_facility(sender, instance, **kwargs):
+    response_cache.invalidate('sights', f'sight:{instance.sight_id}')
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+def response_cache_region(sender, instance, **kwargs):
+    response_cache.invalidate('regions')
+
+
+@receiver(post_save, sender=MediaFile)
+@receiver(post_delete, sender=MediaFile)
+def response_cache_media(sender, instance, **kwargs):
+    """
+    Legacy-изображения отелей ссылаются на MediaFile по ID из текстовых полей — сбрасываем все.
+    """
+    response_cache.invalidate('media')
+
+
+@receiver(post_save, sender=UserImage)
+@receiver(post_save, sender=VendorImage)
+def image_derivatives_generate(sender, instance, raw=False, **kwargs):
+    """
+    Производные загруженного фото строятся в Celery после коммита.
+    """
+    if raw or not instance.image:
+        return
+    path = instance.image.name
+    transaction.on_commit(lambda: image_derivatives.schedule(path))
+
+
+@receiver(post_delete, sender=UserImage)
+@receiver(post_delete, sender=VendorImage)
+def image_derivatives_delete(sender, instance, **kwargs):
+    if not instance.image:
+        return
+    path = instance.image.name
+    storage = instance.image.storage
+    for size in image_derivatives.SIZES:
+        for fmt in image_derivatives.FORMATS:
+            target = image_derivatives.derivative_path(path, size, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+    image_derivatives.forget(path)
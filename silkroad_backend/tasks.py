@@ -0,0 +1,21 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def generate_image_derivatives_task(path, force=False):
+    """
+    Генерирует thumb/card/hero (WebP + JPEG) для файла из MEDIA_ROOT.
+    """
+    from silkroad_backend import images
+
+    try:
+        variants = images.generate(path, force=force)
+    except (FileNotFoundError, OSError, ValueError) as e:
+        # OSError включает PIL.UnidentifiedImageError
+        images.mark_failed(path)
+        logger.warning(f"Image derivatives for {path} failed: {e}")
+        return
+    logger.info(f"Image derivatives for {path}: {', '.join(variants)}")
@@ -0,0 +1,105 @@
+"""
+Кэш ответов LLM на частые вопросы.
+
+Ключ — нормализованный вопрос (регистр, пунктуация, пробелы). Два уровня:
+LRU в памяти процесса и общий кэш (Redis) с TTL. Используется только для вопросов
+без контекста — первое сообщение диалога без вложений: ответ на него не зависит
+от истории, поэтому его можно отдавать другим пользователям.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+TIMEOUT = getattr(settings, 'CHATBOT_ANSWER_CACHE_TIMEOUT', 60 * 60 * 6)
+LOCAL_SIZE = getattr(settings, 'CHATBOT_ANSWER_CACHE_SIZE', 512)
+MAX_QUESTION_LENGTH = 200
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    """
+    'Where is  the HOTEL list?!' -> 'where is the hotel list'. Слишком короткие/длинные -> None.
+    """
+    normalized = _NON_WORD.sub(' ', (text or '').lower()).strip()
+    if len(normalized) < 3 or len(normalized) > MAX_QUESTION_LENGTH:
+        return None
+    return normalized
+
+
+def _key(question):
+    return f'chatbot:answer:{hashlib.sha1(question.encode()).hexdigest()}'
+
+
+class _LocalLRU:
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._items[key] = (time.monotonic() + timeout, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+local = _LocalLRU(LOCAL_SIZE)
+
+
+def get(question):
+    if not question:
+        return None
+    key = _key(question)
+    answer = local.get(key)
+    if answer is None:
+        try:
+            answer = cache.get(key)
+        except Exception:
+            answer = None
+        if answer is not None:
+            local.set(key, answer, TIMEOUT)
+    _count('hit' if answer is not None else 'miss')
+    return answer
+
+
+def put(question, answer):
+    if not question or not answer:
+        return
+    key = _key(question)
+    local.set(key, answer, TIMEOUT)
+    try:
+        cache.set(key, answer, timeout=TIMEOUT)
+    except Exception:
+        pass
+
+
+def _count(outcome):
+    # Те же счётчики, что у support_chatbot.llm.stats()
+    try:
+        from django_redis import get_redis_connection
+        from .llm import STATS_KEY
+        get_redis_connection('default').hincrby(STATS_KEY, f'answer_cache:outcome:{outcome}', 1)
+    except Exception:
+        pass
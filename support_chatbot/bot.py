@@ -0,0 +1,179 @@
+"""
+Ответы бота без LLM и подготовка контекста для LLM (support_chatbot.llm).
+
+Порядок для входящего сообщения:
+    1. support_joined()  — оператор уже в диалоге: бот молчит;
+    2. quick_reply()     — передача оператору и быстрые ссылки (приоритетнее LLM);
+    3. cached_answer()   — готовый ответ на частый вопрос без контекста (support_chatbot.answers);
+    4. LLM (llm.stream_reply / llm.complete) с окном истории history(), remember_answer();
+    5. offline_reply()   — правила, если ни один провайдер не ответил.
+
+Ключевые слова намерений — support_chatbot.intents (скомпилированы один раз на процесс).
+"""
+import logging
+import secrets
+
+from django.conf import settings
+
+from . import answers
+from .intents import offline_matcher, quick_matcher
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are a helpful assistant for SilkRoad.uz, a platform for hotels, tours, and travel in Uzbekistan."
+
+# Скользящее окно истории: не больше N сообщений и не больше M символов (самые свежие)
+HISTORY_MESSAGES = getattr(settings, 'CHATBOT_HISTORY_MESSAGES', 12)
+HISTORY_CHARS = getattr(settings, 'CHATBOT_HISTORY_CHARS', 6000)
+
+OFFLINE_REPLY = "I'm currently in 'Offline Mode' (Rule-Based). I can answer basic questions about hotels, tours, bookings, and visas. For complex queries, please click 'Human Support'."
+
+
+class TurnError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def start_turn(user_id, conversation_id, text, attachment=None, guest_token=None):
+    """
+    Находит/создаёт диалог и сохраняет сообщение пользователя.
+    Гостевой диалог продолжается только с guest_token, выданным при его создании.
+    Возвращает (conversation, user_message); TurnError(message, status) при ошибке.
+    """
+    if not text and not attachment:
+        raise TurnError('Message text or attachment is required', 400)
+
+    if conversation_id:
+        try:
+            conversation = Conversation.objects.get(id=conversation_id)
+        except (Conversation.DoesNotExist, ValueError):
+            raise TurnError('Conversation not found', 404)
+        # Диалог пользователя — только ему: в промпт попадает его история (history())
+        if conversation.user_id is not None and conversation.user_id != user_id:
+            raise TurnError('Permission denied', 403)
+        if conversation.user_id is None and not (
+            conversation.guest_token and secrets.compare_digest(conversation.guest_token, guest_token or '')
+        ):
+            raise TurnError('Permission denied', 403)
+    else:
+        conversation = Conversation.objects.create(
+            user_id=user_id, guest_token='' if user_id else secrets.token_urlsafe(32)
+        )
+
+    user_message = Message.objects.create(
+        conversation=conversation,
+        sender='user',
+        text=text,
+        attachment=attachment
+    )
+    return conversation, user_message
+
+
+def save_reply(conversation_id, text):
+    return Message.objects.create(conversation_id=conversation_id, sender='bot', text=text)
+
+
+def support_joined(conversation):
+    """
+    Оператор поддержки уже ответил в диалоге — бот больше не вмешивается.
+    Флаг Conversation.human_joined, без запроса к сообщениям.
+    """
+    return bool(conversation) and conversation.human_joined
+
+
+def quick_reply(user_text, conversation_id=None):
+    intent = quick_matcher.match(user_text)
+    if intent is None:
+        return None
+
+    if intent.name == 'human':
+        # Trigger Telegram Notification
+        try:
+            from .telegram_utils import send_telegram_notification
+            display_msg = f"🆘 <b>Support Request</b>\nUser: Guest\nMessage: {user_text}"
+            send_telegram_notification(display_msg, conversation_id)
+        except Exception as e:
+            logger.warning(f"Telegram fail: {e}")
+
+    return intent.reply
+
+
+def offline_reply(user_text, attachment=None):
+    # Image Fallback
+    if attachment:
+        if not user_text:
+            return "I received your file. A human agent will review it shortly."
+        return f"I see you attached a file with your message: '{user_text}'. Our support team will check it."
+
+    intent = offline_matcher.match(user_text)
+    return intent.reply if intent else OFFLINE_REPLY
+
+
+def _cache_question(messages, attachment):
+    # Кэшируется только первый вопрос диалога без вложения: ответ не зависит от контекста
+    if attachment or len(messages) != 2:
+        return None
+    return answers.normalize(messages[-1]['content'])
+
+
+def cached_answer(messages, attachment=None):
+    """
+    Готовый ответ LLM на такой же вопрос (messages — результат history()) или None.
+    """
+    return answers.get(_cache_question(messages, attachment))
+
+
+def remember_answer(messages, reply, attachment=None):
+    answers.put(_cache_question(messages, attachment), reply)
+
+
+def attachment_parts(attachment):
+    """
+    Вложение для LLM: (PIL-изображение или None, текстовая пометка или '').
+    """
+    if not attachment:
+        return None, ''
+    content_type = getattr(attachment, 'content_type', '') or ''
+    if content_type.startswith('image/'):
+        try:
+            from PIL import Image
+            attachment.seek(0)
+            image = Image.open(attachment)
+            image.load()
+            return image, ''
+        except Exception as e:
+            logger.warning(f"Error processing image: {e}")
+            return None, "\n[User sent an image that could not be processed]"
+    return None, f"\n[User sent a file: {attachment.name}]"
+
+
+def history(conversation_id, note=''):
+    """
+    Сообщения для LLM: системный промпт + последние сообщения диалога (OpenAI-формат).
+    Включает только что сохранённое сообщение пользователя; note дописывается к нему.
+    """
+    recent = list(
+        Message.objects.filter(conversation_id=conversation_id)
+        .exclude(text__isnull=True).exclude(text='')
+        .order_by('-timestamp', '-id').values_list('sender', 'text')[:HISTORY_MESSAGES]
+    )
+    messages = []
+    used = 0
+    for sender, text in recent:
+        if messages and used + len(text) > HISTORY_CHARS:
+            break
+        used += len(text)
+        if sender == 'user':
+            messages.append({'role': 'user', 'content': text})
+        else:
+            messages.append({'role': 'assistant', 'content': text if sender == 'bot' else f"(Support agent) {text}"})
+    messages.reverse()
+
+    if note:
+        if messages and messages[-1]['role'] == 'user':
+            messages[-1] = {'role': 'user', 'content': messages[-1]['content'] + note}
+        else:
+            messages.append({'role': 'user', 'content': note.strip()})
+    return [{'role': 'system', 'content': SYSTEM_PROMPT}] + messages
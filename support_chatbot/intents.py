@@ -0,0 +1,73 @@
+"""
+Намерения бота (EN/RU/UZ) и их компиляция в один регулярный автомат на группу.
+
+Совпадение — вхождение ключевого слова как подстроки (как прежний any(k in text)).
+Каждое намерение группы имеет приоритет (порядок в списке); при нескольких совпадениях
+выигрывает самое приоритетное. Автомат: `(?=(kw1|kw2|...))` — проверка в каждой позиции
+за один проход по тексту, ключевые слова отсортированы по приоритету намерения, так что
+в каждой позиции первой срабатывает альтернатива самого приоритетного намерения.
+Компилируется один раз при импорте модуля (на процесс).
+"""
+import re
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    keywords: tuple
+    reply: str
+
+
+# До LLM: передача оператору и быстрые ссылки
+QUICK_INTENTS = [
+    Intent('human', (
+        'human', 'operator', 'agent', 'support', 'help', 'problem', 'error',  # EN
+        'оператор', 'поддерж', 'помощ', 'проблем', 'ошибк',  # RU
+        'operator', 'yordam', 'muammo', 'xato',  # UZ
+    ), "I have notified our support team. They will contact you shortly."),
+    Intent('hotels', ('hotel', 'stay', 'accommodation'), "You can find our best hotels here: [Find Hotels](/hotels)"),
+    Intent('tours', ('tour', 'trip', 'guide'), "Explore our guided tours here: [Find Tours](/tours)"),
+]
+
+# После LLM (офлайн-режим)
+OFFLINE_INTENTS = [
+    Intent('greeting', ('hello', 'hi', 'hey', 'greetings'), "Hello! Welcome to SilkRoad Support. How can I assist you today?"),
+    Intent('price', ('price', 'cost', 'expensive', 'cheap'), "Our prices are very competitive! You can check specific hotel or tour prices on their respective pages."),
+    Intent('booking', ('book', 'reservation', 'schedule'), "You can make a booking directly through our website. Just visit the Hotel or Tour page and click 'Book Now'."),
+    Intent('transport', ('taxi', 'cab', 'transport'), "Need a ride? Our Cab service is available 24/7. You can book one from the 'Cabs' page."),
+    Intent('visa', ('visa', 'passport', 'entry'), "For visa information, please check our 'Visa' page where we list requirements for different countries."),
+    Intent('thanks', ('thank', 'thanks'), "You're welcome! Let me know if you need anything else."),
+    Intent('bye', ('bye', 'goodbye'), "Goodbye! Have a great day!"),
+]
+
+
+class IntentMatcher:
+    def __init__(self, intents):
+        self.intents = list(intents)
+        self._priority = {}
+        for priority, intent in enumerate(self.intents):
+            for keyword in intent.keywords:
+                self._priority.setdefault(keyword.lower(), priority)
+        # Внутри одного приоритета длинные слова раньше (на результат не влияет, но короче поиск)
+        ordered = sorted(self._priority, key=lambda k: (self._priority[k], -len(k)))
+        self._pattern = re.compile('(?=(' + '|'.join(map(re.escape, ordered)) + '))')
+
+    def match(self, text):
+        """
+        Самое приоритетное намерение, ключевое слово которого входит в text, или None.
+        """
+        if not text:
+            return None
+        best = None
+        for found in self._pattern.finditer(text.lower()):
+            priority = self._priority[found.group(1)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self.intents[best] if best is not None else None
+
+
+quick_matcher = IntentMatcher(QUICK_INTENTS)
+offline_matcher = IntentMatcher(OFFLINE_INTENTS)
@@ -0,0 +1,317 @@
+"""
+Асинхронный LLM-конвейер чата (ASGI).
+
+    async for chunk in llm.stream_reply(messages, image=None):
+        ...
+    text = await llm.complete(messages)      # весь ответ строкой или None
+
+- Оборванный на середине поток не бросает исключение — вызывающий код получает уже
+  выданную часть; state['complete'] (если передан словарь state) — дошёл ли ответ до конца.
+
+- Провайдеры по приоритету: Open WebUI (OpenAI-совместимый стриминг) и Gemini.
+- HTTP-клиент httpx.AsyncClient с пулом соединений — один на event loop, переиспользуется
+  и закрывается, когда loop сворачивается. Sync-код (ChatBotView под WSGI) вызывает
+  конвейер через run_sync() — в одном фоновом loop процесса, а не в новом на каждый запрос.
+- Гонка под бюджет задержки: первый провайдер стартует сразу; если он не выдал первый
+  токен за CHATBOT_LLM_HEDGE секунд (или упал), стартует следующий. Побеждает первый,
+  выдавший токен; остальные отменяются. Нет токена за CHATBOT_LLM_BUDGET — None/пустой
+  поток, вызывающий код отвечает правилами (support_chatbot.bot.offline_reply).
+- Гистограммы задержки (до первого токена и полного ответа) и исходы по провайдерам
+  копятся в Redis — stats().
+"""
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BUDGET = getattr(settings, 'CHATBOT_LLM_BUDGET', 8.0)
+HEDGE_DELAY = getattr(settings, 'CHATBOT_LLM_HEDGE', 1.5)
+IDLE_TIMEOUT = getattr(settings, 'CHATBOT_LLM_IDLE_TIMEOUT', 20.0)
+
+# Верхние границы корзин гистограммы, мс (последняя — "+Inf")
+BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+STATS_KEY = 'chatbot:llm:stats'
+
+_clients = {}
+_closers = {}
+
+_background = None  # (pid, loop)
+_background_lock = threading.Lock()
+
+
+async def _close_with_loop(client):
+    """
+    Ждёт, пока loop не начнёт сворачиваться: asyncio.run / asgiref / uvicorn отменяют
+    оставшиеся задачи — тогда клиент закрывается, пока его loop ещё жив.
+    """
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.aclose()
+
+
+def http_client():
+    """
+    Общий httpx.AsyncClient текущего event loop (keep-alive пул).
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    for other in [other for other in _clients if other.is_closed()]:
+        _clients.pop(other, None)
+        _closers.pop(other, None)
+    if loop not in _clients:
+        _clients[loop] = httpx.AsyncClient(
+            timeout=httpx.Timeout(IDLE_TIMEOUT, connect=3.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        _closers[loop] = loop.create_task(_close_with_loop(_clients[loop]))
+    return _clients[loop]
+
+
+def _background_loop():
+    global _background
+    with _background_lock:
+        # После fork (gunicorn, Celery prefork) поток loop родителя не существует
+        if _background is None or _background[0] != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='chatbot-llm', daemon=True).start()
+            _background = (os.getpid(), loop)
+        return _background[1]
+
+
+async def _close_background_client():
+    closer = _closers.pop(asyncio.get_running_loop(), None)
+    if closer is not None:
+        closer.cancel()
+        await asyncio.gather(closer, return_exceptions=True)
+
+
+@atexit.register
+def _stop_background_loop():
+    if _background is None or _background[0] != os.getpid() or not _background[1].is_running():
+        return
+    loop = _background[1]
+    try:
+        asyncio.run_coroutine_threadsafe(_close_background_client(), loop).result(timeout=5)
+    except Exception:
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def run_sync(coroutine):
+    """
+    Выполняет корутину конвейера из sync-кода в фоновом event loop процесса:
+    один httpx-клиент и пул соединений на все sync-запросы воркера.
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, _background_loop()).result()
+
+
+class OpenWebUIProvider:
+    name = 'open_webui'
+
+    def enabled(self):
+        return bool(getattr(settings, 'OPEN_WEBUI_API_KEY', None))
+
+    async def stream(self, messages, image=None):
+        if image is not None and messages[-1]['role'] != 'user':
+            messages = messages + [{'role': 'user', 'content': '[User sent an image]'}]
+        payload = {'model': settings.OPEN_WEBUI_MODEL, 'messages': messages, 'stream': True}
+        headers = {'Authorization': f"Bearer {settings.OPEN_WEBUI_API_KEY}"}
+        url = f"{settings.OPEN_WEBUI_URL}/api/chat/completions"
+        async with http_client().stream('POST', url, json=payload, headers=headers) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                choices = json.loads(data).get('choices') or [{}]
+                chunk = (choices[0].get('delta') or {}).get('content')
+                if chunk:
+                    yield chunk
+
+
+class GeminiProvider:
+    name = 'gemini'
+
+    def __init__(self):
+        self._model = None
+
+    def enabled(self):
+        return bool(getattr(settings, 'GEMINI_API_KEY', None))
+
+    def model(self):
+        if self._model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=settings.GEMINI_API_KEY)
+            self._model = genai.GenerativeModel('gemini-1.5-flash')
+        return self._model
+
+    async def stream(self, messages, image=None):
+        system = '\n'.join(m['content'] for m in messages if m['role'] == 'system')
+        contents = [
+            {'role': 'user' if m['role'] == 'user' else 'model', 'parts': [m['content']]}
+            for m in messages if m['role'] != 'system'
+        ]
+        if contents and system:
+            contents[0]['parts'].insert(0, system)
+        if image is not None:
+            if contents and contents[-1]['role'] == 'user':
+                contents[-1]['parts'].append(image)
+            else:
+                contents.append({'role': 'user', 'parts': [image]})
+        response = await self.model().generate_content_async(contents, stream=True)
+        async for chunk in response:
+            text = getattr(chunk, 'text', '')
+            if text:
+                yield text
+
+
+PROVIDERS = [OpenWebUIProvider(), GeminiProvider()]
+
+
+async def _first_chunk(stream):
+    return await stream.__anext__()
+
+
+async def _close(stream):
+    try:
+        await stream.aclose()
+    except Exception:
+        pass
+
+
+async def stream_reply(messages, image=None, budget=BUDGET, hedge=HEDGE_DELAY, providers=None, state=None):
+    """
+    Поток фрагментов ответа от самого быстрого провайдера. Пустой — если никто не успел.
+    state — словарь: после потока state['complete'] = True, только если ответ не оборвался.
+    """
+    if state is not None:
+        state['complete'] = False
+    providers = [p for p in (PROVIDERS if providers is None else providers) if p.enabled()]
+    if not providers:
+        return
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    deadline = started_at + budget
+    queue = list(providers)
+    racing = {}  # task -> (provider, stream, started)
+    outcomes = []
+
+    def launch():
+        provider = queue.pop(0)
+        stream = provider.stream(messages, image)
+        racing[asyncio.ensure_future(_first_chunk(stream))] = (provider, stream, loop.time())
+        return loop.time() + hedge
+
+    winner = None
+    next_launch = launch()
+    try:
+        while racing and winner is None:
+            wake = min(deadline, next_launch) if queue else deadline
+            done, _ = await asyncio.wait(list(racing), timeout=max(0, wake - loop.time()),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider, stream, started = racing.pop(task)
+                try:
+                    first = task.result()
+                except Exception as e:  # включая StopAsyncIteration (пустой ответ)
+                    logger.warning(f"LLM provider {provider.name} failed: {e!r}")
+                    outcomes.append((provider.name, 'error', None, None))
+                    await _close(stream)
+                    if queue and loop.time() < deadline:
+                        next_launch = launch()
+                    continue
+                if winner is None:
+                    winner = (provider, stream, started, first)
+                else:
+                    await _close(stream)
+            if winner is None and loop.time() >= deadline:
+                break
+            if winner is None and queue and loop.time() >= next_launch:
+                next_launch = launch()
+    finally:
+        for task, (provider, stream, _) in racing.items():
+            task.cancel()
+            outcomes.append((provider.name, 'timeout' if winner is None else 'cancelled', None, None))
+        for task, (_, stream, _) in racing.items():
+            try:
+                await task
+            except BaseException:
+                pass
+            await _close(stream)
+        racing.clear()
+
+    if winner is None:
+        await _record(outcomes)
+        return
+
+    provider, stream, started, first = winner
+    first_ms = (loop.time() - started) * 1000
+    outcome = 'won'
+    try:
+        yield first
+        while True:
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), IDLE_TIMEOUT)
+            except StopAsyncIteration:
+                break
+            yield chunk
+    except (asyncio.TimeoutError, Exception) as e:
+        logger.warning(f"LLM provider {provider.name} broke mid-stream: {e!r}")
+        outcome = 'broken'
+    finally:
+        await _close(stream)
+        outcomes.append((provider.name, outcome, first_ms, (loop.time() - started) * 1000))
+        if state is not None:
+            state['complete'] = outcome == 'won'
+        await _record(outcomes)
+
+
+async def complete(messages, image=None, **kwargs):
+    chunks = [chunk async for chunk in stream_reply(messages, image, **kwargs)]
+    return ''.join(chunks) or None
+
+
+def _bucket(ms):
+    index = bisect_left(BUCKETS, ms)
+    return str(BUCKETS[index]) if index < len(BUCKETS) else 'inf'
+
+
+@sync_to_async(thread_sensitive=False)
+def _record(outcomes):
+    try:
+        from django_redis import get_redis_connection
+        pipe = get_redis_connection('default').pipeline(transaction=False)
+        for name, outcome, first_ms, total_ms in outcomes:
+            pipe.hincrby(STATS_KEY, f'{name}:outcome:{outcome}', 1)
+            if first_ms is not None:
+                pipe.hincrby(STATS_KEY, f'{name}:first_token:{_bucket(first_ms)}', 1)
+                pipe.hincrby(STATS_KEY, f'{name}:total:{_bucket(total_ms)}', 1)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def stats():
+    """
+    {provider: {'outcome': {...}, 'first_token': {bucket_ms: n}, 'total': {bucket_ms: n}}}.
+    """
+    from django_redis import get_redis_connection
+
+    result = {}
+    for field, value in get_redis_connection('default').hgetall(STATS_KEY).items():
+        field = field.decode() if isinstance(field, bytes) else field
+        name, kind, label = field.split(':', 2)
+        result.setdefault(name, {'outcome': {}, 'first_token': {}, 'total': {}})[kind][label] = int(value)
+    return result
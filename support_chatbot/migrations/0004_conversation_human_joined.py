@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+def backfill_human_joined(apps, schema_editor):
+    Conversation = apps.get_model('support_chatbot', 'Conversation')
+    Message = apps.get_model('support_chatbot', 'Message')
+    joined = Message.objects.filter(sender='support').values('conversation_id')
+    Conversation.objects.filter(id__in=joined).update(human_joined=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support_chatbot', '0003_alter_message_sender'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='human_joined',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_human_joined, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support_chatbot', '0004_conversation_human_joined'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='guest_token',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -11,6 +11,10 @@ class Conversation(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
+    # Оператор поддержки ответил в диалоге — бот больше не вмешивается (ставит Message.save)
+    human_joined = models.BooleanField(default=False)
+    # Гостевой диалог (без user) продолжает только тот, кому токен выдан при создании
+    guest_token = models.CharField(max_length=64, blank=True, default='')
 
     def __str__(self):
         return f"Conversation {self.id} - {'User: ' + str(self.user) if self.user else 'Guest'}"
@@ -35,5 +39,11 @@ class Message(models.Model):
     class Meta:
         ordering = ['timestamp']
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        if is_new and self.sender == 'support':
+            Conversation.objects.filter(pk=self.conversation_id, human_joined=False).update(human_joined=True)
+
     def __str__(self):
         return f"{self.sender}: {self.text[:50]}"
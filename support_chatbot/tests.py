@@ -1,3 +1,192 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from support_chatbot import answers, bot, llm
+from support_chatbot.intents import offline_matcher, quick_matcher
+from support_chatbot.models import Conversation, Message
+
+
+class FakeProvider:
+    def __init__(self, name, delay, chunks, fail=False, break_after=None):
+        self.name, self.delay, self.chunks, self.fail = name, delay, chunks, fail
+        self.break_after = break_after
+        self.closed = False
+
+    def enabled(self):
+        return True
+
+    async def stream(self, messages, image=None):
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError('provider down')
+            for index, chunk in enumerate(self.chunks):
+                if index == self.break_after:
+                    raise RuntimeError('connection reset')
+                yield chunk
+        finally:
+            self.closed = True
+
+
+class LLMRaceTest(SimpleTestCase):
+    def complete(self, providers, **kwargs):
+        return asyncio.run(llm.complete([], providers=providers, **kwargs))
+
+    def test_primary_wins_within_hedge_delay(self):
+        self.assertEqual(self.complete([FakeProvider('a', 0.01, ['Hel', 'lo']), FakeProvider('b', 0, ['x'])], hedge=0.5), 'Hello')
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        slow = FakeProvider('a', 1, ['slow'])
+        self.assertEqual(self.complete([slow, FakeProvider('b', 0.01, ['fast'])], hedge=0.05), 'fast')
+        self.assertTrue(slow.closed)
+
+    def test_failure_falls_back_immediately_and_budget_gives_up(self):
+        self.assertEqual(self.complete([FakeProvider('a', 0, [], fail=True), FakeProvider('b', 0.01, ['ok'])], hedge=5), 'ok')
+        self.assertIsNone(self.complete([FakeProvider('a', 1, ['late'])], budget=0.05))
+
+    def test_broken_stream_returns_partial_text_marked_incomplete(self):
+        state = {}
+        self.assertEqual(self.complete([FakeProvider('a', 0, ['Regi', 'stan'], break_after=1)], state=state), 'Regi')
+        self.assertFalse(state['complete'])
+        self.assertEqual(self.complete([FakeProvider('a', 0, ['Regi', 'stan'])], state=state), 'Registan')
+        self.assertTrue(state['complete'])
+
+
+class LLMClientTest(SimpleTestCase):
+    def test_client_is_shared_per_loop_and_closed_with_it(self):
+        async def client():
+            return llm.http_client()
+
+        transient = asyncio.run(client())
+        self.assertTrue(transient.is_closed)
+        # Sync-вызовы (WSGI) идут через один фоновый loop — клиент и пул общие
+        shared = llm.run_sync(client())
+        self.assertIs(llm.run_sync(client()), shared)
+        self.assertFalse(shared.is_closed)
+
+
+class ChatHistoryTest(TestCase):
+    def test_rolling_window_keeps_newest_messages(self):
+        conversation = Conversation.objects.create()
+        for n in range(20):
+            Message.objects.create(conversation=conversation, sender='user' if n % 2 else 'bot', text=f"m{n}")
+        Message.objects.create(conversation=conversation, sender='support', text="agent here")
+
+        messages = bot.history(conversation.id, note="\n[User sent a file: a.pdf]")
+
+        self.assertEqual(messages[0]['role'], 'system')
+        self.assertEqual(len(messages), 2 + bot.HISTORY_MESSAGES)  # system + окно + пометка о файле
+        self.assertEqual(messages[-1], {'role': 'user', 'content': "[User sent a file: a.pdf]"})
+        self.assertEqual(messages[-2], {'role': 'assistant', 'content': "(Support agent) agent here"})
+
+    @override_settings(OPEN_WEBUI_API_KEY=None, GEMINI_API_KEY=None)
+    def test_send_falls_back_to_rules_without_providers(self):
+        response = self.client.post('/api/chat/send/', {'text': 'hello there'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['bot_message'].startswith("Hello! Welcome"))
+        self.assertEqual(Message.objects.filter(sender='bot').count(), 1)
+
+
+class IntentMatcherTest(SimpleTestCase):
+    def test_priority_matches_rule_order(self):
+        # 'support' (передача оператору) приоритетнее 'hotel', 'hi' приоритетнее 'price'
+        self.assertEqual(quick_matcher.match('Hotel booking problem').name, 'human')
+        self.assertEqual(quick_matcher.match('Нужна ПОМОЩЬ').name, 'human')
+        self.assertEqual(quick_matcher.match('any trips?').name, 'tours')
+        self.assertEqual(offline_matcher.match('what is the price, hi').name, 'greeting')
+        self.assertIsNone(offline_matcher.match('xyz'))
+        self.assertIsNone(quick_matcher.match(''))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AnswerCacheTest(TestCase):
+    def setUp(self):
+        answers.local.clear()
+
+    def test_repeated_question_skips_llm(self):
+        messages = [{'role': 'system', 'content': bot.SYSTEM_PROMPT}, {'role': 'user', 'content': 'What is Samarkand famous for?'}]
+        self.assertIsNone(bot.cached_answer(messages))
+        bot.remember_answer(messages, 'Registan.')
+
+        same = [messages[0], {'role': 'user', 'content': '  what is SAMARKAND famous for'}]
+        self.assertEqual(bot.cached_answer(same), 'Registan.')
+        answers.local.clear()
+        self.assertEqual(bot.cached_answer(same), 'Registan.')  # из общего кэша
+
+        # С контекстом или вложением — не кэшируется
+        self.assertIsNone(bot.cached_answer(messages + [{'role': 'user', 'content': 'and Bukhara?'}]))
+        self.assertIsNone(bot.cached_answer(same, attachment=object()))
+
+    def test_send_uses_cached_answer(self):
+        def reply(messages, image, state):
+            state['complete'] = True
+            return 'Registan.'
+
+        with mock.patch.object(llm, 'complete', mock.AsyncMock(side_effect=reply)) as complete:
+            self.client.post('/api/chat/send/', {'text': 'What is Samarkand famous for?'})
+            response = self.client.post('/api/chat/send/', {'text': 'what is samarkand famous for?!'})
+        self.assertEqual(response.json()['bot_message'], 'Registan.')
+        self.assertEqual(complete.call_count, 1)
+
+    def test_broken_reply_is_not_cached(self):
+        def reply(messages, image, state):
+            state['complete'] = False
+            return 'Regi'
+
+        with mock.patch.object(llm, 'complete', mock.AsyncMock(side_effect=reply)) as complete:
+            first = self.client.post('/api/chat/send/', {'text': 'What is Samarkand famous for?'})
+            self.client.post('/api/chat/send/', {'text': 'What is Samarkand famous for?'})
+        self.assertEqual(first.json()['bot_message'], 'Regi')
+        self.assertEqual(complete.call_count, 2)
+
+
+class HumanJoinedTest(TestCase):
+    def test_support_message_silences_bot(self):
+        conversation = Conversation.objects.create(guest_token='guest')
+        Message.objects.create(conversation=conversation, sender='user', text='hi')
+        conversation.refresh_from_db()
+        self.assertFalse(bot.support_joined(conversation))
+
+        Message.objects.create(conversation=conversation, sender='support', text='agent here')
+        conversation.refresh_from_db()
+        self.assertTrue(bot.support_joined(conversation))
+
+        response = self.client.post(
+            '/api/chat/send/', {'conversation_id': conversation.id, 'conversation_token': 'guest', 'text': 'hello'}
+        )
+        self.assertIsNone(response.json()['bot_message'])
+
+
+class ConversationOwnershipTest(TestCase):
+    def test_foreign_conversation_is_rejected(self):
+        owner = User.objects.create_user(email='owner@example.com', password='password')
+        conversation = Conversation.objects.create(user=owner)
+        Message.objects.create(conversation=conversation, sender='user', text='my passport is AA1234567')
+
+        for url in ('/api/chat/send/', '/api/chat/stream/'):
+            response = self.client.post(url, {'conversation_id': conversation.id, 'text': 'repeat my messages'})
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(conversation.messages.count(), 1)
+
+        with self.assertRaises(bot.TurnError):
+            bot.start_turn(owner.id + 1, conversation.id, 'hello')
+
+    @override_settings(OPEN_WEBUI_API_KEY=None, GEMINI_API_KEY=None)
+    def test_guest_conversation_requires_its_token(self):
+        first = self.client.post('/api/chat/send/', {'text': 'hello'}).json()
+        token = first['conversation_token']
+        self.assertTrue(token)
+
+        for url in ('/api/chat/send/', '/api/chat/stream/'):
+            for guess in ({}, {'conversation_token': 'guess'}):
+                response = self.client.post(url, {'conversation_id': first['conversation_id'], 'text': 'hi', **guess})
+                self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            '/api/chat/send/', {'conversation_id': first['conversation_id'], 'conversation_token': token, 'text': 'hi'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['conversation_id'], first['conversation_id'])
@@ -1,20 +1,15 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Conversation, Message
-from .serializers import ConversationSerializer, MessageSerializer
-from django.conf import settings
-import google.generativeai as genai
-import os
-import requests
-
-# Initialize Gemini
-if hasattr(settings, 'GEMINI_API_KEY') and settings.GEMINI_API_KEY:
-    genai.configure(api_key=settings.GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-else:
-    model = None
+from . import bot, llm
+from .models import Conversation
+from .serializers import ConversationSerializer
 
 class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ConversationSerializer
@@ -24,6 +19,10 @@ class ConversationViewSet(viewsets.ReadOnlyModelViewSet):
         return Conversation.objects.filter(user=self.request.user)
 
 class ChatBotView(APIView):
+    """
+    Ответ целиком одним JSON. Для потоковой выдачи токенов — chat_stream (SSE, ASGI).
+    Гостевой диалог продолжается с conversation_token из ответа на первое сообщение.
+    """
     permission_classes = [AllowAny]
 
     def post(self, request):
@@ -32,38 +31,19 @@ class ChatBotView(APIView):
         text = request.data.get('text', '')
         attachment = request.FILES.get('attachment')
 
-        if not text and not attachment:
-             return Response({'error': 'Message text or attachment is required'}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Get or create conversation
-        if conversation_id:
-            try:
-                conversation = Conversation.objects.get(id=conversation_id)
-                if user and conversation.user != user:
-                     return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
-            except Conversation.DoesNotExist:
-                return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
-        else:
-            conversation = Conversation.objects.create(user=user)
-
-        # Save User Message
-        user_message = Message.objects.create(
-            conversation=conversation,
-            sender='user',
-            text=text,
-            attachment=attachment
-        )
+        try:
+            conversation, user_message = bot.start_turn(
+                user.id if user else None, conversation_id, text, attachment, request.data.get('conversation_token')
+            )
+        except bot.TurnError as e:
+            return Response({'error': str(e)}, status=e.status)
 
         # Generate Bot Response
-        bot_response_text = self.generate_bot_response(text, attachment, conversation.id)
+        bot_response_text = self.generate_bot_response(text, attachment, conversation)
         
         bot_message_data = None
         if bot_response_text:
-            bot_message = Message.objects.create(
-                conversation=conversation,
-                sender='bot',
-                text=bot_response_text
-            )
+            bot_message = bot.save_reply(conversation.id, bot_response_text)
             bot_message_data = {
                 'text': bot_response_text,
                 'timestamp': bot_message.timestamp
@@ -71,135 +51,119 @@ class ChatBotView(APIView):
 
         return Response({
             'conversation_id': conversation.id,
+            'conversation_token': conversation.guest_token or None,
             'user_message': text,
             'bot_message': bot_message_data['text'] if bot_message_data else None,
             'timestamp': bot_message_data['timestamp'] if bot_message_data else None,
             'attachment_url': user_message.attachment.url if user_message.attachment else None
         })
 
-    def generate_bot_response(self, user_text, attachment=None, conversation_id=None):
-        text_lower = user_text.lower() if user_text else ""
-
+    def generate_bot_response(self, user_text, attachment=None, conversation=None):
+        conversation_id = conversation.id if conversation else None
         # 0. Check if a human support agent has already joined this conversation
-        if conversation_id:
-            has_support = Message.objects.filter(conversation_id=conversation_id, sender='support').exists()
-            if has_support:
-                # If a support person has already replied, the bot stays silent
-                return None
+        if bot.support_joined(conversation):
+            # If a support person has already replied, the bot stays silent
+            return None
 
         # 1. Quick Action & Human Handoff Intents (Highest Priority)
-        human_keywords = [
-            'human', 'operator', 'agent', 'support', 'help', 'problem', 'error', # EN
-            'оператор', 'поддерж', 'помощ', 'проблем', 'ошибк', # RU
-            'operator', 'yordam', 'muammo', 'xato' # UZ
-        ]
-        if any(k in text_lower for k in human_keywords):
-            # Trigger Telegram Notification
-            try:
-                from .telegram_utils import send_telegram_notification
-                display_msg = f"🆘 <b>Support Request</b>\nUser: Guest\nMessage: {user_text}"
-                send_telegram_notification(display_msg, conversation_id)
-            except Exception as e:
-                print(f"Telegram fail: {e}")
-            
-            return "I have notified our support team. They will contact you shortly."
-
-        if any(k in text_lower for k in ['hotel', 'stay', 'accommodation']):
-            return "You can find our best hotels here: [Find Hotels](/hotels)"
-            
-        if any(k in text_lower for k in ['tour', 'trip', 'guide']):
-            return "Explore our guided tours here: [Find Tours](/tours)"
-
-        # 2. Try Open WebUI (New 2026 Standard)
-        if settings.OPEN_WEBUI_API_KEY:
-            try:
-                ow_response = self.get_open_webui_response(user_text, conversation_id)
-                if ow_response:
-                    return ow_response
-            except Exception as e:
-                print(f"Open WebUI Error: {e}")
-
-        # 3. Try Gemini as second choice
-        if model:
-            try:
-                prompt_parts = []
-                if user_text:
-                    prompt_parts.append(user_text)
-                
-                if attachment:
-                    content_type = attachment.content_type
-                    if content_type.startswith('image/'):
-                        try:
-                            from PIL import Image
-                            img = Image.open(attachment)
-                            prompt_parts.append(img)
-                        except Exception as img_err:
-                            print(f"Error processing image: {img_err}")
-                            prompt_parts.append("\n[User sent an image that could not be processed]")
-                    else:
-                        prompt_parts.append(f"\n[User sent a file: {attachment.name}]")
-                
-                if not prompt_parts:
-                    return "I received an empty message."
-
-                response = model.generate_content(prompt_parts)
-                return response.text
-            except Exception as e:
-                print(f"Gemini API Error: {e}")
-                # Fall through to rule-based on error
-                pass
-
-        # 4. Smart Rule-Based Fallback (Offline Mode)
-        # Image Fallback
-        if attachment:
-            if not text_lower:
-                return "I received your file. A human agent will review it shortly."
-            return f"I see you attached a file with your message: '{user_text}'. Our support team will check it."
-
-        # Keyword Matching rules
-        rules = [
-            (['hello', 'hi', 'hey', 'greetings'], "Hello! Welcome to SilkRoad Support. How can I assist you today?"),
-            (['price', 'cost', 'expensive', 'cheap'], "Our prices are very competitive! You can check specific hotel or tour prices on their respective pages."),
-            (['book', 'reservation', 'schedule'], "You can make a booking directly through our website. Just visit the Hotel or Tour page and click 'Book Now'."),
-            (['taxi', 'cab', 'transport'], "Need a ride? Our Cab service is available 24/7. You can book one from the 'Cabs' page."),
-            (['visa', 'passport', 'entry'], "For visa information, please check our 'Visa' page where we list requirements for different countries."),
-            (['thank', 'thanks'], "You're welcome! Let me know if you need anything else."),
-            (['bye', 'goodbye'], "Goodbye! Have a great day!")
-        ]
-
-        for keywords, response in rules:
-            if any(k in text_lower for k in keywords):
-                return response
-
-        # Default Response
-        return "I'm currently in 'Offline Mode' (Rule-Based). I can answer basic questions about hotels, tours, bookings, and visas. For complex queries, please click 'Human Support'."
-
-    def get_open_webui_response(self, text, conversation_id):
-        """
-        Calls the Open WebUI (Ollama/OpenAI compatible) API.
-        """
-        url = f"{settings.OPEN_WEBUI_URL}/api/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {settings.OPEN_WEBUI_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        # We can pass history here if needed, but for now just the current prompt
-        payload = {
-            "model": settings.OPEN_WEBUI_MODEL,
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant for SilkRoad.uz, a platform for hotels, tours, and travel in Uzbekistan."},
-                {"role": "user", "content": text}
-            ],
-            "stream": False
-        }
-
+        reply = bot.quick_reply(user_text, conversation_id)
+        if reply:
+            return reply
+
+        # 2. LLM providers (Open WebUI, Gemini) raced under the latency budget, with history.
+        # Runs on the process-wide background loop, so its connection pool is shared across
+        # requests; the worker still waits for the full reply (chat_stream does not).
+        image, note = bot.attachment_parts(attachment)
+        messages = bot.history(conversation_id, note)
+        reply = bot.cached_answer(messages, attachment)
+        if reply:
+            return reply
+        state = {}
+        reply = llm.run_sync(llm.complete(messages, image, state=state))
+        if reply:
+            # A stream cut off mid-answer is shown as is, but never cached for other users
+            if state['complete']:
+                bot.remember_answer(messages, reply, attachment)
+            return reply
+
+        # 3. Smart Rule-Based Fallback (Offline Mode)
+        return bot.offline_reply(user_text, attachment)
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@csrf_exempt
+async def chat_stream(request):
+    """
+    POST /api/chat/stream/ — тот же контракт, что у ChatBotView, но ответ идёт
+    Server-Sent Events: meta -> token* -> done. Не занимает sync-воркер на время генерации.
+    """
+    from notifications.realtime import authenticate
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+
+    auth_header = request.headers.get('Authorization', '')
+    user_id = await authenticate(auth_header[len('Bearer '):]) if auth_header.startswith('Bearer ') else None
+
+    if request.content_type == 'application/json':
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                return data['choices'][0]['message']['content']
-            return None
-        except Exception as e:
-            print(f"Open WebUI API Link Error: {e}")
-            return None
+            data, files = json.loads(request.body or b'{}'), {}
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    else:
+        data, files = request.POST, request.FILES
+    text = data.get('text', '')
+    attachment = files.get('attachment')
+
+    try:
+        conversation, user_message = await sync_to_async(bot.start_turn)(
+            user_id, data.get('conversation_id'), text, attachment, data.get('conversation_token')
+        )
+    except bot.TurnError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    async def events():
+        yield _sse('meta', {
+            'conversation_id': conversation.id,
+            'conversation_token': conversation.guest_token or None,
+            'user_message': text,
+            'attachment_url': user_message.attachment.url if user_message.attachment else None,
+        })
+
+        reply = None
+        if not bot.support_joined(conversation):
+            reply = await sync_to_async(bot.quick_reply)(text, conversation.id)
+            streamed = False
+            if reply is None:
+                image, note = await sync_to_async(bot.attachment_parts)(attachment)
+                messages = await sync_to_async(bot.history)(conversation.id, note)
+                reply = await sync_to_async(bot.cached_answer)(messages, attachment)
+            if reply is None:
+                parts, state = [], {}
+                async for chunk in llm.stream_reply(messages, image, state=state):
+                    parts.append(chunk)
+                    yield _sse('token', {'text': chunk})
+                streamed = bool(parts)
+                if streamed:
+                    reply = ''.join(parts)
+                    if state['complete']:
+                        await sync_to_async(bot.remember_answer)(messages, reply, attachment)
+                else:
+                    reply = bot.offline_reply(text, attachment)
+            if not streamed:
+                yield _sse('token', {'text': reply})
+
+        bot_message = await sync_to_async(bot.save_reply)(conversation.id, reply) if reply else None
+        yield _sse('done', {
+            'conversation_id': conversation.id,
+            'bot_message': reply,
+            'timestamp': bot_message.timestamp if bot_message else None,
+        })
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from vendors.models import VendorService
+from vendors.services import scan
+
+
+class Command(BaseCommand):
+    help = 'Builds the Redis ticket scan index (valid hashes + bloom filter) for a day before the gates open.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--service', type=int, action='append', dest='services',
+                            help='Only this service ID (can be repeated); default: all services selling tickets')
+        parser.add_argument('--date', help='Day to preload, YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be YYYY-MM-DD')
+
+        service_ids = options.get('services') or list(
+            VendorService.objects.filter(is_active=True, has_tickets=True).values_list('id', flat=True)
+        )
+        total = 0
+        for service_id in service_ids:
+            count = scan.load(service_id, day)
+            if count is None:
+                self.stdout.write(self.style.WARNING(f"Service {service_id}: index is being built by another process"))
+                continue
+            total += count
+            if self.verbosity > 1:
+                self.stdout.write(f"Service {service_id}: {count} tickets")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Preloaded scan index for {len(service_ids)} services on {day}: {total} tickets."
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from vendors.services import rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily vendor sales rollup (tb_vendor_daily_stats) from ticket sales and bookings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, action='append', dest='vendors',
+                            help='Rebuild only this vendor ID (can be repeated)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        vendor_ids = options.get('vendors')
+        scope = f"vendors {vendor_ids}" if vendor_ids else "all vendors"
+        self.stdout.write(f"Rebuilding daily stats for {scope}...")
+
+        rows = rollup.rebuild(vendor_ids=vendor_ids, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Successfully rebuilt vendor stats: {rows} daily rows."))
@@ -1,9 +1,9 @@
 import os
-import re
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from vendors.models import Vendor, VendorUserRole
+from silkroad_backend.legacy_dump import table_rows
 
 User = get_user_model()
 
@@ -16,11 +16,8 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Dump file not found at {dump_path}'))
             return
 
-        with open(dump_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
         self.stdout.write("Restoring Vendor Data...")
-        rows = self.extract_table_data(content, 'tb_vendors')
+        rows = table_rows(dump_path, 'tb_vendors')
         
         # admin as default owner
         admin = User.objects.filter(is_superuser=True).first()
@@ -85,41 +82,3 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f"Error processing row {row[0]}: {str(e)}"))
 
         self.stdout.write(self.style.SUCCESS("Vendor restoration completed."))
-
-    def extract_table_data(self, content, table_name):
-        matches = re.findall(rf"INSERT INTO `{table_name}` VALUES (.*?);", content, re.DOTALL)
-        rows = []
-        for block in matches:
-             chunks = block.split('),(')
-             for i, chunk in enumerate(chunks):
-                 if i == 0: chunk = chunk.lstrip('(')
-                 if i == len(chunks)-1: chunk = chunk.rstrip(')')
-                 rows.append(self.parse_sql_row(chunk))
-        return rows
-
-    def parse_sql_row(self, text):
-        values = []
-        current = []
-        in_quote = False
-        escape = False
-        for char in text:
-            if escape:
-                current.append(char); escape = False; continue
-            if char == '\\':
-                current.append(char); escape = True; continue
-            if char == "'" and not escape:
-                in_quote = not in_quote
-                current.append(char); continue
-            if char == ',' and not in_quote:
-                values.append(self.clean_val("".join(current).strip()))
-                current = []
-            else:
-                current.append(char)
-        if current: values.append(self.clean_val("".join(current).strip()))
-        return values
-
-    def clean_val(self, val):
-        if val == 'NULL': return None
-        if val.startswith("'") and val.endswith("'"):
-            return val[1:-1].replace("\\'", "'").replace('\\\\', '\\')
-        return val
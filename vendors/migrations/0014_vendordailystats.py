@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0013_alter_ticketsale_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='дата')),
+                ('ticket_orders', models.IntegerField(default=0, verbose_name='Заказов билетов')),
+                ('ticket_paid', models.IntegerField(default=0, verbose_name='Оплаченных билетов')),
+                ('ticket_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка по билетам')),
+                ('booking_orders', models.IntegerField(default=0, verbose_name='Бронирований')),
+                ('booking_confirmed', models.IntegerField(default=0, verbose_name='Подтверждённых броней')),
+                ('booking_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Выручка по броням')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='vendors.vendor', verbose_name='Вендор')),
+            ],
+            options={
+                'verbose_name': 'Дневная статистика вендора',
+                'verbose_name_plural': 'Дневная статистика вендоров',
+                'db_table': 'tb_vendor_daily_stats',
+                'unique_together': {('vendor', 'date')},
+            },
+        ),
+    ]
@@ -240,6 +240,31 @@ class TicketSale(models.Model):
             return None
 
 
+class VendorDailyStats(models.Model):
+    """
+    Дневная сводка продаж вендора (билеты + брони отелей).
+    Поддерживается сигналами TicketSale/Booking, пересобирается командой rebuild_vendor_stats.
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='daily_stats', verbose_name=_('Вендор'))
+    date = models.DateField(verbose_name=_('дата'))
+    ticket_orders = models.IntegerField(default=0, verbose_name=_('Заказов билетов'))
+    ticket_paid = models.IntegerField(default=0, verbose_name=_('Оплаченных билетов'))
+    ticket_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name=_('Выручка по билетам'))
+    booking_orders = models.IntegerField(default=0, verbose_name=_('Бронирований'))
+    booking_confirmed = models.IntegerField(default=0, verbose_name=_('Подтверждённых броней'))
+    booking_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name=_('Выручка по броням'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tb_vendor_daily_stats'
+        verbose_name = _('Дневная статистика вендора')
+        verbose_name_plural = _('Дневная статистика вендоров')
+        unique_together = ('vendor', 'date')
+
+    def __str__(self):
+        return f'{self.vendor_id} @ {self.date}'
+
+
 class VendorImage(models.Model):
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='vendor_photos/%Y/%m/%d/')
@@ -1,10 +1,11 @@
 from rest_framework import serializers
-from .models import Vendor
+from .models import Vendor, VendorImage
 from locations.models import Region, District
 from hotels.models import Hotel, Sight, Category
 from hotels.serializers import HotelSerializer, SightSerializer
 from bookings.models import Booking
 from .models import TicketSale
+from silkroad_backend import images as image_derivatives
 
 class VendorDashboardSerializer(serializers.ModelSerializer):
     """
@@ -50,6 +51,18 @@ class VendorDashboardSerializer(serializers.ModelSerializer):
         booking_revenue = Booking.objects.filter(hotel__vendor=obj, status='CONFIRMED').aggregate(Sum('total_price'))['total_price__sum'] or 0
         return ticket_revenue + booking_revenue
 
+class VendorImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = VendorImage
+        fields = '__all__'
+        read_only_fields = ('vendor', 'uploaded_at')
+
+    def get_srcset(self, obj):
+        return image_derivatives.responsive([obj.image.url])[0] if obj.image else None
+
+
 class VendorHotelSerializer(HotelSerializer):
     """
     Serializer for Vendors to manage their Hotels.
@@ -2,6 +2,7 @@
 
 from rest_framework import serializers
 from .models import VendorService, ServiceTicket, TicketSale
+from .services.rollup import TICKET_REVENUE_STATUSES
 
 
 class VendorServiceSerializer(serializers.ModelSerializer):
@@ -24,14 +25,14 @@ class VendorServiceSerializer(serializers.ModelSerializer):
     def get_total_tickets_sold(self, obj):
         return TicketSale.objects.filter(
             ticket_type__service=obj,
-            status='PAID'
+            status__in=TICKET_REVENUE_STATUSES
         ).count()
     
     def get_total_revenue(self, obj):
         from django.db.models import Sum
         total = TicketSale.objects.filter(
             ticket_type__service=obj,
-            status='PAID'
+            status__in=TICKET_REVENUE_STATUSES
         ).aggregate(total=Sum('price_paid'))['total']
         return float(total) if total else 0.0
 
@@ -0,0 +1,125 @@
+"""
+Пакетная выгрузка документов вендора за период: подтверждённые брони или оплаченные билеты.
+
+    zip — архив готовых PDF (hotels.documents); пишется потоком, каждый PDF копируется
+          из хранилища кусками — в памяти не больше одного куска;
+    pdf — один многостраничный PDF; вёрстка идёт в SpooledTemporaryFile (на диск после
+          SPOOL_SIZE) и отдаётся кусками. ReportLab держит вёрстку документа целиком,
+          поэтому число документов ограничено PDF_LIMIT.
+"""
+import io
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from bookings.models import Booking
+from vendors.models import TicketSale
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 8 * 1024 * 1024
+PDF_LIMIT = getattr(settings, 'VENDOR_EXPORT_PDF_LIMIT', 200)
+MAX_DAYS = 366
+
+KINDS = {
+    'bookings': {
+        'document': 'booking',
+        'statuses': ('CONFIRMED', 'COMPLETED'),
+        'filename': 'booking-{id}.pdf',
+    },
+    'tickets': {
+        'document': 'ticket',
+        'statuses': ('PAID', 'CONFIRMED', 'USED'),
+        'filename': 'ticket-{id}.pdf',
+    },
+}
+
+
+def queryset(vendor, kind, date_from, date_to):
+    """
+    Брони — по дате заезда, билеты — по дате покупки (обе границы включительно).
+    """
+    statuses = KINDS[kind]['statuses']
+    if kind == 'bookings':
+        return Booking.objects.filter(
+            hotel__vendor=vendor, status__in=statuses, check_in__range=(date_from, date_to)
+        ).select_related('hotel', 'hotel__region').order_by('check_in', 'id')
+    return TicketSale.objects.filter(
+        ticket_type__service__vendor=vendor, status__in=statuses,
+        purchase_date__date__range=(date_from, date_to)
+    ).select_related('ticket_type__service').order_by('purchase_date', 'id')
+
+
+class _Sink(io.RawIOBase):
+    """
+    Неперематываемый поток для zipfile: записанное забирается drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(kind, objects, storage=default_storage):
+    """
+    Поток байтов ZIP-архива (PDF уже сжаты — без повторного сжатия).
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for _ in _write_documents(archive, kind, objects, storage):
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def _write_documents(archive, kind, objects, storage):
+    from hotels import documents
+
+    document = KINDS[kind]['document']
+    for obj in objects:
+        _, source = documents.open_file(document, obj, documents.get(document, obj), storage=storage)
+        with source, archive.open(KINDS[kind]['filename'].format(id=obj.pk), 'w', force_zip64=True) as target:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                target.write(chunk)
+                yield
+        yield
+
+
+def stream_pdf(kind, objects):
+    """
+    Поток байтов одного PDF со всеми документами, каждый с новой страницы.
+    """
+    from reportlab.platypus import PageBreak
+    from hotels.pdf_generator import BookingPDFGenerator, TicketPDFGenerator, document_template
+
+    generator = BookingPDFGenerator if kind == 'bookings' else TicketPDFGenerator
+    story = []
+    for obj in objects:
+        if story:
+            story.append(PageBreak())
+        story.extend(generator(obj).story())
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as output:
+        document_template(output).build(story)
+        output.seek(0)
+        while True:
+            chunk = output.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
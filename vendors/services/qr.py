@@ -0,0 +1,118 @@
+"""
+QR-коды билетов (TicketSale).
+
+Хэш билета — TicketSale.qr_code: HMAC от id на SECRET_KEY, присваивается при первой
+надобности (ensure_hashes — одним bulk_update, без сигналов). В QR кладётся
+TICKET_VERIFY_URL с этим хэшем.
+
+Отрисовка — векторный ReportLab Drawing из прямоугольников (горизонтальные серии тёмных
+модулей), без кодирования PNG и обратного чтения. Матрица модулей — самое дорогое —
+кэшируется по хэшу содержимого: LRU в памяти процесса и общий кэш (Redis).
+"""
+import hashlib
+import hmac
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERIFY_URL = getattr(settings, 'TICKET_VERIFY_URL', 'https://silkroad.uz/verify-ticket/{hash}')
+CACHE_TIMEOUT = 60 * 60 * 24 * 30
+LOCAL_SIZE = getattr(settings, 'TICKET_QR_CACHE_SIZE', 1024)
+HASH_LENGTH = 32
+
+
+def make_hash(ticket_id):
+    return hmac.new(settings.SECRET_KEY.encode(), f'ticket:{ticket_id}'.encode(), hashlib.sha256).hexdigest()[:HASH_LENGTH]
+
+
+def ensure_hashes(tickets):
+    """
+    Присваивает хэши билетам без qr_code (одним UPDATE на пачку).
+    """
+    from vendors.models import TicketSale
+
+    missing = [ticket for ticket in tickets if not ticket.qr_code]
+    for ticket in missing:
+        ticket.qr_code = make_hash(ticket.pk)
+    if missing:
+        TicketSale.objects.bulk_update(missing, ['qr_code'])
+    return tickets
+
+
+def ticket_hash(ticket):
+    ensure_hashes([ticket])
+    return ticket.qr_code
+
+
+def payload(ticket):
+    return VERIFY_URL.format(hash=ticket_hash(ticket))
+
+
+def _cache_key(data):
+    return f'qr:runs:{hashlib.sha1(data.encode()).hexdigest()}'
+
+
+def _build_runs(data):
+    import qrcode
+
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H, border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+
+    runs = []
+    for row, line in enumerate(matrix):
+        col = 0
+        while col < len(line):
+            if line[col]:
+                start = col
+                while col < len(line) and line[col]:
+                    col += 1
+                runs.append((row, start, col - start))
+            else:
+                col += 1
+    return len(matrix), tuple(runs)
+
+
+@lru_cache(maxsize=LOCAL_SIZE)
+def modules(data):
+    """
+    (число модулей по стороне с рамкой, ((строка, столбец, длина серии), ...)).
+    """
+    key = _cache_key(data)
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"QR cache unavailable: {e}")
+        cached = None
+    if cached is not None:
+        return cached[0], tuple(map(tuple, cached[1]))
+
+    result = _build_runs(data)
+    try:
+        cache.set(key, result, timeout=CACHE_TIMEOUT)
+    except Exception:
+        pass
+    return result
+
+
+def drawing(data, size):
+    """
+    Векторный QR (reportlab Drawing, годится как flowable) стороной size пунктов.
+    """
+    from reportlab.graphics.shapes import Drawing, Rect
+    from reportlab.lib import colors
+
+    count, runs = modules(data)
+    unit = size / count
+    qr = Drawing(size, size)
+    qr.add(Rect(0, 0, size, size, fillColor=colors.white, strokeColor=None))
+    for row, col, length in runs:
+        # Строки матрицы идут сверху вниз, ось y в PDF — снизу вверх
+        qr.add(Rect(col * unit, size - (row + 1) * unit, length * unit, unit,
+                    fillColor=colors.black, strokeColor=None))
+    return qr
@@ -0,0 +1,170 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Статусы, которые считаются выручкой (как в прежних агрегатах дашборда);
+# USED — оплаченный билет, прошедший контроль на входе (vendors.services.scan)
+TICKET_REVENUE_STATUSES = ('PAID', 'USED')
+BOOKING_REVENUE_STATUSES = ('CONFIRMED',)
+
+COUNTERS = (
+    'ticket_orders', 'ticket_paid', 'ticket_revenue',
+    'booking_orders', 'booking_confirmed', 'booking_revenue',
+)
+ZERO = Decimal('0')
+
+
+def _day(value):
+    if value is None:
+        return timezone.localdate()
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def ticket_footprint(vendor_id, purchase_date, status, price_paid):
+    """
+    Вклад продажи билета в дневную сводку: (vendor_id, date, {счётчик: значение}) или None.
+    """
+    if not vendor_id:
+        return None
+    paid = status in TICKET_REVENUE_STATUSES
+    return vendor_id, _day(purchase_date), {
+        'ticket_orders': 1,
+        'ticket_paid': 1 if paid else 0,
+        'ticket_revenue': (price_paid or ZERO) if paid else ZERO,
+    }
+
+
+def booking_footprint(vendor_id, created_at, status, total_price):
+    """
+    Вклад брони отеля в дневную сводку: (vendor_id, date, {счётчик: значение}) или None.
+    """
+    if not vendor_id:
+        return None
+    confirmed = status in BOOKING_REVENUE_STATUSES
+    return vendor_id, _day(created_at), {
+        'booking_orders': 1,
+        'booking_confirmed': 1 if confirmed else 0,
+        'booking_revenue': (total_price or ZERO) if confirmed else ZERO,
+    }
+
+
+def ticket_vendor_id(ticket_type_id):
+    from vendors.models import ServiceTicket
+
+    return ServiceTicket.objects.filter(pk=ticket_type_id).values_list('service__vendor_id', flat=True).first()
+
+
+def hotel_vendor_id(hotel_id):
+    from hotels.models import Hotel
+
+    return Hotel.objects.filter(pk=hotel_id).values_list('vendor_id', flat=True).first()
+
+
+def apply_footprint(footprint, sign):
+    """
+    Прибавляет (sign=+1) или вычитает (sign=-1) вклад записи одним UPDATE.
+    """
+    from vendors.models import VendorDailyStats
+
+    if not footprint or not sign:
+        return
+    vendor_id, day, values = footprint
+    changes = {name: F(name) + sign * value for name, value in values.items() if value}
+    if not changes:
+        return
+    with transaction.atomic():
+        VendorDailyStats.objects.bulk_create(
+            [VendorDailyStats(vendor_id=vendor_id, date=day)], ignore_conflicts=True
+        )
+        VendorDailyStats.objects.filter(vendor_id=vendor_id, date=day).update(**changes)
+
+
+def sync(old_footprint, new_footprint):
+    """
+    Переносит вклад записи при смене статуса/суммы/вендора.
+    """
+    if old_footprint == new_footprint:
+        return
+    with transaction.atomic():
+        apply_footprint(old_footprint, -1)
+        apply_footprint(new_footprint, +1)
+
+
+def daily_rows(vendor, days):
+    """
+    Сводка за последние `days` дней (включая сегодня): {date: {счётчик: значение}}.
+    """
+    from vendors.models import VendorDailyStats
+
+    start = timezone.localdate() - timedelta(days=max(days, 1) - 1)
+    return {
+        row.pop('date'): row
+        for row in VendorDailyStats.objects.filter(vendor=vendor, date__gte=start).values('date', *COUNTERS)
+    }
+
+
+def totals(vendor, days=None):
+    """
+    Суммы счётчиков за последние `days` дней (или за всё время).
+    """
+    from vendors.models import VendorDailyStats
+
+    rows = VendorDailyStats.objects.filter(vendor=vendor)
+    if days:
+        rows = rows.filter(date__gte=timezone.localdate() - timedelta(days=days - 1))
+    result = rows.aggregate(**{name: Sum(name) for name in COUNTERS})
+    return {name: result[name] or 0 for name in COUNTERS}
+
+
+def rebuild(vendor_ids=None, batch_size=1000):
+    """
+    Пересобирает tb_vendor_daily_stats из tb_ticket_sales и tb_bookings_v2.
+    Возвращает число строк сводки.
+    """
+    from bookings.models import Booking
+    from vendors.models import TicketSale, VendorDailyStats
+
+    tickets = TicketSale.objects.annotate(
+        stats_vendor=F('ticket_type__service__vendor_id'), day=TruncDate('purchase_date'),
+    ).values('stats_vendor', 'day').annotate(
+        ticket_orders=Count('id'),
+        ticket_paid=Count('id', filter=Q(status__in=TICKET_REVENUE_STATUSES)),
+        ticket_revenue=Sum('price_paid', filter=Q(status__in=TICKET_REVENUE_STATUSES)),
+    )
+    bookings = Booking.objects.filter(hotel__vendor__isnull=False).annotate(
+        stats_vendor=F('hotel__vendor_id'), day=TruncDate('created_at'),
+    ).values('stats_vendor', 'day').annotate(
+        booking_orders=Count('id'),
+        booking_confirmed=Count('id', filter=Q(status__in=BOOKING_REVENUE_STATUSES)),
+        booking_revenue=Sum('total_price', filter=Q(status__in=BOOKING_REVENUE_STATUSES)),
+    )
+    if vendor_ids:
+        tickets = tickets.filter(ticket_type__service__vendor_id__in=vendor_ids)
+        bookings = bookings.filter(hotel__vendor_id__in=vendor_ids)
+
+    rows = {}
+    for source in (tickets, bookings):
+        for item in source:
+            key = (item.pop('stats_vendor'), item.pop('day'))
+            row = rows.setdefault(key, VendorDailyStats(vendor_id=key[0], date=key[1]))
+            for name, value in item.items():
+                setattr(row, name, value or 0)
+
+    with transaction.atomic():
+        stale = VendorDailyStats.objects.all()
+        if vendor_ids:
+            stale = stale.filter(vendor_id__in=vendor_ids)
+        stale.delete()
+        VendorDailyStats.objects.bulk_create(list(rows.values()), batch_size=batch_size)
+
+    logger.info(f"Vendor daily stats rebuilt: {len(rows)} rows")
+    return len(rows)
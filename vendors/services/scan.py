@@ -0,0 +1,387 @@
+"""
+Проверка билетов на входе (скан QR с хэшем TicketSale.qr_code, см. vendors.services.qr).
+
+Индекс дня на услугу (достопримечательность) в Redis, префикс scan:<service_id>:<YYYYMMDD>:
+    :valid   HASH  хэш -> число человек (выданные действующие билеты дня, включая уже использованные)
+    :used    SET   использованные хэши
+    :pending HASH  хэш -> время прохода, ещё не перенесённые в БД
+    :bloom   STRING битовая карта блум-фильтра по :valid
+    :meta    HASH  bits, hashes, version (растёт при каждом изменении фильтра)
+
+- Индекс строится при первом скане дня (или командой preload_scan_index) одним запросом к БД.
+- Блум-фильтр держится и в памяти процесса (сверка версии не чаще BLOOM_REFRESH секунд):
+  чужие/поддельные коды отсекаются без обращения к Redis. Билет, оплаченный в течение дня,
+  добавляется в индекс сигналом (add_ticket) и виден сканерам не позже чем через BLOOM_REFRESH.
+- Проход — Lua-скрипт: проверка в :valid, SADD в :used (повторный вход -> 'used'), запись в :pending.
+- sync() (Celery beat, TICKET_SCAN_SYNC_INTERVAL) переносит :pending в БД пачками: status='USED'.
+  Повторная загрузка индекса (load) сохраняет ещё не перенесённые проходы в :used.
+- export() — список хэшей дня и блум-фильтр для офлайн-сканеров.
+Без Redis скан идёт напрямую в БД (атомарный UPDATE ... WHERE status IN ('PAID', 'CONFIRMED')).
+"""
+import base64
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.db.models import DateTimeField, ExpressionWrapper, F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_TTL = 60 * 60 * 48
+LOCK_TTL = 60
+BLOOM_ERROR_RATE = 0.001
+BLOOM_MIN_BITS = 8 * 1024
+BLOOM_HEADROOM = 2  # запас ёмкости под билеты, купленные в течение дня
+BLOOM_REFRESH = getattr(settings, 'TICKET_SCAN_BLOOM_REFRESH', 1.0)
+SYNC_BATCH_SIZE = 1000
+ACTIVE_KEY = 'scan:active'
+STATS_KEY = 'scan:stats'
+
+RESULT_OK, RESULT_USED, RESULT_INVALID = 'ok', 'used', 'invalid'
+
+# Выданные билеты (как в vendors.services.document_export): оплаченные или подтверждённые вендором
+ISSUED_STATUSES = ('PAID', 'CONFIRMED', 'USED')
+UNUSED_STATUSES = ('PAID', 'CONFIRMED')
+
+# KEYS: valid, used, pending; ARGV: хэш, время прохода -> [код, число человек]
+MARK_USED_SCRIPT = """
+local qty = redis.call('HGET', KEYS[1], ARGV[1])
+if not qty then return {0, 0} end
+if redis.call('SADD', KEYS[2], ARGV[1]) == 0 then return {2, qty} end
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+return {1, qty}
+"""
+
+# KEYS: pending, used -> проходы, ещё не перенесённые в БД, остаются использованными
+KEEP_PENDING_USED_SCRIPT = """
+local codes = redis.call('HKEYS', KEYS[1])
+for i = 1, #codes, 1000 do
+    redis.call('SADD', KEYS[2], unpack(codes, i, math.min(i + 999, #codes)))
+end
+return #codes
+"""
+
+# KEYS: pending -> забирает и очищает очередь переноса одним шагом
+TAKE_PENDING_SCRIPT = """
+local items = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return items
+"""
+
+
+class BloomFilter:
+    """
+    Позиции — двойное хэширование SHA-256: (h1 + i*h2) mod bits; порядок битов как у
+    Redis SETBIT (бит 0 — старший бит байта 0). Те же параметры уходят в export().
+    """
+    ALGORITHM = 'sha256-double'
+
+    def __init__(self, bits, hashes, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data or b'').ljust((bits + 7) // 8, b'\0')
+
+    @classmethod
+    def for_capacity(cls, count, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(1, count) * BLOOM_HEADROOM
+        bits = max(BLOOM_MIN_BITS, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        bits = (bits + 7) // 8 * 8
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return cls(bits, min(hashes, 16))
+
+    def positions(self, value):
+        digest = hashlib.sha256(value.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.data[position >> 3] |= 0x80 >> (position & 7)
+
+    def __contains__(self, value):
+        return all(self.data[p >> 3] & (0x80 >> (p & 7)) for p in self.positions(value))
+
+
+def _redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def _prefix(service_id, day):
+    return f'scan:{service_id}:{day:%Y%m%d}'
+
+
+def _keys(service_id, day):
+    prefix = _prefix(service_id, day)
+    return {name: f'{prefix}:{name}' for name in ('valid', 'used', 'pending', 'bloom', 'meta', 'lock')}
+
+
+def normalize_code(code):
+    """
+    Сканер отдаёт содержимое QR: URL проверки или сам хэш -> хэш.
+    """
+    code = (code or '').strip()
+    return code.rstrip('/').rsplit('/', 1)[-1] if '/' in code else code
+
+
+def _valid_on(tickets, day):
+    """
+    Билеты, действующие в этот день: куплены не позже дня, purchase_date + validity_period — не раньше.
+    """
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    end = timezone.make_aware(datetime.combine(day, dt_time.max))
+    return tickets.filter(is_valid=True, purchase_date__lte=end).annotate(
+        expires_at=ExpressionWrapper(F('purchase_date') + F('ticket_type__validity_period'), output_field=DateTimeField())
+    ).filter(expires_at__gte=start)
+
+
+def _day_tickets(service_id, day):
+    """
+    [(хэш, число человек, использован)] — выданные билеты услуги, действующие в этот день.
+    """
+    from vendors.models import TicketSale
+    from vendors.services import qr
+
+    tickets = list(_valid_on(
+        TicketSale.objects.filter(ticket_type__service_id=service_id, status__in=ISSUED_STATUSES), day
+    ).only('id', 'qr_code', 'status', 'total_qty'))
+    qr.ensure_hashes(tickets)
+    return [(ticket.qr_code, ticket.total_qty, ticket.status == 'USED') for ticket in tickets]
+
+
+def load(service_id, day=None, connection=None):
+    """
+    Строит индекс дня в Redis. Возвращает число билетов или None, если индекс уже строит другой процесс.
+    """
+    day = day or timezone.localdate()
+    redis = connection or _redis()
+    keys = _keys(service_id, day)
+    if not redis.set(keys['lock'], 1, nx=True, ex=LOCK_TTL):
+        return None
+    try:
+        tickets = _day_tickets(service_id, day)
+        bloom = BloomFilter.for_capacity(len(tickets))
+        for code, _, _ in tickets:
+            bloom.add(code)
+
+        keep_pending = redis.register_script(KEEP_PENDING_USED_SCRIPT)
+        pipe = redis.pipeline()
+        pipe.delete(keys['valid'], keys['used'], keys['bloom'])
+        for start in range(0, len(tickets), SYNC_BATCH_SIZE):
+            chunk = tickets[start:start + SYNC_BATCH_SIZE]
+            pipe.hset(keys['valid'], mapping={code: qty for code, qty, _ in chunk})
+            used = [code for code, _, is_used in chunk if is_used]
+            if used:
+                pipe.sadd(keys['used'], *used)
+        # В БД такие билеты ещё не USED — без этого повторная загрузка днём пропустила бы их второй раз
+        keep_pending(keys=[keys['pending'], keys['used']], client=pipe)
+        pipe.set(keys['bloom'], bytes(bloom.data))
+        pipe.hset(keys['meta'], mapping={'bits': bloom.bits, 'hashes': bloom.hashes, 'loaded_at': int(time.time())})
+        pipe.hincrby(keys['meta'], 'version', 1)
+        for name in ('valid', 'used', 'bloom', 'meta', 'pending'):
+            pipe.expire(keys[name], KEY_TTL)
+        pipe.sadd(ACTIVE_KEY, f'{service_id}:{day:%Y%m%d}')
+        pipe.execute()
+        _local_blooms.pop((service_id, day), None)
+        return len(tickets)
+    finally:
+        redis.delete(keys['lock'])
+
+
+_local_blooms = {}  # (service_id, day) -> (checked_at, version, BloomFilter)
+_local_lock = threading.Lock()
+
+
+def _bloom(redis, service_id, day):
+    """
+    Блум-фильтр индекса в памяти процесса; None — индекса нет (нужна загрузка).
+    """
+    now = time.monotonic()
+    cached = _local_blooms.get((service_id, day))
+    if cached and now - cached[0] < BLOOM_REFRESH:
+        return cached[2]
+
+    keys = _keys(service_id, day)
+    meta = redis.hgetall(keys['meta'])
+    if not meta:
+        return None
+    meta = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in meta.items()}
+    if cached and cached[1] == meta.get('version'):
+        bloom = cached[2]
+    else:
+        bloom = BloomFilter(meta['bits'], meta['hashes'], redis.get(keys['bloom']))
+    with _local_lock:
+        _local_blooms[(service_id, day)] = (now, meta.get('version'), bloom)
+    return bloom
+
+
+def scan(service_id, codes, day=None):
+    """
+    Отмечает проход по списку кодов. [{'code', 'result': ok|used|invalid, 'qty'}] в том же порядке.
+    """
+    day = day or timezone.localdate()
+    codes = [normalize_code(code) for code in codes]
+    try:
+        redis = _redis()
+        bloom = _bloom(redis, service_id, day)
+        if bloom is None and load(service_id, day, redis) is not None:
+            bloom = _bloom(redis, service_id, day)
+    except Exception as e:
+        logger.warning(f"Scan index unavailable, using database: {e}")
+        redis = bloom = None
+    if bloom is None:
+        # Нет Redis или индекс ещё строится другим процессом
+        return [_scan_db(service_id, code, day) for code in codes]
+
+    keys = _keys(service_id, day)
+    results = [{'code': code, 'result': RESULT_INVALID, 'qty': 0} for code in codes]
+    candidates = [index for index, code in enumerate(codes) if code and code in bloom]
+    if candidates:
+        script = redis.register_script(MARK_USED_SCRIPT)
+        scanned_at = timezone.now().isoformat()
+        pipe = redis.pipeline(transaction=False)
+        for index in candidates:
+            script(keys=[keys['valid'], keys['used'], keys['pending']], args=[codes[index], scanned_at], client=pipe)
+        for index, (status, qty) in zip(candidates, pipe.execute()):
+            if status:
+                results[index].update(result=RESULT_OK if status == 1 else RESULT_USED, qty=int(qty))
+    _count(redis, results)
+    return results
+
+
+def _scan_db(service_id, code, day):
+    from vendors.models import TicketSale
+
+    ticket = _valid_on(
+        TicketSale.objects.filter(qr_code=code, ticket_type__service_id=service_id, status__in=ISSUED_STATUSES), day
+    ).values('id', 'total_qty').first() if code else None
+    if ticket is None:
+        return {'code': code, 'result': RESULT_INVALID, 'qty': 0}
+    if TicketSale.objects.filter(pk=ticket['id'], status__in=UNUSED_STATUSES).update(status='USED'):
+        return {'code': code, 'result': RESULT_OK, 'qty': ticket['total_qty']}
+    return {'code': code, 'result': RESULT_USED, 'qty': ticket['total_qty']}
+
+
+def add_ticket(ticket, day=None):
+    """
+    Билет оплачен/изменён в течение дня — обновить индекс, если он уже построен.
+    """
+    from vendors.services import qr
+
+    day = day or timezone.localdate()
+    service_id = ticket.ticket_type.service_id
+    try:
+        redis = _redis()
+        keys = _keys(service_id, day)
+        meta = redis.hmget(keys['meta'], 'bits', 'hashes')
+        if not all(meta):
+            return
+        qr.ensure_hashes([ticket])
+        pipe = redis.pipeline()
+        if ticket.status in ISSUED_STATUSES and ticket.is_valid:
+            pipe.hset(keys['valid'], ticket.qr_code, ticket.total_qty)
+            for position in BloomFilter(int(meta[0]), int(meta[1])).positions(ticket.qr_code):
+                pipe.setbit(keys['bloom'], position, 1)
+        else:
+            pipe.hdel(keys['valid'], ticket.qr_code)
+        pipe.hincrby(keys['meta'], 'version', 1)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not update scan index for ticket {ticket.pk}: {e}")
+
+
+def sync():
+    """
+    Переносит проходы из Redis в БД (TicketSale.status='USED'). Возвращает число билетов.
+    """
+    from vendors.models import TicketSale
+
+    redis = _redis()
+    take = redis.register_script(TAKE_PENDING_SCRIPT)
+    synced = 0
+    for member in redis.smembers(ACTIVE_KEY):
+        member = member.decode() if isinstance(member, bytes) else member
+        service_id, day = member.split(':')
+        day = datetime.strptime(day, '%Y%m%d').date()
+        keys = _keys(service_id, day)
+        if not redis.exists(keys['meta']):
+            redis.srem(ACTIVE_KEY, member)
+            continue
+        items = take(keys=[keys['pending']])
+        pending = dict(zip(items[::2], items[1::2]))
+        if not pending:
+            continue
+        codes = [code.decode() if isinstance(code, bytes) else code for code in pending]
+        try:
+            for start in range(0, len(codes), SYNC_BATCH_SIZE):
+                TicketSale.objects.filter(
+                    qr_code__in=codes[start:start + SYNC_BATCH_SIZE], status__in=UNUSED_STATUSES
+                ).update(status='USED')
+        except Exception:
+            # Вернуть в очередь — перенесётся следующим запуском
+            redis.hset(keys['pending'], mapping=pending)
+            raise
+        synced += len(codes)
+    return synced
+
+
+def export(service_id, day=None):
+    """
+    Данные для офлайн-сканера: все хэши дня (с числом человек), использованные и блум-фильтр.
+    """
+    day = day or timezone.localdate()
+    redis = _redis()
+    keys = _keys(service_id, day)
+    if not redis.exists(keys['meta']):
+        load(service_id, day, redis)
+
+    pipe = redis.pipeline(transaction=False)
+    pipe.hgetall(keys['valid'])
+    pipe.smembers(keys['used'])
+    pipe.hgetall(keys['meta'])
+    pipe.get(keys['bloom'])
+    valid, used, meta, bloom = pipe.execute()
+
+    def text(value):
+        return value.decode() if isinstance(value, bytes) else value
+
+    meta = {text(k): int(v) for k, v in meta.items()}
+    used = sorted(text(code) for code in used)
+    return {
+        'service_id': int(service_id),
+        'date': day.isoformat(),
+        'version': meta.get('version', 0),
+        'tickets': {text(code): int(qty) for code, qty in valid.items()},
+        'used': used,
+        'bloom': {
+            'bits': meta.get('bits', 0), 'hashes': meta.get('hashes', 0),
+            'algorithm': BloomFilter.ALGORITHM, 'data': base64.b64encode(bloom or b'').decode(),
+        },
+        'etag': f'"{meta.get("version", 0)}-{len(used)}"',
+    }
+
+
+def _count(redis, results):
+    pipe = redis.pipeline(transaction=False)
+    for item in results:
+        pipe.hincrby(STATS_KEY, f"result:{item['result']}", 1)
+    try:
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def stats():
+    """
+    {результат: число сканов} с момента сброса ключа.
+    """
+    return {
+        (k.decode() if isinstance(k, bytes) else k).split(':', 1)[1]: int(v)
+        for k, v in _redis().hgetall(STATS_KEY).items()
+    }
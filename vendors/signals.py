@@ -0,0 +1,91 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from vendors.models import TicketSale
+from vendors.services import rollup, scan
+
+
+@receiver(pre_save, sender=TicketSale)
+def ticket_stats_snapshot(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает прежний вклад продажи в дневную сводку до сохранения.
+    """
+    if raw:
+        return
+    instance._stats_footprint = None
+    if instance.pk:
+        previous = TicketSale.objects.filter(pk=instance.pk).values(
+            'ticket_type__service__vendor_id', 'purchase_date', 'status', 'price_paid'
+        ).first()
+        if previous:
+            instance._stats_footprint = rollup.ticket_footprint(*previous.values())
+
+
+def _ticket_footprint(instance):
+    return rollup.ticket_footprint(
+        rollup.ticket_vendor_id(instance.ticket_type_id),
+        instance.purchase_date, instance.status, instance.price_paid,
+    )
+
+
+@receiver(post_save, sender=TicketSale)
+def ticket_stats_sync(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    footprint = _ticket_footprint(instance)
+    rollup.sync(getattr(instance, '_stats_footprint', None), footprint)
+    instance._stats_footprint = footprint
+
+
+@receiver(post_save, sender=TicketSale)
+def ticket_scan_index_sync(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Оплата/отмена билета в течение дня — обновить индекс сканирования, если он уже построен.
+    """
+    if raw or (created and instance.status not in scan.ISSUED_STATUSES):
+        return
+    transaction.on_commit(lambda: scan.add_ticket(instance))
+
+
+@receiver(post_delete, sender=TicketSale)
+def ticket_stats_release(sender, instance, **kwargs):
+    rollup.sync(_ticket_footprint(instance), None)
+
+
+@receiver(pre_save, sender=Booking)
+def booking_stats_snapshot(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает прежний вклад брони в дневную сводку до сохранения.
+    """
+    if raw:
+        return
+    instance._stats_footprint = None
+    if instance.pk:
+        previous = Booking.objects.filter(pk=instance.pk).values(
+            'hotel__vendor_id', 'created_at', 'status', 'total_price'
+        ).first()
+        if previous:
+            instance._stats_footprint = rollup.booking_footprint(*previous.values())
+
+
+def _booking_footprint(instance):
+    return rollup.booking_footprint(
+        rollup.hotel_vendor_id(instance.hotel_id),
+        instance.created_at, instance.status, instance.total_price,
+    )
+
+
+@receiver(post_save, sender=Booking)
+def booking_stats_sync(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    footprint = _booking_footprint(instance)
+    rollup.sync(getattr(instance, '_stats_footprint', None), footprint)
+    instance._stats_footprint = footprint
+
+
+@receiver(post_delete, sender=Booking)
+def booking_stats_release(sender, instance, **kwargs):
+    rollup.sync(_booking_footprint(instance), None)
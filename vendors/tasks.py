@@ -4,27 +4,38 @@ import logging
 logger = logging.getLogger(__name__)
 
 @shared_task
-def generate_ticket_pdf_task(ticket_id):
+def generate_ticket_pdf_task(ticket_id, language=None):
     """
-    Async task to generate PDF ticket.
+    Async task to pre-render PDF ticket into media storage (hotels.documents).
     """
     from .models import TicketSale
-    from hotels.pdf_generator import TicketPDFGenerator
+    from hotels import documents
     
     logger.info(f"Generating PDF for ticket {ticket_id}...")
     try:
-        ticket = TicketSale.objects.get(id=ticket_id)
-        generator = TicketPDFGenerator(ticket)
-        pdf_buffer = generator.generate()
+        ticket = TicketSale.objects.select_related('ticket_type__service').get(id=ticket_id)
+        # Ticket hash for the QR code is assigned on first render (vendors.services.qr)
+        entry = documents.get('ticket', ticket, language)
         
-        # Save placeholder for QR if empty
-        if not ticket.qr_code:
-            ticket.qr_code = f"TCKT-{ticket.id}-{ticket.purchase_date.strftime('%Y%m%d')}"
-            ticket.save(update_fields=['qr_code'])
-            
-        return f"PDF generated for {ticket_id}"
+        return f"PDF generated for {ticket_id}: {entry['path']}"
     except TicketSale.DoesNotExist:
         return f"Ticket {ticket_id} not found"
     except Exception as e:
         logger.error(f"Failed to generate ticket PDF: {e}")
         return str(e)
+
+
+@shared_task(ignore_result=True)
+def sync_ticket_scans_task():
+    """
+    Moves gate scans from the Redis scan index into TicketSale (status USED).
+    """
+    from .services import scan
+
+    try:
+        synced = scan.sync()
+    except Exception as e:
+        logger.warning(f"Ticket scan sync failed: {e}")
+        return
+    if synced:
+        logger.info(f"Synced {synced} ticket scans")
@@ -1,3 +1,299 @@
-from django.test import TestCase
+import base64
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from bookings.models import Booking
+from config_module.models import CurrencyRate
+from hotels import documents
+from hotels.models import Hotel
+from .models import Vendor, VendorService, ServiceTicket, TicketSale, VendorDailyStats
+from .services import document_export, qr, rollup, scan
+
+
+class VendorDailyStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='buyer@example.com', password='password')
+        self.currency = CurrencyRate.objects.create(code='USD', rate_to_uzs=12500)
+        self.vendor = Vendor.objects.create(brand_name="Rollup Tours")
+        service = VendorService.objects.create(vendor=self.vendor, type='tour', description='City tour')
+        self.ticket_type = ServiceTicket.objects.create(
+            service=service, weekday_price=10, weekend_price=12, resident_price=8,
+            non_resident_price=15, validity_period=timedelta(days=1),
+        )
+        self.hotel = Hotel.objects.create(name="Rollup Hotel", vendor=self.vendor)
+
+    def today(self):
+        return VendorDailyStats.objects.get(vendor=self.vendor, date=timezone.localdate())
+
+    def test_ticket_status_changes_update_rollup(self):
+        sale = TicketSale.objects.create(
+            ticket_type=self.ticket_type, user=self.user, price_paid=Decimal('25.00'), currency=self.currency,
+        )
+        self.assertEqual((self.today().ticket_orders, self.today().ticket_paid), (1, 0))
+
+        sale.mark_as_paid()
+        self.assertEqual(self.today().ticket_revenue, Decimal('25.00'))
+
+        sale.delete()
+        self.assertEqual((self.today().ticket_orders, self.today().ticket_revenue), (0, 0))
+
+    def test_booking_confirmation_and_rebuild(self):
+        booking = Booking.objects.create(
+            user=self.user, hotel=self.hotel, check_in=date(2026, 7, 1), check_out=date(2026, 7, 3),
+            total_price=Decimal('140.00'), currency=self.currency,
+        )
+        booking.status = 'CONFIRMED'
+        booking.save()
+        self.assertEqual((self.today().booking_orders, self.today().booking_revenue), (1, Decimal('140.00')))
+
+        VendorDailyStats.objects.all().delete()
+        self.assertEqual(rollup.rebuild(vendor_ids=[self.vendor.id]), 1)
+        self.assertEqual(rollup.totals(self.vendor, days=7)['booking_revenue'], Decimal('140.00'))
+
+
+class FakeBookingGenerator:
+    def __init__(self, booking):
+        self.booking = booking
+
+    def generate(self):
+        return io.BytesIO(b"%PDF booking " + str(self.booking.id).encode())
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(prefix='silkroad_test_exports'),
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class VendorDocumentExportTest(TestCase):
+    def setUp(self):
+        from django.conf import settings
+
+        self.addCleanup(shutil.rmtree, settings.MEDIA_ROOT, ignore_errors=True)
+        patcher = mock.patch.dict(documents.KINDS['booking'], {'generator': FakeBookingGenerator})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        user = User.objects.create_user(email='guest@example.com', password='password')
+        currency = CurrencyRate.objects.create(code='USD', rate_to_uzs=12500)
+        self.vendor = Vendor.objects.create(brand_name="Export Hotels")
+        hotel = Hotel.objects.create(name="Export Hotel", vendor=self.vendor)
+        other = Hotel.objects.create(name="Other Hotel", vendor=Vendor.objects.create(brand_name="Other"))
+
+        def book(hotel, check_in, status):
+            return Booking.objects.create(
+                user=user, hotel=hotel, check_in=check_in, check_out=check_in + timedelta(days=2),
+                status=status, currency=currency,
+            )
+
+        self.included = [book(hotel, date(2026, 7, 1), 'CONFIRMED'), book(hotel, date(2026, 7, 31), 'COMPLETED')]
+        book(hotel, date(2026, 7, 10), 'NEW')
+        book(hotel, date(2026, 8, 1), 'CONFIRMED')
+        book(other, date(2026, 7, 10), 'CONFIRMED')
+
+    def test_zip_contains_only_vendor_confirmed_bookings_in_range(self):
+        objects = document_export.queryset(self.vendor, 'bookings', date(2026, 7, 1), date(2026, 7, 31))
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(document_export.stream_zip('bookings', objects.iterator()))))
+
+        self.assertEqual(archive.namelist(), [f'booking-{b.id}.pdf' for b in self.included])
+        self.assertEqual(archive.read(f'booking-{self.included[0].id}.pdf'), b"%PDF booking %d" % self.included[0].id)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TicketQRTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        qr.modules.cache_clear()
+        self.user = User.objects.create_user(email='visitor@example.com', password='password')
+        currency = CurrencyRate.objects.create(code='USD', rate_to_uzs=12500)
+        service = VendorService.objects.create(
+            vendor=Vendor.objects.create(brand_name="QR Sight"), type='sight', description='Museum'
+        )
+        ticket_type = ServiceTicket.objects.create(
+            service=service, weekday_price=10, weekend_price=12, resident_price=8,
+            non_resident_price=15, validity_period=timedelta(days=1),
+        )
+        self.tickets = [
+            TicketSale.objects.create(ticket_type=ticket_type, user=self.user, price_paid=10, currency=currency, status='PAID')
+            for _ in range(3)
+        ]
+
+    def test_modules_are_cached_and_drawn_as_vectors(self):
+        data = qr.payload(self.tickets[0])
+        with mock.patch.object(qr, '_build_runs', wraps=qr._build_runs) as build:
+            count, runs = qr.modules(data)
+            qr.modules.cache_clear()
+            self.assertEqual(qr.modules(data), (count, runs))  # из общего кэша
+        self.assertEqual(build.call_count, 1)
+
+        drawing = qr.drawing(data, 100)
+        self.assertEqual(len(drawing.contents), len(runs) + 1)  # фон + серии модулей
+
+    def test_batch_endpoint_assigns_hashes_for_whole_order(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        ids = ','.join(str(t.id) for t in self.tickets[:2])
+        response = client.get('/api/hotels/tickets/qr/', {'ids': ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()], [t.id for t in self.tickets[:2]])
+        stored = dict(TicketSale.objects.filter(id__in=[t.id for t in self.tickets]).values_list('id', 'qr_code'))
+        self.assertEqual(stored[self.tickets[0].id], qr.make_hash(self.tickets[0].id))
+        self.assertIsNone(stored[self.tickets[2].id])
+        self.assertTrue(response.json()[0]['payload'].endswith(stored[self.tickets[0].id]))
+
+
+class ScanFixtureMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(email='gate@example.com', password='password')
+        self.currency = CurrencyRate.objects.create(code='USD', rate_to_uzs=12500)
+        self.service = VendorService.objects.create(
+            vendor=Vendor.objects.create(brand_name="Scan Sight"), type='sight', description='Fortress'
+        )
+        self.ticket_type = ServiceTicket.objects.create(
+            service=self.service, weekday_price=10, weekend_price=12, resident_price=8,
+            non_resident_price=15, validity_period=timedelta(days=1),
+        )
+        self.ticket = self.sell(total_qty=3)
+
+    def sell(self, purchased_days_ago=0, status='PAID', **fields):
+        ticket = TicketSale.objects.create(
+            ticket_type=self.ticket_type, user=self.user, price_paid=10, currency=self.currency,
+            status=status, **fields,
+        )
+        if purchased_days_ago:
+            TicketSale.objects.filter(pk=ticket.pk).update(
+                purchase_date=timezone.now() - timedelta(days=purchased_days_ago)
+            )
+        qr.ensure_hashes([ticket])
+        return ticket
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TicketScanTest(ScanFixtureMixin, TestCase):
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        codes = [qr.make_hash(n) for n in range(500)]
+        bloom = scan.BloomFilter.for_capacity(len(codes))
+        for code in codes:
+            bloom.add(code)
+        restored = scan.BloomFilter(bloom.bits, bloom.hashes, bytes(bloom.data))
+        self.assertTrue(all(code in restored for code in codes))
+        self.assertLess(sum(qr.make_hash(-n) in restored for n in range(1, 2001)), 10)
+
+    def test_second_scan_is_rejected_and_ticket_marked_used(self):
+        # Без Redis (locmem в тестах) скан идёт через атомарный UPDATE в БД
+        code = qr.payload(self.ticket)
+        first, second, unknown = scan.scan(self.service.id, [code, self.ticket.qr_code, 'forged'])
+
+        self.assertEqual((first['result'], first['qty']), ('ok', 3))
+        self.assertEqual(second['result'], 'used')
+        self.assertEqual(unknown['result'], 'invalid')
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'USED')
+        self.assertEqual(rollup.totals(self.service.vendor)['ticket_paid'], 1)
+
+    def test_expired_ticket_is_rejected(self):
+        expired = self.sell(purchased_days_ago=3, total_qty=1)
+        [result] = scan.scan(self.service.id, [expired.qr_code])
+
+        self.assertEqual(result['result'], 'invalid')
+        expired.refresh_from_db()
+        self.assertEqual(expired.status, 'PAID')
+
+    def test_vendor_confirmed_ticket_is_admitted(self):
+        confirmed = self.sell(status='CONFIRMED', total_qty=2)
+        first, second = scan.scan(self.service.id, [confirmed.qr_code, confirmed.qr_code])
+
+        self.assertEqual((first['result'], first['qty']), ('ok', 2))
+        self.assertEqual(second['result'], 'used')
+        confirmed.refresh_from_db()
+        self.assertEqual(confirmed.status, 'USED')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class RedisTicketScanTest(ScanFixtureMixin, TestCase):
+    """
+    Путь через индекс в Redis (Lua-скрипты) — на fakeredis с Lua; без него тесты пропускаются.
+    """
+
+    def setUp(self):
+        try:
+            import fakeredis
+            self.redis = fakeredis.FakeStrictRedis(server=fakeredis.FakeServer())
+            self.redis.eval('return 1', 0)
+        except Exception as e:
+            self.skipTest(f"fakeredis with Lua is not available: {e}")
+        patcher = mock.patch.object(scan, '_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        scan._local_blooms.clear()
+        self.addCleanup(scan._local_blooms.clear)
+        super().setUp()
+
+    def test_scan_marks_used_once_and_sync_moves_to_db(self):
+        expired = self.sell(purchased_days_ago=3, total_qty=1)
+        first, second, forged, old = scan.scan(
+            self.service.id, [qr.payload(self.ticket), self.ticket.qr_code, 'forged', expired.qr_code]
+        )
+
+        self.assertEqual((first['result'], first['qty']), ('ok', 3))
+        self.assertEqual(second['result'], 'used')
+        self.assertEqual((forged['result'], old['result']), ('invalid', 'invalid'))
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'PAID')  # до переноса проход только в Redis
+
+        self.assertEqual(scan.sync(), 1)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'USED')
+        self.assertEqual(scan.sync(), 0)
+        self.assertEqual(scan.stats(), {'ok': 1, 'used': 1, 'invalid': 2})
+
+    def test_reload_keeps_scans_not_yet_synced(self):
+        confirmed = self.sell(status='CONFIRMED', total_qty=1)
+        results = scan.scan(self.service.id, [self.ticket.qr_code, confirmed.qr_code])
+        self.assertEqual([r['result'] for r in results], ['ok', 'ok'])
+
+        # Повторный preload_scan_index до переноса :pending в БД
+        self.assertEqual(scan.load(self.service.id), 2)
+        scan._local_blooms.clear()
+        again = scan.scan(self.service.id, [self.ticket.qr_code, confirmed.qr_code])
+        self.assertEqual([r['result'] for r in again], ['used', 'used'])
+
+        self.assertEqual(scan.sync(), 2)
+        confirmed.refresh_from_db()
+        self.assertEqual(confirmed.status, 'USED')
+
+    def test_ticket_sold_after_load_is_added_to_index(self):
+        self.assertEqual(scan.load(self.service.id), 1)
+        late = self.sell(total_qty=2)
+        [before] = scan.scan(self.service.id, [late.qr_code])
+        self.assertEqual(before['result'], 'invalid')
+
+        scan.add_ticket(late)
+        scan._local_blooms.clear()  # вместо ожидания BLOOM_REFRESH
+        [after] = scan.scan(self.service.id, [late.qr_code])
+        self.assertEqual((after['result'], after['qty']), ('ok', 2))
+
+    def test_export_has_day_tickets_used_codes_and_bloom(self):
+        data = scan.export(self.service.id)
+        self.assertEqual(data['tickets'], {self.ticket.qr_code: 3})
+        self.assertEqual(data['used'], [])
+
+        scan.scan(self.service.id, [self.ticket.qr_code])
+        exported = scan.export(self.service.id)
+        self.assertEqual(exported['used'], [self.ticket.qr_code])
+        self.assertNotEqual(exported['etag'], data['etag'])
+        bloom = scan.BloomFilter(
+            exported['bloom']['bits'], exported['bloom']['hashes'], base64.b64decode(exported['bloom']['data'])
+        )
+        self.assertIn(self.ticket.qr_code, bloom)
@@ -11,7 +11,8 @@ from .views_api import (
 from .views_auth import SwitchToVendorContextView, SwitchToUserContextView, VendorListView
 from .views_vendor_api import (
     VendorDashboardStatsView, VendorServiceListCreateView, VendorServiceDetailView,
-    ServiceTicketListCreateView, TicketSaleListView, SalesAnalyticsView
+    ServiceTicketListCreateView, TicketSaleListView, SalesAnalyticsView,
+    VendorDocumentExportView, TicketScanView, TicketScanExportView
 )
 
 router = DefaultRouter()
@@ -49,6 +50,9 @@ urlpatterns = [
     path('services/<int:service_id>/tickets/', ServiceTicketListCreateView.as_view(), name='service-tickets'),
     path('sales/', TicketSaleListView.as_view(), name='vendor-sales'),
     path('analytics/', SalesAnalyticsView.as_view(), name='vendor-analytics'),
+    path('exports/documents/', VendorDocumentExportView.as_view(), name='vendor-document-export'),
+    path('scan/', TicketScanView.as_view(), name='vendor-ticket-scan'),
+    path('scan/export/', TicketScanExportView.as_view(), name='vendor-ticket-scan-export'),
     
     path('', include(router.urls)),
 ]
@@ -27,13 +27,9 @@ class VendorDashboardView(views.APIView):
         serializer = VendorDashboardSerializer(vendor)
         data = serializer.data
 
-        from django.db.models import Sum
-        from django.db.models.functions import TruncDate
         from django.utils import timezone
         from datetime import timedelta
-        from hotels.models import Hotel, Sight
-        from bookings.models import Booking
-        from vendors.models import TicketSale
+        from .services import rollup
 
         # Filter Logic
         days_param = request.query_params.get('days', '30')
@@ -41,38 +37,23 @@ class VendorDashboardView(views.APIView):
             days = int(days_param)
         except ValueError:
             days = 30
-            
+        days = max(days, 1)
+
         start_date = timezone.now() - timedelta(days=days)
 
-        # --- ENHANCED STATS CALCULATION (Filtered) ---
-        
-        # 1. Ticket Revenue
-        ticket_revenue = TicketSale.objects.filter(
-            vendor=vendor,
-            payment_status='paid',
-            created_at__gte=start_date
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-
-        # Booking Revenue
-        booking_revenue = Booking.objects.filter(
-            hotel__vendor=vendor,
-            status='CONFIRMED',
-            created_at__gte=start_date
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        
+        # --- STATS (from daily rollup: at most `days` rows) ---
+        daily = rollup.daily_rows(vendor, days)
+        ticket_revenue = sum((row['ticket_revenue'] for row in daily.values()), 0)
+        booking_revenue = sum((row['booking_revenue'] for row in daily.values()), 0)
         total_revenue = ticket_revenue + booking_revenue
-        
-        # 2. Total Orders
-        tickets_count = TicketSale.objects.filter(vendor=vendor, created_at__gte=start_date).count()
-        bookings_count = Booking.objects.filter(hotel__vendor=vendor, created_at__gte=start_date).count()
-        
-        total_orders = tickets_count + bookings_count
-        
-        # 3. Total Customers
-        ticket_customers = TicketSale.objects.filter(vendor=vendor, created_at__gte=start_date).count()
-        total_customers = ticket_customers + bookings_count 
 
-        # 4. Active Counts (Snapshot, not filtered by date)
+        total_orders = sum(row['ticket_orders'] + row['booking_orders'] for row in daily.values())
+        # Customers are counted per order (tickets + bookings), as before
+        total_customers = total_orders
+
+        today = daily.get(timezone.localdate(), {})
+
+        # Active Counts (Snapshot, not filtered by date)
         hotels_count = Hotel.objects.filter(vendor=vendor).count()
         tours_count = Sight.objects.filter(vendor=vendor).count()
 
@@ -80,7 +61,7 @@ class VendorDashboardView(views.APIView):
         data['stats'] = {
             'hotels': hotels_count,
             'tours': tours_count,
-            'bookings_today': 0, 
+            'bookings_today': today.get('ticket_orders', 0) + today.get('booking_orders', 0),
             'total_bookings': total_orders,
             'total_customers': total_customers,
             'total_revenue': total_revenue
@@ -88,56 +69,14 @@ class VendorDashboardView(views.APIView):
         data['balance'] = total_revenue
 
         # --- CHART DATA ---
-        
-        # Tickets Daily
-        daily_tickets = TicketDetail.objects.filter(
-            ticket__vendor=vendor,
-            ticket__is_paid=True, 
-            created_at__gte=start_date
-        ).annotate(date=TruncDate('created_at'))\
-         .values('date')\
-         .annotate(income=Sum('amount'))\
-         .order_by('date')
-
-        # Bookings Daily
-        daily_bookings = Booking.objects.filter(
-            hotel__vendor=vendor,
-            status='CONFIRMED',
-            created_at__gte=start_date
-        ).annotate(date=TruncDate('created_at'))\
-         .values('date')\
-         .annotate(income=Sum('total_price'))\
-         .order_by('date')
-
-        # Merge Chart Data
-        income_map = {}
-        for entry in daily_tickets:
-            d = entry['date'].strftime('%d %b')
-            income_map[d] = income_map.get(d, 0) + entry['income']
-            
-        for entry in daily_bookings:
-            d = entry['date'].strftime('%d %b')
-            income_map[d] = income_map.get(d, 0) + entry['income']
-            
         final_chart_dates = []
         final_chart_values = []
-        
-        # Generate date labels for range
-        # If range is huge (365 days), we should group by Month. 
-        # For simplicity, if days > 60, maybe simpler labels?
-        # Let's keep daily for now but loop carefully
-        
-        step = 1
-        loop_days = days
-        if days > 60: 
-             # Too many points? ApexCharts handles it, but labels might crowd.
-             pass
-
-        for i in range(loop_days):
-            d_date = (timezone.now() - timedelta(days=(loop_days - 1) - i)).date()
-            d_str = d_date.strftime('%d %b')
-            final_chart_dates.append(d_str)
-            final_chart_values.append(income_map.get(d_str, 0))
+        today_date = timezone.localdate()
+        for i in range(days):
+            d_date = today_date - timedelta(days=(days - 1) - i)
+            row = daily.get(d_date)
+            final_chart_dates.append(d_date.strftime('%d %b'))
+            final_chart_values.append(row['ticket_revenue'] + row['booking_revenue'] if row else 0)
 
         data['chart_data'] = {
             'dates': final_chart_dates,
@@ -146,12 +85,14 @@ class VendorDashboardView(views.APIView):
 
         # --- RECENT BOOKINGS (Filtered) ---
         recent_tickets = list(TicketSale.objects.filter(
-            vendor=vendor, payment_status='paid', created_at__gte=start_date
-        ).order_by('-created_at')[:5])
+            ticket_type__service__vendor=vendor,
+            status__in=rollup.TICKET_REVENUE_STATUSES,
+            purchase_date__gte=start_date
+        ).order_by('-purchase_date')[:5])
         
         recent_hotel_bookings = list(Booking.objects.filter(
             hotel__vendor=vendor, created_at__gte=start_date
-        ).order_by('-created_at')[:5])
+        ).select_related('hotel').order_by('-created_at')[:5])
         
         combined = []
         for t in recent_tickets:
@@ -159,8 +100,8 @@ class VendorDashboardView(views.APIView):
                 'id': f"T-{t.id}",
                 'user': "Guest", # Simplified
                 'service': "Tour",
-                'amount': t.total_amount,
-                'date': t.created_at,
+                'amount': t.price_paid,
+                'date': t.purchase_date,
                 'status': 'Paid'
             })
             
@@ -261,6 +202,10 @@ class VendorSightViewSet(viewsets.ModelViewSet):
             
             # Save
             path = default_storage.save(filename, ContentFile(image.read()))
+
+            # thumb/card/hero (WebP + JPEG) строятся в фоне
+            from silkroad_backend import images as image_derivatives
+            image_derivatives.schedule(path)
             
             # Return URL (assuming standard media setup)
             url = default_storage.url(path)
@@ -301,9 +246,9 @@ class VendorBookingViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Notify User
         if booking.user:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=booking.user,
+            from notifications import dispatch
+            dispatch.notify(
+                booking.user_id,
                 title="Booking Confirmed",
                 message=f"Your booking at {booking.hotel.name} has been confirmed!",
                 type="success",
@@ -334,9 +279,9 @@ class VendorBookingViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Notify User
         if booking.user:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=booking.user,
+            from notifications import dispatch
+            dispatch.notify(
+                booking.user_id,
                 title="Booking Declined",
                 message=f"Your booking at {booking.hotel.name} was declined. Reason: {reason}",
                 type="danger",
@@ -380,9 +325,9 @@ class VendorTicketViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Notify User
         if ticket.created_by:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=ticket.created_by,
+            from notifications import dispatch
+            dispatch.notify(
+                ticket.created_by_id,
                 title="Tour Confirmed",
                 message=f"Your tour '{ticket.sight.name}' has been confirmed! You can now download your voucher.",
                 type="success",
@@ -414,9 +359,9 @@ class VendorTicketViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Notify User
         if ticket.created_by:
-            from notifications.models import Notification
-            Notification.objects.create(
-                user=ticket.created_by,
+            from notifications import dispatch
+            dispatch.notify(
+                ticket.created_by_id,
                 title="Tour Declined",
                 message=f"Your tour '{ticket.sight.name}' was declined. Reason: {ticket.rejection_reason}",
                 type="danger",
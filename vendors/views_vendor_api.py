@@ -2,7 +2,10 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, generics
 from django.db.models import Sum, Count, Q
+from django.http import HttpResponseNotModified, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
 from datetime import timedelta
 
 from .models import Vendor, VendorService, ServiceTicket, TicketSale
@@ -14,6 +17,7 @@ from .permissions import (
     IsVendorOwner, IsVendorOperator, 
     CanManageServices, CanSellTickets, CanManageVendorSettings
 )
+from .services import document_export, rollup, scan
 
 
 class VendorDashboardStatsView(APIView):
@@ -33,14 +37,9 @@ class VendorDashboardStatsView(APIView):
 
         # Calculate stats
         total_services = VendorService.objects.filter(vendor=vendor, is_active=True).count()
-        total_tickets_sold = TicketSale.objects.filter(
-            ticket_type__service__vendor=vendor
-        ).count()
-        
-        total_revenue = TicketSale.objects.filter(
-            ticket_type__service__vendor=vendor,
-            status='PAID'
-        ).aggregate(total=Sum('price_paid'))['total'] or 0
+        stats = rollup.totals(vendor)
+        total_tickets_sold = stats['ticket_orders']
+        total_revenue = stats['ticket_revenue']
 
         # Recent sales (last 30 days)
         thirty_days_ago = timezone.now() - timedelta(days=30)
@@ -53,7 +52,7 @@ class VendorDashboardStatsView(APIView):
         top_services = VendorService.objects.filter(
             vendor=vendor
         ).annotate(
-            revenue=Sum('ticket_types__sales__price_paid', filter=Q(ticket_types__sales__status='PAID'))
+            revenue=Sum('ticket_types__sales__price_paid', filter=Q(ticket_types__sales__status__in=rollup.TICKET_REVENUE_STATUSES))
         ).order_by('-revenue')[:5]
 
         data = {
@@ -160,36 +159,25 @@ class SalesAnalyticsView(APIView):
         except ValueError:
             days = 30
 
-        start_date = timezone.now() - timedelta(days=days)
-
-        # Daily sales chart
-        daily_sales = TicketSale.objects.filter(
-            ticket_type__service__vendor=vendor,
-            purchase_date__gte=start_date,
-            status='PAID'
-        ).extra(
-            select={'day': 'DATE(purchase_date)'}
-        ).values('day').annotate(
-            revenue=Sum('price_paid'),
-            count=Count('id')
-        ).order_by('day')
+        # Daily sales chart (from daily rollup)
+        daily_sales = [
+            {'day': day, 'revenue': row['ticket_revenue'], 'count': row['ticket_paid']}
+            for day, row in sorted(rollup.daily_rows(vendor, days).items())
+            if row['ticket_paid']
+        ]
 
         # Sales by service
         sales_by_service = VendorService.objects.filter(
             vendor=vendor
         ).annotate(
-            total_sales=Count('ticket_types__sales', filter=Q(ticket_types__sales__status='PAID')),
-            total_revenue=Sum('ticket_types__sales__price_paid', filter=Q(ticket_types__sales__status='PAID'))
+            total_sales=Count('ticket_types__sales', filter=Q(ticket_types__sales__status__in=rollup.TICKET_REVENUE_STATUSES)),
+            total_revenue=Sum('ticket_types__sales__price_paid', filter=Q(ticket_types__sales__status__in=rollup.TICKET_REVENUE_STATUSES))
         ).order_by('-total_revenue')
 
         # Conversion rate (if we track views)
-        total_tickets = TicketSale.objects.filter(
-            ticket_type__service__vendor=vendor
-        ).count()
-        paid_tickets = TicketSale.objects.filter(
-            ticket_type__service__vendor=vendor,
-            status='PAID'
-        ).count()
+        stats = rollup.totals(vendor)
+        total_tickets = stats['ticket_orders']
+        paid_tickets = stats['ticket_paid']
         
         conversion_rate = (paid_tickets / total_tickets * 100) if total_tickets > 0 else 0
 
@@ -202,3 +190,107 @@ class SalesAnalyticsView(APIView):
         }
 
         return Response(data)
+
+
+class VendorDocumentExportView(APIView):
+    """
+    Bulk export of confirmed bookings / paid tickets for a date range.
+    GET /api/vendors/exports/documents/?type=bookings|tickets&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&output=zip|pdf
+    """
+    permission_classes = [IsVendorOperator]
+
+    def get(self, request):
+        kind = request.query_params.get('type', 'bookings')
+        export_format = request.query_params.get('output', 'zip')
+        date_from = parse_date(request.query_params.get('date_from') or '')
+        date_to = parse_date(request.query_params.get('date_to') or '')
+
+        if kind not in document_export.KINDS or export_format not in ('zip', 'pdf'):
+            return Response({'error': 'type must be bookings|tickets, output zip|pdf'}, status=status.HTTP_400_BAD_REQUEST)
+        if not date_from or not date_to or date_from > date_to:
+            return Response({'error': 'date_from and date_to (YYYY-MM-DD) are required'}, status=status.HTTP_400_BAD_REQUEST)
+        if (date_to - date_from).days > document_export.MAX_DAYS:
+            return Response({'error': f'Date range is limited to {document_export.MAX_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+
+        objects = document_export.queryset(request.vendor, kind, date_from, date_to)
+        filename = f'{kind}-{date_from:%Y%m%d}-{date_to:%Y%m%d}.{export_format}'
+
+        if export_format == 'pdf':
+            objects = list(objects[:document_export.PDF_LIMIT + 1])
+            if len(objects) > document_export.PDF_LIMIT:
+                return Response(
+                    {'error': f'Too many documents for a single PDF (max {document_export.PDF_LIMIT}), use output=zip'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not objects:
+                return Response({'error': 'No documents for this period'}, status=status.HTTP_404_NOT_FOUND)
+            response = StreamingHttpResponse(document_export.stream_pdf(kind, objects), content_type='application/pdf')
+        else:
+            response = StreamingHttpResponse(
+                document_export.stream_zip(kind, objects.iterator(chunk_size=100)), content_type='application/zip'
+            )
+
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+def _scan_service_id(request, value):
+    try:
+        service_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    if not VendorService.objects.filter(id=service_id, vendor=request.vendor).exists():
+        return None
+    return service_id
+
+
+class TicketScanView(APIView):
+    """
+    Gate scan: marks tickets as used (atomic, a second scan answers 'used').
+    POST /api/vendors/scan/ {"service_id": 1, "code": "<QR content>"}
+    Batch (offline scanner upload): {"service_id": 1, "codes": ["...", ...]}
+    """
+    permission_classes = [IsVendorOperator]
+    MAX_CODES = 500
+
+    def post(self, request):
+        service_id = _scan_service_id(request, request.data.get('service_id'))
+        if service_id is None:
+            return Response({'error': 'Service not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        codes = request.data.get('codes')
+        single = codes is None
+        if single:
+            codes = [request.data.get('code')]
+        if not isinstance(codes, list) or not codes or len(codes) > self.MAX_CODES:
+            return Response({'error': f'code or codes (1..{self.MAX_CODES}) is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = scan.scan(service_id, [str(code or '') for code in codes])
+        return Response(results[0] if single else {'results': results})
+
+
+class TicketScanExportView(APIView):
+    """
+    Day's ticket hashes + bloom filter for offline handheld scanners (ETag/304).
+    GET /api/vendors/scan/export/?service_id=1&date=YYYY-MM-DD
+    """
+    permission_classes = [IsVendorOperator]
+
+    def get(self, request):
+        service_id = _scan_service_id(request, request.query_params.get('service_id'))
+        if service_id is None:
+            return Response({'error': 'Service not found'}, status=status.HTTP_404_NOT_FOUND)
+        day = parse_date(request.query_params.get('date') or '') or timezone.localdate()
+
+        try:
+            data = scan.export(service_id, day)
+        except Exception as e:
+            return Response({'error': f'Scan index unavailable: {e}'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        etag = data.pop('etag')
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = Response(data)
+        response['ETag'] = etag
+        return response